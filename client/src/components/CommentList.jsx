@@ -1,14 +1,49 @@
 // src/components/CommentList.jsx
+import { useState } from 'react';
 import { Link } from 'react-router-dom';
+import toast from 'react-hot-toast';
+import useCursorPagination from '../hooks/useCursorPagination';
 
-const CommentList = ({ comments }) => {
-    if (!comments || comments.length === 0) {
+// 'comments' é a prévia que vem no feed (os mais recentes).
+// A conversa completa só é buscada quando o usuário pede.
+const CommentList = ({ comments, postId = null, totalCount = 0 }) => {
+    const { items: thread, hasMore, loadingMore, loadFirstPage, loadMore } = useCursorPagination();
+    const [expanded, setExpanded] = useState(false);
+    const [loadingThread, setLoadingThread] = useState(false);
+
+    const previewCount = comments?.length || 0;
+
+    const handleExpand = async () => {
+        setLoadingThread(true);
+        try {
+            await loadFirstPage(`/api/posts/${postId}/comments/`);
+            setExpanded(true);
+        } catch (error) {
+            console.error("Erro ao carregar comentários:", error);
+            toast.error("Erro ao carregar comentários.");
+        } finally {
+            setLoadingThread(false);
+        }
+    };
+
+    if (previewCount === 0) {
         return <p className="text-sm text-base-content/60 mt-4">Nenhum comentário ainda.</p>;
     }
 
+    // Comentários novos (adicionados depois de expandir) continuam aparecendo no fim
+    const visibleComments = expanded
+        ? [...thread, ...comments.filter(c => !thread.some(t => t.id === c.id) && !hasMore)]
+        : comments;
+
     return (
         <div className="mt-4 space-y-3">
-            {comments.map(comment => (
+            {!expanded && postId && totalCount > previewCount && (
+                <button className="btn btn-link btn-xs px-0" onClick={handleExpand} disabled={loadingThread}>
+                    {loadingThread ? <span className="loading loading-spinner loading-xs"></span> : `Ver todos os ${totalCount} comentários`}
+                </button>
+            )}
+
+            {visibleComments.map(comment => (
                 
                 <div key={comment.id} className="chat chat-start"> {/* Use chat bubbles */}
                     <div className="chat-image avatar avatar-xs placeholder">
@@ -23,6 +58,12 @@ const CommentList = ({ comments }) => {
                     <div className="chat-bubble text-sm">{comment.content}</div>
                 </div>
             ))}
+
+            {expanded && hasMore && (
+                <button className="btn btn-link btn-xs px-0" onClick={loadMore} disabled={loadingMore}>
+                    {loadingMore ? <span className="loading loading-spinner loading-xs"></span> : 'Carregar mais comentários'}
+                </button>
+            )}
         </div>
     );
 };
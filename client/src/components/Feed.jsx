@@ -11,7 +11,7 @@ import Reactions from './Reactions';
 import CommentForm from './CommentForm';
 import CommentList from './CommentList';
 
-const Feed = ({ posts, setPosts, loading, getPosts, emptyFeedMessage, showCreateWhenEmpty = false, communityId = null, isMember = true }) => {
+const Feed = ({ posts, setPosts, loading, getPosts, emptyFeedMessage, showCreateWhenEmpty = false, communityId = null, isMember = true, hasMore = false, onLoadMore = null, loadingMore = false }) => {
     
     const { user, setUser } = useContext(AuthContext); 
     const navigate = useNavigate();
@@ -234,7 +234,7 @@ const Feed = ({ posts, setPosts, loading, getPosts, emptyFeedMessage, showCreate
                                     
                                     <div className="divider my-1"></div>
 
-                                    <CommentList comments={post.comments} />
+                                    <CommentList comments={post.comments} postId={post.pk} totalCount={post.comments_count} />
                                     
                                     {user ? (
                                         <CommentForm
@@ -242,7 +242,7 @@ const Feed = ({ posts, setPosts, loading, getPosts, emptyFeedMessage, showCreate
                                             onCommentAdded={(newComment) => {
                                                 setPosts(currentPosts => currentPosts.map(p =>
                                                     p.pk === post.pk
-                                                        ? { ...p, comments: [...p.comments, newComment] }
+                                                        ? { ...p, comments: [...p.comments, newComment], comments_count: (p.comments_count || 0) + 1 }
                                                         : p
                                                 ));
                                             }}
@@ -256,6 +256,12 @@ const Feed = ({ posts, setPosts, loading, getPosts, emptyFeedMessage, showCreate
                             </div>
                         );
                     })}
+
+                    {hasMore && onLoadMore && (
+                        <button className="btn btn-outline btn-wide" onClick={onLoadMore} disabled={loadingMore}>
+                            {loadingMore ? <span className="loading loading-spinner loading-sm"></span> : 'Carregar mais'}
+                        </button>
+                    )}
                 </div>
             </main>
 
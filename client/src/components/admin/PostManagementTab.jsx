@@ -1,11 +1,11 @@
 // src/components/admin/PostManagementTab.jsx
 import { useState, useEffect, useCallback } from 'react';
-import axiosInstance from '../../utils/axiosInstance';
 import toast from 'react-hot-toast';
 import Feed from '../Feed'; // Reutilizamos o componente Feed
+import useCursorPagination from '../../hooks/useCursorPagination';
 
 const PostManagementTab = () => {
-    const [posts, setPosts] = useState([]);
+    const { items: posts, setItems: setPosts, hasMore, loadingMore, loadFirstPage, loadMore } = useCursorPagination();
     const [loading, setLoading] = useState(true);
 
     // Esta é a função que o componente Feed usará para buscar os posts
@@ -13,8 +13,7 @@ const PostManagementTab = () => {
         setLoading(true);
         try {
             // Usamos o endpoint de admin para ver TODOS os posts
-            const response = await axiosInstance.get('/api/admin/posts/');
-            setPosts(response.data);
+            await loadFirstPage('/api/admin/posts/');
         } catch (error) {
              if (error.response?.status !== 401) {
                 toast.error("Não foi possível carregar os posts.");
@@ -22,7 +21,7 @@ const PostManagementTab = () => {
         } finally {
             setLoading(false);
         }
-    }, []);
+    }, [loadFirstPage]);
 
     // Busca inicial
     useEffect(() => {
@@ -49,6 +48,9 @@ const PostManagementTab = () => {
                     getPosts={fetchAdminPosts}
                     emptyFeedMessage="Nenhum post encontrado na plataforma."
                     showCreateWhenEmpty={false}
+                    hasMore={hasMore}
+                    onLoadMore={loadMore}
+                    loadingMore={loadingMore}
                 />
             </div>
         </div>
@@ -1,8 +1,9 @@
 // src/context/AuthContext.jsx
-import { createContext, useState, useEffect, useMemo, useCallback } from 'react'; // 1. Adicionar useCallback
+import { createContext, useState, useEffect, useMemo, useCallback, useRef } from 'react'; // 1. Adicionar useCallback
 import { jwtDecode } from 'jwt-decode';
 import { useNavigate } from 'react-router-dom';
 import toast from 'react-hot-toast';
+import useWebSocket, { ReadyState } from 'react-use-websocket';
 import axiosInstance from '../utils/axiosInstance';
 
 const AuthContext = createContext();
@@ -26,10 +27,42 @@ export const AuthProvider = ({ children }) => {
     const [loading, setLoading] = useState(true); 
     const navigate = useNavigate();
 
+    // Socket de notificações: o servidor empurra as contagens do sino
+    // (um 'unread_status' ao conectar e 'unread_delta' a cada mudança)
+    const getNotificationSocketUrl = useCallback(() => {
+        const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
+        const host = import.meta.env.VITE_API_URL ? new URL(import.meta.env.VITE_API_URL).host : 'localhost:8000';
+        const currentTokens = JSON.parse(localStorage.getItem('authTokens'));
+        const accessToken = currentTokens ? currentTokens.access : null;
+
+        return `${protocol}://${host}/ws/notifications/?token=${accessToken}`;
+    }, []);
+
+    const { readyState: notificationSocketState } = useWebSocket(authTokens ? getNotificationSocketUrl : null, {
+        onMessage: (event) => {
+            const data = JSON.parse(event.data);
+            if (data.type === 'unread_status') {
+                setUnreadAnnouncements(data.unread_announcements_count);
+                setUnreadSocial(data.unread_social_count);
+            } else if (data.type === 'unread_delta') {
+                setUnreadAnnouncements(prev => Math.max(0, prev + data.announcements));
+                setUnreadSocial(prev => Math.max(0, prev + data.social));
+            }
+        },
+        shouldReconnect: () => true,
+        reconnectAttempts: 10,
+        reconnectInterval: 3000,
+    });
+    // Ref (e não estado) para não recriar fetchNotificationStatus a cada reconexão
+    const notificationSocketOpen = useRef(false);
+    notificationSocketOpen.current = notificationSocketState === ReadyState.OPEN;
+
     // 3. NOVA FUNÇÃO (useCallback para estabilidade)
+    // Fallback: só consulta o status por HTTP se o socket não estiver aberto
     const fetchNotificationStatus = useCallback(async () => {
         // Só busca se estiver logado
         if (!localStorage.getItem('authTokens')) return; 
+        if (notificationSocketOpen.current) return;
 
         try {
             const response = await axiosInstance.get('/api/notifications/status/');
@@ -0,0 +1,41 @@
+// src/hooks/useCursorPagination.js
+import { useState, useCallback } from 'react';
+import axiosInstance from '../utils/axiosInstance';
+
+// Guarda os itens de um endpoint paginado por cursor ({ next, previous, results })
+// e o link para a próxima página.
+function useCursorPagination() {
+    const [items, setItems] = useState([]);
+    const [nextUrl, setNextUrl] = useState(null);
+    const [loadingMore, setLoadingMore] = useState(false);
+
+    // Busca a primeira página (substitui os itens atuais)
+    const loadFirstPage = useCallback(async (url) => {
+        const response = await axiosInstance.get(url);
+        setItems(response.data.results);
+        setNextUrl(response.data.next);
+        return response;
+    }, []);
+
+    // Busca a próxima página e adiciona ao fim da lista
+    const loadMore = useCallback(async () => {
+        if (!nextUrl || loadingMore) return;
+        setLoadingMore(true);
+        try {
+            const response = await axiosInstance.get(nextUrl);
+            setItems(current => [...current, ...response.data.results]);
+            setNextUrl(response.data.next);
+        } finally {
+            setLoadingMore(false);
+        }
+    }, [nextUrl, loadingMore]);
+
+    const reset = useCallback(() => {
+        setItems([]);
+        setNextUrl(null);
+    }, []);
+
+    return { items, setItems, hasMore: !!nextUrl, loadingMore, loadFirstPage, loadMore, reset };
+}
+
+export default useCursorPagination;
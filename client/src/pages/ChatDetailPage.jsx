@@ -16,15 +16,25 @@ const ChatDetailPage = () => {
     const [messageHistory, setMessageHistory] = useState([]);
     const [newMessage, setNewMessage] = useState("");
     const [loading, setLoading] = useState(true);
+    const [olderUrl, setOlderUrl] = useState(null); // Cursor para mensagens anteriores
+    const [loadingOlder, setLoadingOlder] = useState(false);
     const messageContainerRef = useRef(null); // Para auto-scroll
+    const [onlineUserIds, setOnlineUserIds] = useState([]); // Quem está com a conversa aberta
+    const [typingUsers, setTypingUsers] = useState({}); // username -> até quando mostrar "digitando..."
+    const [seenUpTo, setSeenUpTo] = useState(null); // Última mensagem lida pelo outro participante
+    const lastTypingSentRef = useRef(0);
 
     // --- Busca de Histórico (HTTP) ---
     useEffect(() => {
         const fetchMessageHistory = async () => {
             setLoading(true);
             try {
+                // A API devolve as mais recentes primeiro; a tela mostra em ordem cronológica
                 const response = await axiosInstance.get(`/api/chat/conversations/${conversationId}/messages/`);
-                setMessageHistory(response.data);
+                setMessageHistory([...response.data.results].reverse());
+                setOlderUrl(response.data.next);
+                // Abriu a conversa: leu tudo até a última mensagem
+                axiosInstance.post(`/api/chat/conversations/${conversationId}/read/`).catch(() => {});
             } catch (error) {
                 toast.error("Não foi possível carregar o histórico.");
                 console.error(error);
@@ -36,6 +46,27 @@ const ChatDetailPage = () => {
         fetchMessageHistory();
     }, [conversationId, navigate]);
 
+    // --- Carrega mensagens anteriores (rolar para cima) ---
+    const loadOlderMessages = async () => {
+        if (!olderUrl || loadingOlder) return;
+        setLoadingOlder(true);
+        const container = messageContainerRef.current;
+        const previousHeight = container ? container.scrollHeight : 0;
+        try {
+            const response = await axiosInstance.get(olderUrl);
+            setMessageHistory(prev => [...[...response.data.results].reverse(), ...prev]);
+            setOlderUrl(response.data.next);
+            // Mantém a posição de leitura depois de inserir no topo
+            requestAnimationFrame(() => {
+                if (container) container.scrollTop = container.scrollHeight - previousHeight;
+            });
+        } catch (error) {
+            toast.error("Não foi possível carregar mensagens anteriores.");
+        } finally {
+            setLoadingOlder(false);
+        }
+    };
+
     // --- Configuração do WebSocket ---
     const getWebSocketUrl = () => {
         const protocol = window.location.protocol === 'https:' ? 'wss' : 'ws';
@@ -46,12 +77,60 @@ const ChatDetailPage = () => {
         return `${protocol}://${host}/ws/chat/${conversationId}/?token=${accessToken}`;
     };
 
+    // Presença, digitando e leitura chegam juntos, num frame por intervalo
+    const applyEvents = (events) => {
+        events.forEach((chatEvent) => {
+            if (chatEvent.type === 'presence') {
+                setOnlineUserIds(prev => (
+                    chatEvent.online ? [...new Set([...prev, chatEvent.user_id])] : prev.filter(id => id !== chatEvent.user_id)
+                ));
+            }
+            if (chatEvent.username === user.username) return;
+            if (chatEvent.type === 'typing') {
+                setTypingUsers(prev => ({ ...prev, [chatEvent.username]: chatEvent.typing ? Date.now() + 5000 : 0 }));
+            }
+            if (chatEvent.type === 'read' && chatEvent.last_read_message) {
+                setSeenUpTo(prev => Math.max(prev || 0, chatEvent.last_read_message));
+            }
+        });
+    };
+
     const { sendMessage, lastMessage, readyState } = useWebSocket(getWebSocketUrl(), {
         // Esta função é chamada sempre que uma nova mensagem chega do WebSocket
         onMessage: (event) => {
             const data = JSON.parse(event.data);
-            // Adiciona a nova mensagem ao estado do histórico
-            setMessageHistory(prev => [...prev, data]);
+
+            if (data.type === 'presence_state') {
+                setOnlineUserIds(data.online);
+                return;
+            }
+            if (data.type === 'events') {
+                applyEvents(data.events);
+                return;
+            }
+
+            // Ack do servidor: a mensagem pendente ganha o ID e o horário definitivos
+            if (data.type === 'ack') {
+                setMessageHistory(prev => prev.map(msg => (
+                    msg.client_id === data.client_id ? { ...msg, id: data.id, timestamp: data.timestamp, pending: false } : msg
+                )));
+                return;
+            }
+            if (data.type === 'error') {
+                setMessageHistory(prev => prev.filter(msg => msg.client_id !== data.client_id));
+                toast.error("Não foi possível enviar a mensagem.");
+                return;
+            }
+
+            // Adiciona a nova mensagem ao estado do histórico (as nossas já estão lá)
+            setMessageHistory(prev => (
+                data.client_id && prev.some(msg => msg.client_id === data.client_id) ? prev : [...prev, data]
+            ));
+            // Chegou com a conversa aberta: já está lida (o servidor grava e avisa o outro lado)
+            if (data.author_username !== user.username) {
+                setTypingUsers(prev => ({ ...prev, [data.author_username]: 0 }));
+                sendMessage(JSON.stringify({ type: 'read', up_to: data.id }));
+            }
         },
         // Tenta reconectar se a conexão cair
         shouldReconnect: (closeEvent) => true,
@@ -59,24 +138,68 @@ const ChatDetailPage = () => {
         reconnectInterval: 3000,
     });
 
+    // --- "Digitando..." (no máximo um aviso a cada 2 s; o servidor ainda junta em lote) ---
+    const handleTyping = (e) => {
+        setNewMessage(e.target.value);
+        const now = Date.now();
+        if (readyState === ReadyState.OPEN && now - lastTypingSentRef.current > 2000) {
+            lastTypingSentRef.current = now;
+            sendMessage(JSON.stringify({ type: 'typing', typing: true }));
+        }
+    };
+
+    // Esconde o "digitando..." de quem parou sem avisar
+    useEffect(() => {
+        const timer = setInterval(() => {
+            setTypingUsers(prev => {
+                const now = Date.now();
+                const active = Object.fromEntries(Object.entries(prev).filter(([, until]) => until > now));
+                return Object.keys(active).length === Object.keys(prev).length ? prev : active;
+            });
+        }, 1000);
+        return () => clearInterval(timer);
+    }, []);
+
     // --- Lidar com o envio de novas mensagens ---
     const handleSendMessage = (e) => {
         e.preventDefault();
         if (!newMessage.trim()) return;
 
+        // Mostra na hora como pendente; o ack do servidor confirma
+        const clientId = `${Date.now()}-${Math.random().toString(36).slice(2)}`;
+        setMessageHistory(prev => [...prev, {
+            client_id: clientId,
+            author_username: user.username,
+            content: newMessage,
+            timestamp: new Date().toISOString(),
+            pending: true,
+        }]);
+
         // Envia a mensagem pelo WebSocket
         sendMessage(JSON.stringify({
-            'message': newMessage
+            'message': newMessage,
+            'client_id': clientId,
         }));
+        sendMessage(JSON.stringify({ type: 'typing', typing: false }));
+        lastTypingSentRef.current = 0;
         setNewMessage(''); // Limpa o input
     };
 
+    const typingNames = Object.keys(typingUsers);
+    const otherOnline = onlineUserIds.some(id => id !== user.id);
+    // "Visto" só na nossa última mensagem já lida pelo outro lado
+    const lastSeenOwn = seenUpTo && [...messageHistory].reverse().find(
+        msg => msg.author_username === user.username && msg.id && msg.id <= seenUpTo
+    );
+
     // --- Auto-scroll para a última mensagem ---
+    const newestMessage = messageHistory.length ? messageHistory[messageHistory.length - 1] : null;
+    const lastMessageId = newestMessage ? (newestMessage.client_id || newestMessage.id) : null;
     useEffect(() => {
         if (messageContainerRef.current) {
             messageContainerRef.current.scrollTop = messageContainerRef.current.scrollHeight;
         }
-    }, [messageHistory]); // Roda sempre que o histórico (ou uma nova msg) mudar
+    }, [lastMessageId, loading]); // Só quando chega uma mensagem nova (não ao carregar as anteriores)
 
     // Status da conexão (opcional, mas bom para debug)
     const connectionStatus = {
@@ -101,13 +224,21 @@ const ChatDetailPage = () => {
                     <FiArrowLeft size={20} />
                 </button>
                 <span className="font-bold">Conversa</span>
+                {otherOnline && <span className="badge badge-success badge-xs" title="Online"></span>}
                 <span className="text-xs text-base-content/60 ml-auto">{connectionStatus}</span>
             </div>
 
             {/* Container das Mensagens (com scroll) */}
             <main ref={messageContainerRef} className="flex-grow p-4 space-y-4 overflow-y-auto bg-base-100">
+                {olderUrl && (
+                    <div className="flex justify-center">
+                        <button onClick={loadOlderMessages} className="btn btn-ghost btn-sm" disabled={loadingOlder}>
+                            {loadingOlder ? <span className="loading loading-spinner loading-xs"></span> : "Carregar mensagens anteriores"}
+                        </button>
+                    </div>
+                )}
                 {messageHistory.map((msg, index) => (
-                    <div key={msg.id || index} className={`chat ${msg.author_username === user.username ? 'chat-end' : 'chat-start'}`}>
+                    <div key={msg.client_id || msg.id || index} className={`chat ${msg.author_username === user.username ? 'chat-end' : 'chat-start'}`}>
                         <div className="chat-image avatar avatar-xs placeholder">
                             <div className="bg-neutral text-neutral-content rounded-full w-8">
                                 <span className="text-sm">{msg.author_username.substring(0, 1).toUpperCase()}</span>
@@ -117,9 +248,15 @@ const ChatDetailPage = () => {
                             {msg.author_username}
                             <time className="ml-1">{new Date(msg.timestamp).toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' })}</time>
                         </div>
-                        <div className="chat-bubble">{msg.content}</div>
+                        <div className={`chat-bubble ${msg.pending ? 'opacity-60' : ''}`}>{msg.content}</div>
+                        {lastSeenOwn && msg.id === lastSeenOwn.id && (
+                            <div className="chat-footer text-xs opacity-50">Visto</div>
+                        )}
                     </div>
                 ))}
+                {typingNames.length > 0 && (
+                    <div className="text-xs text-base-content/60 italic">{typingNames.join(', ')} digitando...</div>
+                )}
             </main>
 
             {/* Input de Envio de Mensagem */}
@@ -127,7 +264,7 @@ const ChatDetailPage = () => {
                 <input
                     type="text"
                     value={newMessage}
-                    onChange={(e) => setNewMessage(e.target.value)}
+                    onChange={handleTyping}
                     placeholder="Digite uma mensagem..."
                     className="input input-bordered flex-grow"
                 />
@@ -1,13 +1,19 @@
 // src/pages/ChatListPage.jsx
 import { useState, useEffect, useContext } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
-import axiosInstance from '../utils/axiosInstance';
 import AuthContext from '../context/AuthContext';
 import BottomNav from '../components/BottomNav';
 import toast from 'react-hot-toast';
 import Navbar from '../components/NavBar';
+import useCursorPagination from '../hooks/useCursorPagination';
 const ChatListPage = () => {
-    const [conversations, setConversations] = useState([]);
+    const {
+        items: conversations,
+        hasMore,
+        loadingMore,
+        loadFirstPage,
+        loadMore,
+    } = useCursorPagination();
     const [loading, setLoading] = useState(true);
     const { user } = useContext(AuthContext); // Precisamos do usuário logado para comparar
 
@@ -16,8 +22,7 @@ const ChatListPage = () => {
             setLoading(true);
             try {
                 // Busca no endpoint que criamos
-                const response = await axiosInstance.get('/api/chat/conversations/');
-                setConversations(response.data);
+                await loadFirstPage('/api/chat/conversations/');
             } catch (error) {
                  if (error.response?.status !== 401) {
                     toast.error("Não foi possível carregar suas conversas.");
@@ -27,7 +32,7 @@ const ChatListPage = () => {
             }
         };
         fetchConversations();
-    }, []);
+    }, [loadFirstPage]);
 
     // Função para mostrar o nome do "outro" participante na conversa
     const getOtherParticipant = (participants) => {
@@ -62,17 +67,27 @@ const ChatListPage = () => {
                                     {/* Info */}
                                     <div className="flex-grow">
                                         <p className="font-bold">{otherUser}</p>
-                                        <p className="text-sm text-base-content/70 truncate">
-                                            {convo.last_message ? convo.last_message.content : "Nenhuma mensagem ainda."}
+                                        <p className={`text-sm truncate ${convo.unread_count > 0 ? 'font-semibold' : 'text-base-content/70'}`}>
+                                            {convo.last_message ? convo.last_message_preview : "Nenhuma mensagem ainda."}
                                         </p>
                                     </div>
-                                    {/* Timestamp */}
-                                    <div className="text-xs text-base-content/60">
-                                        {convo.last_message && new Date(convo.last_message.timestamp).toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' })}
+                                    {/* Timestamp + não lidas */}
+                                    <div className="flex flex-col items-end gap-1 text-xs text-base-content/60">
+                                        {convo.last_message && new Date(convo.last_message_at).toLocaleTimeString('pt-BR', { hour: '2-digit', minute: '2-digit' })}
+                                        {convo.unread_count > 0 && (
+                                            <span className="badge badge-primary badge-sm">{convo.unread_count}</span>
+                                        )}
                                     </div>
                                 </Link>
                             );
                         })}
+                        {hasMore && (
+                            <div className="flex justify-center p-4">
+                                <button onClick={loadMore} className="btn btn-ghost btn-sm" disabled={loadingMore}>
+                                    {loadingMore ? <span className="loading loading-spinner loading-xs"></span> : "Carregar mais"}
+                                </button>
+                            </div>
+                        )}
                     </div>
                 ) : (
                     <p>Você não tem nenhuma conversa. Inicie uma pela página de perfil de um usuário.</p>
@@ -3,14 +3,14 @@ import { useState, useEffect, useCallback, useContext } from 'react';
 import Navbar from '../components/Navbar';
 import BottomNav from '../components/BottomNav';
 import AuthContext from '../context/AuthContext';
-import axiosInstance from '../utils/axiosInstance';
 import toast from 'react-hot-toast';
 import { FiPlus, FiSearch } from 'react-icons/fi';
 import { Link } from 'react-router-dom';
 import CreateCommunityModal from '../components/communities/CreateCommunityModal';
+import useCursorPagination from '../hooks/useCursorPagination';
 
 const CommunitiesPage = () => {
-    const [communities, setCommunities] = useState([]);
+    const { items: communities, hasMore, loadingMore, loadFirstPage, loadMore } = useCursorPagination();
     const [query, setQuery] = useState('');
     const [loading, setLoading] = useState(true);
     const [isModalOpen, setIsModalOpen] = useState(false);
@@ -23,8 +23,7 @@ const CommunitiesPage = () => {
     const fetchCommunities = useCallback(async () => {
         setLoading(true);
         try {
-            const response = await axiosInstance.get('/api/communities/');
-            setCommunities(response.data);
+            await loadFirstPage('/api/communities/');
         } catch (error) {
             if (error.response?.status !== 401) {
                 toast.error("Não foi possível carregar as comunidades.");
@@ -32,7 +31,7 @@ const CommunitiesPage = () => {
         } finally {
             setLoading(false);
         }
-    }, []);
+    }, [loadFirstPage]);
 
     useEffect(() => {
         fetchCommunities();
@@ -98,6 +97,13 @@ const CommunitiesPage = () => {
                             {filteredCommunities.length === 0 && !loading && (
                                 <p className="col-span-full text-center text-base-content/70">Nenhuma comunidade encontrada.</p>
                             )}
+                            {hasMore && (
+                                <div className="col-span-full flex justify-center">
+                                    <button className="btn btn-outline btn-wide" onClick={loadMore} disabled={loadingMore}>
+                                        {loadingMore ? <span className="loading loading-spinner loading-sm"></span> : 'Carregar mais'}
+                                    </button>
+                                </div>
+                            )}
                         </div>
                     )}
                 </main>
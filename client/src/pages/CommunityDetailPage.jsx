@@ -9,6 +9,7 @@ import toast from 'react-hot-toast';
 import Feed from '../components/Feed';
 import { FiUsers, FiFileText, FiSettings } from 'react-icons/fi';
 import MemberManagementTab from '../components/communities/MemberManagementTab'; // Fase 4
+import useCursorPagination from '../hooks/useCursorPagination';
 
 // Botão de Ação Principal (Fase 2)
 const ActionButton = ({ community, membershipStatus, membershipId, onAction }) => {
@@ -60,7 +61,7 @@ const CommunityDetailPage = () => {
     const navigate = useNavigate();
     
     const [community, setCommunity] = useState(null);
-    const [posts, setPosts] = useState([]);
+    const { items: posts, setItems: setPosts, hasMore, loadingMore, loadFirstPage, loadMore, reset } = useCursorPagination();
     const [loading, setLoading] = useState(true);
     const [activeTab, setActiveTab] = useState('feed'); // 'feed' ou 'members'
     
@@ -78,10 +79,9 @@ const CommunityDetailPage = () => {
             // 2. Se for membro, busca os posts do Feed (Fase 3)
             const status = communityRes.data.membership_status;
             if (status === 'member' || status === 'admin') {
-                const postsRes = await axiosInstance.get(`/api/communities/${communityId}/feed/`);
-                setPosts(postsRes.data);
+                await loadFirstPage(`/api/communities/${communityId}/feed/`);
             } else {
-                setPosts([]); // Limpa os posts se não for membro
+                reset(); // Limpa os posts se não for membro
             }
             
         } catch (error) {
@@ -92,7 +92,7 @@ const CommunityDetailPage = () => {
         } finally {
             setLoading(false);
         }
-    }, [communityId, navigate]);
+    }, [communityId, navigate, loadFirstPage, reset]);
 
     // Busca inicial
     useEffect(() => {
@@ -194,6 +194,9 @@ const CommunityDetailPage = () => {
                                             showCreateWhenEmpty={true}
                                             communityId={communityId}
                                             isMember={isMember}
+                                            hasMore={hasMore}
+                                            onLoadMore={loadMore}
+                                            loadingMore={loadingMore}
                                             />
                                     )}
                                 </>
@@ -3,13 +3,13 @@ import { useState, useEffect, useCallback, useContext } from 'react';
 import BottomNav from '../components/BottomNav';
 import Navbar from '../components/Navbar';
 import Feed from '../components/Feed';
-import axiosInstance from '../utils/axiosInstance';
 import toast from 'react-hot-toast';
 import AuthContext from '../context/AuthContext';
 import OnboardingModal from '../components/OnboardingModal';
+import useCursorPagination from '../hooks/useCursorPagination';
 
 const FollowingFeedPage = () => {
-    const [posts, setPosts] = useState([]);
+    const { items: posts, setItems: setPosts, hasMore, loadingMore, loadFirstPage, loadMore } = useCursorPagination();
     const [loading, setLoading] = useState(true);
 
     // Pega os dados do Onboarding Modal e o usuário do Contexto
@@ -20,8 +20,7 @@ const FollowingFeedPage = () => {
         setLoading(true);
         try {
             // Este é o endpoint do "Feed Seguindo"
-            const response = await axiosInstance.get('/api/feed/following/');
-            setPosts(response.data);
+            await loadFirstPage('/api/feed/following/');
         } catch (error) {
             if (error.response?.status !== 401) {
                 toast.error("Não foi possível carregar o feed.");
@@ -29,7 +28,7 @@ const FollowingFeedPage = () => {
         } finally {
             setLoading(false);
         }
-    }, []); // Dependência vazia
+    }, [loadFirstPage]);
 
     // A página busca os posts quando é carregada
     useEffect(() => {
@@ -50,6 +49,9 @@ const FollowingFeedPage = () => {
                 getPosts={getPosts} 
                 emptyFeedMessage="Siga novos usuários para ver os posts deles aqui."
                 showCreateWhenEmpty={false}
+                hasMore={hasMore}
+                onLoadMore={loadMore}
+                loadingMore={loadingMore}
             />
             
             <BottomNav />
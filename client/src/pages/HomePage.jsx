@@ -3,13 +3,13 @@ import { useState, useEffect, useCallback, useContext } from 'react';
 import BottomNav from '../components/BottomNav';
 import Navbar from '../components/Navbar';
 import Feed from '../components/Feed';
-import axiosInstance from '../utils/axiosInstance';
 import toast from 'react-hot-toast';
 import AuthContext from '../context/AuthContext';
 import OnboardingModal from '../components/OnboardingModal';
+import useCursorPagination from '../hooks/useCursorPagination';
 
 const HomePage = () => {
-    const [posts, setPosts] = useState([]);
+    const { items: posts, setItems: setPosts, hasMore, loadingMore, loadFirstPage, loadMore } = useCursorPagination();
     const [loading, setLoading] = useState(true);
     
     const { user, showOnboardingModal } = useContext(AuthContext);
@@ -17,8 +17,7 @@ const HomePage = () => {
     const getPosts = useCallback(async () => {
         setLoading(true);
         try {
-            const response = await axiosInstance.get('/api/posts/');
-            setPosts(response.data);
+            await loadFirstPage('/api/posts/');
         } catch (error) {
             if (error.response?.status !== 401) {
                 toast.error("Não foi possível carregar os posts.");
@@ -26,7 +25,7 @@ const HomePage = () => {
         } finally {
             setLoading(false);
         }
-    }, []); 
+    }, [loadFirstPage]); 
 
     useEffect(() => {
         getPosts();
@@ -43,6 +42,9 @@ const HomePage = () => {
                 getPosts={getPosts}
                 emptyFeedMessage="Não há nenhum post para mostrar ainda."
                 showCreateWhenEmpty={true} 
+                hasMore={hasMore}
+                onLoadMore={loadMore}
+                loadingMore={loadingMore}
             />
             
             <BottomNav />
@@ -4,6 +4,7 @@ import Navbar from '../components/Navbar';
 import BottomNav from '../components/BottomNav';
 import AuthContext from '../context/AuthContext';
 import axiosInstance from '../utils/axiosInstance';
+import useCursorPagination from '../hooks/useCursorPagination';
 import toast from 'react-hot-toast';
 import { FiBell, FiAlertTriangle, FiUserCheck, FiMessageSquare, FiAward, FiHeart } from 'react-icons/fi'; // 1. Importar FiHeart
 import { Link } from 'react-router-dom';
@@ -14,7 +15,14 @@ const NotificationsPage = () => {
     const [announcements, setAnnouncements] = useState([]);
     const [loadingAnn, setLoadingAnn] = useState(true);
 
-    const [notifications, setNotifications] = useState([]);
+    // Caixa de notificações paginada por cursor
+    const {
+        items: notifications,
+        hasMore: hasMoreNotifications,
+        loadingMore: loadingMoreNotifications,
+        loadFirstPage: loadFirstNotifications,
+        loadMore: loadMoreNotifications,
+    } = useCursorPagination();
     const [loadingSoc, setLoadingSoc] = useState(true);
 
     const { user, fetchNotificationStatus } = useContext(AuthContext);
@@ -27,12 +35,9 @@ const NotificationsPage = () => {
                 const response = await axiosInstance.get('/api/announcements/');
                 setAnnouncements(response.data);
                 
-                const unreadIds = response.data
-                    .filter(ann => ann.read_by && !ann.read_by.includes(user.id))
-                    .map(ann => ann.id);
-
-                if (unreadIds.length > 0) {
-                    await axiosInstance.post('/api/announcements/mark-read/', { ids: unreadIds });
+                // Tudo até o recado mais recente: só move a marca d'água
+                if (response.data.some(ann => !ann.is_read)) {
+                    await axiosInstance.post('/api/announcements/mark-read/', { up_to: response.data[0].id });
                     fetchNotificationStatus(); 
                 }
             } catch (error) {
@@ -53,13 +58,14 @@ const NotificationsPage = () => {
         const fetchSocialNotifications = async () => {
             setLoadingSoc(true);
             try {
-                const response = await axiosInstance.get('/api/notifications/');
-                setNotifications(response.data);
+                const response = await loadFirstNotifications('/api/notifications/');
                 
-                const hasUnread = response.data.some(notif => !notif.read);
+                const { results } = response.data;
+                const hasUnread = results.some(notif => !notif.read);
 
                 if (hasUnread) {
-                    await axiosInstance.post('/api/notifications/mark-read/');
+                    // Só até a mais recente que o usuário viu (as que chegarem depois continuam não lidas)
+                    await axiosInstance.post('/api/notifications/mark-read/', { up_to: results[0].id });
                     fetchNotificationStatus();
                 }
             } catch (error) {
@@ -74,7 +80,7 @@ const NotificationsPage = () => {
         if (activeTab === 'social') {
             fetchSocialNotifications();
         }
-    }, [activeTab, fetchNotificationStatus]); 
+    }, [activeTab, fetchNotificationStatus, loadFirstNotifications]); 
 
     // 2. Atualizar Helper de Ícone
     const NotificationIcon = ({ verb }) => {
@@ -93,12 +99,18 @@ const NotificationsPage = () => {
             </Link>
         );
 
+        // Reações chegam agregadas: "Fulano e outros 3 reagiram ao"
+        const others = notif.actor_count > 1 ? ` e outros ${notif.actor_count - 1}` : '';
+        const verbText = notif.verb === 'reaction'
+            ? (notif.actor_count > 1 ? 'reagiram ao seu post' : 'reagiu ao seu post')
+            : notif.verb;
+
         // Caso 1: Notificação de Post (Comentário ou Reação)
         if (notif.post_id) {
             return (
                 <p>
-                    {senderLink}
-                    {' '}{notif.verb}
+                    {senderLink}{others}
+                    {' '}{verbText}
                     <Link to={`/posts/${notif.post_id}`} className="font-semibold italic link link-hover ml-1">
                         "{notif.post_title || 'seu post'}"
                     </Link>
@@ -203,6 +215,13 @@ const NotificationsPage = () => {
                                             </time>
                                         </div>
                                     ))}
+                                    {hasMoreNotifications && (
+                                        <div className="text-center">
+                                            <button className="btn btn-outline btn-wide" onClick={loadMoreNotifications} disabled={loadingMoreNotifications}>
+                                                {loadingMoreNotifications ? <span className="loading loading-spinner loading-sm"></span> : 'Carregar mais'}
+                                            </button>
+                                        </div>
+                                    )}
                                 </div>
                             )}
 
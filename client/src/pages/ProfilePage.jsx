@@ -11,6 +11,7 @@ import axiosInstance from '../utils/axiosInstance';
 import Feed from '../components/Feed'; 
 import OnboardingModal from '../components/OnboardingModal'; 
 import Navbar from '../components/Navbar';
+import useCursorPagination from '../hooks/useCursorPagination';
 import { FiUsers } from 'react-icons/fi'; 
 
 const ProfilePage = () => {
@@ -21,7 +22,7 @@ const ProfilePage = () => {
     const { authTokens, user, setUser, logoutUser, showOnboardingModal, setShowOnboardingModal } = useContext(AuthContext); 
 
     const [profileData, setProfileData] = useState(null); 
-    const [posts, setPosts] = useState([]);
+    const { items: posts, setItems: setPosts, hasMore, loadingMore, loadFirstPage, loadMore } = useCursorPagination();
     
     // 4. Dividir os estados de loading
     const [loadingProfile, setLoadingProfile] = useState(true);
@@ -60,8 +61,7 @@ const ProfilePage = () => {
     const fetchPosts = useCallback(async () => {
         setLoadingPosts(true);
         try {
-            const postsRes = await axiosInstance.get(`/api/posts/?owner__username=${username}`);
-            setPosts(postsRes.data);
+            await loadFirstPage(`/api/posts/?owner__username=${username}`);
         } catch (error) {
              if (error.response?.status !== 401) {
                 console.error("Erro ao buscar posts do usuário", error);
@@ -70,7 +70,7 @@ const ProfilePage = () => {
         } finally {
             setLoadingPosts(false);
         }
-    }, [username]);
+    }, [username, loadFirstPage]);
 
     // 8. useEffect principal que busca perfil e posts
     useEffect(() => {
@@ -268,6 +268,9 @@ return (
                             getPosts={fetchPosts} 
                             emptyFeedMessage="Este usuário ainda não fez nenhum post."
                             showCreateWhenEmpty={false}
+                            hasMore={hasMore}
+                            onLoadMore={loadMore}
+                            loadingMore={loadingMore}
                         />
                     </div>
                 </main>
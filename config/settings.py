@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,6 +52,63 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Tamanho padrão das páginas dos feeds (core.pagination); o cliente
+# pode pedir outro valor com ?page_size=N (limitado a 100).
+FEED_PAGE_SIZE = 20
+
+# Quantos comentários (os mais recentes) cada post leva embutidos no feed;
+# a conversa completa fica em /api/posts/<pk>/comments/ (paginada).
+POST_COMMENT_PREVIEW_SIZE = 3
+
+# Timeline materializada do feed "Seguindo" (core.timeline).
+# Autores com mais seguidores que o limite não têm seus posts copiados
+# para cada seguidor: eles são lidos na hora (fan-out na leitura).
+TIMELINE_FANOUT_THRESHOLD = 1000
+# Quantos posts recentes entram na timeline ao seguir alguém
+TIMELINE_BACKFILL_SIZE = 50
+# Tamanho máximo da timeline de cada usuário. O excesso é descartado ao
+# seguir alguém e pelo comando 'rebuild_timelines --trim-only' (cron); o
+# fan-out de um post novo não apara, para não pesar na requisição.
+TIMELINE_MAX_ENTRIES = 1000
+
+# Janela (em dias) do ranking de hashtags em /api/tags/trending/
+TRENDING_TAGS_WINDOW_DAYS = 7
+
+# Notificações são gravadas em lote por uma thread (core.dispatcher).
+# ASYNC=False grava na hora, dentro da requisição.
+NOTIFICATION_DISPATCHER = {
+    'ASYNC': True,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 0.5,  # segundos esperando mais eventos para o lote
+    'MAX_QUEUE_SIZE': 10000,
+}
+
+# Mensagens do chat são gravadas em lotes pelo core.persister (uma task
+# por processo); os clientes recebem o ack depois do commit.
+CHAT_PERSISTER = {
+    'BATCH_SIZE': 200,
+    'FLUSH_INTERVAL': 0,  # segundos a mais esperando mensagens (0 = só o que já está na fila)
+    'MAX_QUEUE_SIZE': 5000,  # cheia: os consumers esperam (backpressure)
+}
+
+# Presença/digitando/leitura do chat saem em lote a cada CHAT_EVENTS_INTERVAL
+# segundos (core.coalescer). A presença fica no cache padrão e cada conexão a
+# renova a cada CHAT_PRESENCE_HEARTBEAT segundos; sem renovação (worker que
+# caiu sem desconectar) ela expira em CHAT_PRESENCE_TIMEOUT. Com mais de um
+# worker (CHANNEL_LAYER_IPC_DIR ou Redis) o cache precisa ser compartilhado:
+# use DJANGO_CACHE_REDIS_URL (o locmem só enxerga o próprio processo).
+CHAT_EVENTS_INTERVAL = 0.1
+CHAT_PRESENCE_HEARTBEAT = 20
+CHAT_PRESENCE_TIMEOUT = 60
+
+# Retenção das notificações lidas (comando compact_notifications).
+# As não lidas nunca são apagadas.
+NOTIFICATION_RETENTION = {
+    'ROLLUP_DAYS': 7,        # lidas mais antigas que isso: uma por (remetente, verbo), fora as agregadas
+    'READ_DAYS': 90,         # apaga as lidas mais antigas que isso
+    'MAX_READ_PER_USER': 500,  # e mantém no máximo estas lidas por usuário
+}
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -98,6 +156,59 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Memória local por padrão; defina DJANGO_CACHE_REDIS_URL para usar o Redis
+# (compartilhado entre processos e máquinas, necessário para a presença do
+# chat com vários workers) ou DJANGO_CACHE_DIR para usar arquivos
+# (compartilhado entre processos da mesma máquina).
+
+if os.environ.get('DJANGO_CACHE_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['DJANGO_CACHE_REDIS_URL'],
+        }
+    }
+elif os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'universe',
+        }
+    }
+
+# TTL (segundos) das respostas cacheadas por endpoint (core.cache).
+# A invalidação principal é feita pelos sinais em core/signals.py.
+RESPONSE_CACHE_TIMEOUTS = {
+    'posts': 30,
+    'hashtag_posts': 60,
+    'trending_tags': 300,
+    'communities': 120,
+    'user_detail': 60,
+}
+
+# TTL do conjunto de permissões de cada perfil (Profile.permission_set)
+PERMISSION_CACHE_TIMEOUT = 300
+
+# Usuários autenticados nos WebSockets (core.middleware.TokenUserCache):
+# snapshot por jti do token, válido até o token expirar (no máximo MAX_AGE s)
+WEBSOCKET_AUTH_CACHE = {
+    'MAX_SIZE': 10000,
+    'MAX_AGE': 300,
+}
+
+# Cache de "usuário participa da conversa" usado pelo ChatConsumer (segundos)
+CHAT_MEMBERSHIP_CACHE_TIMEOUT = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -144,13 +255,33 @@ MEDIA_URL = '/media/'
 # Caminho no sistema de arquivos onde os arquivos de mídia serão salvos
 MEDIA_ROOT = BASE_DIR / 'media' 
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("127.0.0.1", 6379)],  #redis server
+# Channel layer (WebSockets)
+# Sem configuração: core.layers.LocalChannelLayer, entrega dentro do processo
+# (uma máquina, um worker; testes). CHANNEL_LAYER_IPC_DIR liga a entrega
+# entre os workers da mesma máquina por sockets Unix nesse diretório.
+# CHANNEL_LAYER_REDIS_URL (ex: redis://127.0.0.1:6379) usa o Redis, para
+# mais de uma máquina.
+
+if os.environ.get('CHANNEL_LAYER_REDIS_URL'):
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [os.environ['CHANNEL_LAYER_REDIS_URL']],  #redis server
+            },
         },
-    },
-}
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "core.layers.LocalChannelLayer",
+            "CONFIG": {
+                "capacity": 100,  # mensagens pendentes por canal
+                "expiry": 60,  # segundos até uma mensagem não lida expirar
+                "group_expiry": 86400,  # segundos até um membro sair do grupo sozinho
+                "ipc_dir": os.environ.get('CHANNEL_LAYER_IPC_DIR'),
+            },
+        },
+    }
 
 ASGI_APPLICATION = 'config.asgi.application'
\ No newline at end of file
@@ -2,7 +2,8 @@
 from django.contrib import admin
 from .models import (
     Posts, Profile, Reaction, Comment, Conversation, Message,
-    Tag, Badge, Community, CommunityMembership, Announcement, Notification
+    Tag, Badge, Community, CommunityMembership, Announcement, Notification,
+    PostReactionCount, TagUsage
 )
 
 # --- Registros Simples ---
@@ -16,6 +17,8 @@ admin.site.register(Tag)
 admin.site.register(Badge)
 admin.site.register(Announcement)
 admin.site.register(Notification)
+admin.site.register(PostReactionCount)
+admin.site.register(TagUsage)
 
 # --- Registros Customizados (para melhor usabilidade) ---
 
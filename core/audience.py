@@ -0,0 +1,27 @@
+# core/audience.py
+import hashlib
+
+
+def audience_key(university='', course=''):
+    """
+    Identifica o público de um recado: todos, uma universidade ou um curso
+    de uma universidade. Curto e só com [0-9a-z_]: é indexado em
+    Announcement.audience_key e serve também como nome de grupo do
+    channel layer (core.notifications).
+    """
+    if not university and not course:
+        return 'all'
+    if not course:
+        return 'uni_' + hashlib.md5(university.encode('utf-8')).hexdigest()[:16]
+    return 'course_' + hashlib.md5(f'{university}|{course}'.encode('utf-8')).hexdigest()[:16]
+
+
+def profile_audience_keys(profile):
+    """
+    Os públicos cujos recados o perfil recebe (nenhum antes do onboarding).
+    Usado por todas as consultas de recados: um IN indexado em audience_key.
+    """
+    if not profile.onboarding_complete:
+        return []
+    keys = [audience_key(), audience_key(profile.universidade), audience_key(profile.universidade, profile.curso)]
+    return list(dict.fromkeys(keys))
@@ -0,0 +1,72 @@
+# core/cache.py
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+# Cada namespace tem um número de "geração" guardado no cache. As chaves das
+# respostas incluem a geração atual; para invalidar tudo de um namespace
+# basta incrementá-la (ver core/signals.py), sem precisar apagar chave por chave.
+GENERATION_KEY = 'cache:generation:{}'
+
+
+def get_generation(namespace):
+    key = GENERATION_KEY.format(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, 1, timeout=None)
+        generation = cache.get(key, 1)
+    return generation
+
+
+def bump_generation(*namespaces):
+    for namespace in namespaces:
+        key = GENERATION_KEY.format(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Chave ainda não existe (ou foi despejada do cache)
+            cache.set(key, 2, timeout=None)
+
+
+def get_timeout(name, default=60):
+    return getattr(settings, 'RESPONSE_CACHE_TIMEOUTS', {}).get(name, default)
+
+
+def make_key(prefix, namespaces, *parts):
+    generations = '.'.join(str(get_generation(namespace)) for namespace in namespaces)
+    digest = hashlib.md5('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return f'{prefix}:{generations}:{digest}'
+
+
+class CachedResponseMixin:
+    """
+    Cacheia a resposta de GET de uma view do DRF.
+
+    - cache_name: nome do endpoint (define o TTL em RESPONSE_CACHE_TIMEOUTS)
+    - cache_namespaces: namespaces cuja invalidação apaga esta resposta
+    - cache_vary_on_user: a resposta tem campos que dependem do usuário
+      logado (ex: current_user_reaction, is_following), então cada usuário
+      tem sua própria chave. Anônimos compartilham uma só.
+    """
+    cache_name = None
+    cache_namespaces = ()
+    cache_vary_on_user = True
+
+    def get_response_cache_key(self, request):
+        user_part = 'anon'
+        if self.cache_vary_on_user and request.user.is_authenticated:
+            user_part = request.user.pk
+        return make_key(f'response:{self.cache_name}', self.cache_namespaces, user_part, request.get_full_path())
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, get_timeout(self.cache_name))
+        return response
@@ -0,0 +1,223 @@
+# core/chat.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import BigIntegerField, Case, F, Q, Value, When
+
+from .models import Conversation, ConversationParticipant, Message
+
+PREVIEW_LENGTH = 120
+MEMBERSHIP_KEY = 'chat:member:{}:{}'
+PRESENCE_KEY = 'chat:online:{}:{}'
+
+
+def message_preview(content):
+    """ Uma linha da mensagem para a lista de conversas. """
+    preview = ' '.join(content.split())
+    if len(preview) > PREVIEW_LENGTH:
+        preview = preview[:PREVIEW_LENGTH - 1] + '…'
+    return preview
+
+
+def is_participant(conversation_id, user_id):
+    """
+    O usuário participa da conversa? Um EXISTS no índice único
+    (conversa, usuário); o "sim" fica em cache por CHAT_MEMBERSHIP_CACHE_TIMEOUT
+    (ninguém sai de uma conversa), compartilhado entre as conexões.
+    """
+    key = MEMBERSHIP_KEY.format(conversation_id, user_id)
+    if cache.get(key):
+        return True
+    member = ConversationParticipant.objects.filter(conversation_id=conversation_id, user_id=user_id).exists()
+    if member:
+        cache.set(key, True, getattr(settings, 'CHAT_MEMBERSHIP_CACHE_TIMEOUT', 60))
+    return member
+
+
+def get_or_create_direct_conversation(user, other_user):
+    """
+    A conversa direta entre dois usuários, criando-a se preciso: uma busca
+    pelo índice único (menor ID, maior ID). Se duas requisições criarem ao
+    mesmo tempo, a restrição única barra a segunda, que lê a da primeira.
+    """
+    low, high = sorted((user.pk, other_user.pk))
+    pair = {'direct_user_low_id': low, 'direct_user_high_id': high}
+    conversation = Conversation.objects.filter(**pair).first()
+    if conversation is not None:
+        return conversation, False
+
+    try:
+        with transaction.atomic():
+            conversation = Conversation.objects.create(**pair)
+            conversation.participants.add(low, high)
+    except IntegrityError:
+        return Conversation.objects.get(**pair), False
+    return conversation, True
+
+
+def create_message(conversation_id, author, content):
+    """ Grava uma mensagem (ver write_messages). """
+    return write_messages([Message(conversation_id=conversation_id, author=author, content=content)])[0]
+
+
+def write_messages(messages):
+    """
+    Grava um lote de mensagens (de uma ou várias conversas) com um único
+    bulk_create e, na mesma transação, o estado desnormalizado de cada
+    conversa: última mensagem, não lidas dos participantes e o ponteiro de
+    leitura de quem escreveu (quem escreve leu tudo até ali).
+
+    Custa um INSERT mais dois UPDATEs por conversa do lote, não por mensagem.
+    """
+    if not messages:
+        return []
+
+    by_conversation = {}
+    with transaction.atomic():
+        Message.objects.bulk_create(messages)
+        for message in messages:
+            by_conversation.setdefault(message.conversation_id, []).append(message)
+        for conversation_id, conversation_messages in by_conversation.items():
+            update_conversation_state(conversation_id, conversation_messages)
+    return messages
+
+
+def update_conversation_state(conversation_id, messages):
+    last = messages[-1]
+    Conversation.objects.filter(pk=conversation_id).update(
+        last_message=last,
+        last_message_preview=message_preview(last.content),
+        last_message_at=last.timestamp,
+        updated_at=last.timestamp,
+    )
+
+    # Para cada autor: a última mensagem dele no lote e quantas vieram depois
+    last_by_author = {}
+    for position, message in enumerate(messages):
+        last_by_author[message.author_id] = (position, message.pk)
+    unread_after = {
+        author_id: sum(1 for message in messages[position + 1:] if message.author_id != author_id)
+        for author_id, (position, _) in last_by_author.items()
+    }
+
+    # Um só UPDATE para todos os participantes
+    ConversationParticipant.objects.filter(conversation_id=conversation_id).update(
+        unread_count=Case(
+            *[When(user_id=author_id, then=Value(count)) for author_id, count in unread_after.items()],
+            default=F('unread_count') + len(messages),
+        ),
+        last_read_message=Case(
+            *[When(user_id=author_id, then=Value(pk)) for author_id, (_, pk) in last_by_author.items()],
+            default=F('last_read_message'),
+            output_field=BigIntegerField(),
+        ),
+    )
+
+
+def mark_conversation_read(user, conversation_id, message_id=None):
+    """
+    Move o ponteiro de leitura do usuário até 'message_id' (ou até a última
+    mensagem) e recalcula as não lidas que ficaram depois dele. O ponteiro
+    nunca volta. Devolve o ponteiro atual, ou None se o usuário não participa.
+    """
+    with transaction.atomic():
+        state = (
+            ConversationParticipant.objects.select_for_update(of=('self',))
+            .select_related('last_read_message', 'conversation__last_message')
+            .filter(conversation_id=conversation_id, user=user).first()
+        )
+        if state is None:
+            return None
+
+        if message_id is None:
+            target = state.conversation.last_message
+        else:
+            target = Message.objects.filter(pk=message_id, conversation_id=conversation_id).first()
+        current = state.last_read_message
+        if target is None or (current is not None and (target.timestamp, target.pk) <= (current.timestamp, current.pk)):
+            return current
+
+        if state.conversation.last_message_id == target.pk:
+            unread_count = 0
+        else:
+            unread_count = Message.objects.filter(conversation_id=conversation_id).exclude(author=user).filter(
+                Q(timestamp__gt=target.timestamp) | Q(timestamp=target.timestamp, pk__gt=target.pk)
+            ).count()
+        ConversationParticipant.objects.filter(pk=state.pk).update(last_read_message=target, unread_count=unread_count)
+    return target
+
+
+def record_read_receipts(receipts):
+    """
+    Grava um lote de confirmações de leitura [(conversation_id, user, up_to)]
+    como ponteiros de leitura (mark_conversation_read) e devolve o ID do
+    ponteiro de cada uma (None se não houver).
+    """
+    pointers = []
+    for conversation_id, user, up_to in receipts:
+        last_read = mark_conversation_read(user, conversation_id, up_to)
+        pointers.append(last_read.pk if last_read is not None else None)
+    return pointers
+
+
+def inbox_queryset(user):
+    """
+    Lista de conversas do usuário numa só query: a última mensagem (com o
+    autor) vem por JOIN e o estado de leitura do usuário por anotação sobre
+    o mesmo JOIN da participação.
+    """
+    return (
+        Conversation.objects.filter(participant_states__user=user)
+        .annotate(
+            unread_count=F('participant_states__unread_count'),
+            last_read_message_id=F('participant_states__last_read_message_id'),
+        )
+        .select_related('last_message__author')
+    )
+
+
+# ------------------------------------------------------------------------------
+# Presença (quem está com a conversa aberta)
+# ------------------------------------------------------------------------------
+
+def presence_timeout():
+    return getattr(settings, 'CHAT_PRESENCE_TIMEOUT', 60)
+
+
+def change_presence(conversation_id, user_id, delta):
+    """
+    Soma 'delta' às conexões abertas do usuário na conversa (cache) e devolve
+    o total. Uma pessoa com duas abas só fica offline quando fecha as duas.
+
+    O contador expira em CHAT_PRESENCE_TIMEOUT segundos sem refresh_presence:
+    se o worker cair sem rodar o disconnect, o usuário não fica "online" para
+    sempre. Com vários processos o cache precisa ser compartilhado (Redis).
+    """
+    key = PRESENCE_KEY.format(conversation_id, user_id)
+    cache.add(key, 0, presence_timeout())
+    try:
+        count = cache.incr(key, delta)
+    except ValueError:
+        # A chave expirou entre o add e o incr
+        count = max(delta, 0)
+        cache.set(key, count, presence_timeout())
+    if count <= 0:
+        cache.delete(key)
+    return max(count, 0)
+
+
+def refresh_presence(conversation_id, user_id):
+    """
+    Heartbeat de uma conexão aberta: renova o TTL do contador. Se ele já
+    expirou (ou o cache foi reiniciado), volta a contar esta conexão.
+    """
+    key = PRESENCE_KEY.format(conversation_id, user_id)
+    if not cache.touch(key, presence_timeout()):
+        cache.add(key, 1, presence_timeout())
+
+
+def online_user_ids(conversation_id):
+    """ Participantes com a conversa aberta agora. """
+    user_ids = ConversationParticipant.objects.filter(conversation_id=conversation_id).values_list('user_id', flat=True)
+    keys = {PRESENCE_KEY.format(conversation_id, user_id): user_id for user_id in user_ids}
+    return sorted(keys[key] for key, count in cache.get_many(list(keys)).items() if count and count > 0)
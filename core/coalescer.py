@@ -0,0 +1,79 @@
+# core/coalescer.py
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+from .chat import record_read_receipts
+
+logger = logging.getLogger(__name__)
+
+
+class ChatEventCoalescer:
+    """
+    Junta os eventos efêmeros do chat (presença, digitando, leitura) de todos
+    os ChatConsumers do processo e os envia a cada CHAT_EVENTS_INTERVAL
+    segundos: um group_send por conversa com um frame
+    {'type': 'chat.events', 'events': [...]}, em vez de um por tecla.
+
+    Dentro de um intervalo vale só o último evento de cada (tipo, usuário).
+    As leituras são gravadas como ponteiros de leitura na hora do envio,
+    todas num único hop para a thread do banco.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.pending = {}
+        self.task = None
+
+    def add(self, group, event):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Primeiro uso, ou um novo event loop (testes, benchmark_chat)
+            self.loop = loop
+            self.pending = {}
+            self.task = None
+        self.pending.setdefault(group, {})[(event['type'], event['user_id'])] = event
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.flush_later())
+
+    async def flush_later(self):
+        await asyncio.sleep(getattr(settings, 'CHAT_EVENTS_INTERVAL', 0.1))
+        await self.flush()
+
+    async def flush(self):
+        pending, self.pending = self.pending, {}
+        if not pending:
+            return
+        await self.save_read_receipts(pending)
+
+        channel_layer = get_channel_layer()
+        for group, events in pending.items():
+            try:
+                await channel_layer.group_send(group, {'type': 'chat.events', 'events': list(events.values())})
+            except Exception:
+                logger.warning("Falha ao enviar eventos para o grupo %s.", group, exc_info=True)
+
+    async def save_read_receipts(self, pending):
+        reads = [event for events in pending.values() for event in events.values() if event['type'] == 'read']
+        if not reads:
+            return
+        # Os campos internos saem do evento antes do broadcast
+        receipts = [(event.pop('conversation_id'), event.pop('user'), event.pop('up_to')) for event in reads]
+        try:
+            pointers = await database_sync_to_async(record_read_receipts)(receipts)
+        except Exception:
+            logger.exception("Falha ao gravar %d confirmações de leitura do chat.", len(receipts))
+            pointers = [None] * len(receipts)
+        for event, pointer in zip(reads, pointers):
+            event['last_read_message'] = pointer
+
+
+coalescer = ChatEventCoalescer()
+
+
+def add_chat_event(group, event):
+    """ Agenda o evento para o próximo frame em lote do grupo. """
+    coalescer.add(group, event)
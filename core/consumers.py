@@ -1,117 +1,245 @@
 # core/consumers.py
+import asyncio
 import json
-from channels.generic.websocket import AsyncWebsocketConsumer
+import logging
+
+from channels.generic.websocket import AsyncWebsocketConsumer, AsyncJsonWebsocketConsumer
+from channels.consumer import get_handler_name
 from channels.db import database_sync_to_async
-from .models import Message, Conversation, User
-from .serializers import MessageSerializer
+from django.conf import settings
+from .models import Profile
+from .chat import change_presence, is_participant, online_user_ids, refresh_presence
+from .coalescer import add_chat_event
+from .persister import enqueue_message
+from .audience import profile_audience_keys
+from .notifications import audience_group_name, unread_counts, user_group_name
+
+logger = logging.getLogger(__name__)
+
 
 class ChatConsumer(AsyncWebsocketConsumer):
-    
+    """
+    Sala de uma conversa. As mensagens recebidas vão para o persister do
+    processo (core.persister), que as grava em lotes; depois do commit o
+    autor recebe um ack ({'type': 'ack', 'client_id', 'id', 'timestamp'}) e
+    a mensagem vai para o grupo. A participação é checada uma vez, na
+    conexão (cache + EXISTS indexado).
+
+    Presença, "digitando" ({'type': 'typing', 'typing': true}) e leitura
+    ({'type': 'read', 'up_to': <id>}) não vão direto para o grupo: passam
+    pelo core.coalescer, que os entrega em lote ({'type': 'events'}) a cada
+    CHAT_EVENTS_INTERVAL. Ao conectar, o cliente recebe quem está online
+    ({'type': 'presence_state', 'online': [...]}).
+    """
+
     async def connect(self):
-        print("\n--- [WebSocket] Nova Conexão ---")
-        
-        self.conversation_id = self.scope['url_route']['kwargs']['conversation_id']
+        self.conversation_id = int(self.scope['url_route']['kwargs']['conversation_id'])
         self.room_group_name = f'chat_{self.conversation_id}'
         self.user = self.scope['user']
-        
-        print(f"[WebSocket] Usuário: {self.user} (Autenticado: {self.user.is_authenticated})")
-        print(f"[WebSocket] Tentando entrar na sala: {self.room_group_name}")
 
         if not self.user.is_authenticated:
-            print("[WebSocket] FALHA: Usuário não autenticado. Fechando conexão.")
+            logger.debug("Chat %s: conexão anônima recusada.", self.conversation_id)
             await self.close()
             return
 
-        is_participant = await self.is_user_participant(self.conversation_id, self.user)
-        if not is_participant:
-            print(f"[WebSocket] FALHA: Usuário {self.user} não é participante da conversa {self.conversation_id}. Fechando conexão.")
+        if not await self.is_user_participant(self.conversation_id, self.user.pk):
+            logger.info("Chat %s: usuário %s não participa; conexão recusada.", self.conversation_id, self.user.pk)
             await self.close()
             return
-            
-        print("[WebSocket] SUCESSO: Usuário é participante.")
-        self.conversation = await self.get_conversation(self.conversation_id)
 
         try:
-            # 4. Adiciona o canal do usuário ao grupo do Redis
-            await self.channel_layer.group_add(
-                self.room_group_name,
-                self.channel_name
-            )
-            print(f"[WebSocket] SUCESSO: Adicionado ao grupo Redis '{self.room_group_name}'")
-        except Exception as e:
-            print(f"[WebSocket] FALHA AO CONECTAR AO REDIS: {e}")
+            await self.channel_layer.group_add(self.room_group_name, self.channel_name)
+        except Exception:
+            logger.exception("Chat %s: falha ao entrar no grupo do channel layer.", self.conversation_id)
             await self.close()
             return
 
-        # 5. Aceita a conexão WebSocket
         await self.accept()
-        print("[WebSocket] Conexão aceita.")
+        logger.debug("Chat %s: usuário %s conectado.", self.conversation_id, self.user.pk)
+
+        connections, online = await self.join_presence()
+        self.present = True
+        self.heartbeat_task = asyncio.create_task(self.presence_heartbeat())
+        await self.send(text_data=json.dumps({'type': 'presence_state', 'online': online}))
+        if connections == 1:
+            self.add_event('presence', online=True)
+
+    async def dispatch(self, message):
+        # O channels chama close_old_connections (um hop para a thread do
+        # banco) antes de cada mensagem. As mensagens do socket e do grupo
+        # não tocam no banco aqui (o persister cuida disso), e esse hop
+        # deixaria cada mensagem esperando a gravação do lote anterior.
+        if message['type'] in ('websocket.receive', 'chat.message', 'chat_message', 'chat.events'):
+            await getattr(self, get_handler_name(message))(message)
+            return
+        await super().dispatch(message)
 
     async def disconnect(self, close_code):
-        print(f"[WebSocket] Desconectado da sala: {self.room_group_name}")
-        # Remove o canal do grupo do Redis ao desconectar
+        if getattr(self, 'delivery_task', None) is not None:
+            # Termina de entregar as mensagens já aceitas (o broadcast ainda vale para os outros)
+            await self.pending.put(None)
+            await self.delivery_task
+        if getattr(self, 'present', False):
+            self.heartbeat_task.cancel()
+            if await self.leave_presence() == 0:
+                self.add_event('typing', typing=False)
+                self.add_event('presence', online=False)
+        if not hasattr(self, 'room_group_name'):
+            return
         try:
-            await self.channel_layer.group_discard(
-                self.room_group_name,
-                self.channel_name
-            )
-            print("[WebSocket] Removido do grupo Redis.")
-        except Exception as e:
-             print(f"[WebSocket] Erro ao remover do grupo Redis: {e}")
+            await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
+        except Exception:
+            logger.warning("Chat %s: falha ao sair do grupo.", self.conversation_id, exc_info=True)
 
     # Chamado quando o servidor recebe uma mensagem do WebSocket (do frontend)
     async def receive(self, text_data):
-        print(f"[WebSocket] Mensagem recebida: {text_data}")
-        data = json.loads(text_data)
-        message_content = data['message']
+        try:
+            payload = json.loads(text_data)
+            frame_type = payload.get('type', 'message')
+            if frame_type == 'typing':
+                self.add_event('typing', typing=bool(payload.get('typing')))
+                return
+            if frame_type == 'read':
+                up_to = payload.get('up_to')
+                if up_to is None or isinstance(up_to, int):
+                    self.add_event(
+                        'read', conversation_id=self.conversation_id, user=self.user, up_to=up_to
+                    )
+                return
+            message_content = payload['message']
+        except (ValueError, KeyError, TypeError, AttributeError):
+            logger.debug("Chat %s: frame inválido descartado.", self.conversation_id)
+            return
+        if not isinstance(message_content, str) or not message_content.strip():
+            return
 
-        new_message = await self.create_message(self.conversation, self.user, message_content)
-        serializer = MessageSerializer(new_message)
-        message_data = serializer.data
-        print("[WebSocket] Mensagem salva no DB.")
+        # Entra na fila do persister (espera se ela estiver cheia); o ack e o
+        # broadcast saem pela deliver_messages, na ordem de envio
+        future = await enqueue_message(self.conversation_id, self.user, message_content)
+        self.ensure_delivery_task()
+        await self.pending.put((future, payload.get('client_id')))
 
-        try:
-            # Envia a mensagem para o grupo do Redis (broadcast)
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    'type': 'chat_message', 
-                    'message': message_data
-                }
-            )
-            print("[WebSocket] Mensagem enviada ao grupo Redis.")
-        except Exception as e:
-            print(f"[WebSocket] FALHA AO ENVIAR PARA O REDIS: {e}")
-
-    # Chamado quando o Consumer recebe uma mensagem do grupo do Redis
+    def ensure_delivery_task(self):
+        if getattr(self, 'delivery_task', None) is None:
+            self.pending = asyncio.Queue()
+            self.delivery_task = asyncio.create_task(self.deliver_messages())
+
+    async def deliver_messages(self):
+        while True:
+            item = await self.pending.get()
+            if item is None:
+                return
+            future, client_id = item
+            try:
+                message_data = await future
+            except Exception:
+                await self.send(text_data=json.dumps({
+                    'type': 'error', 'client_id': client_id, 'error': "Mensagem não enviada.",
+                }))
+                continue
+
+            # Ack para quem enviou, com o ID e o timestamp do servidor
+            await self.send(text_data=json.dumps({
+                'type': 'ack', 'client_id': client_id,
+                'id': message_data['id'], 'timestamp': message_data['timestamp'],
+            }))
+            try:
+                await self.channel_layer.group_send(
+                    self.room_group_name,
+                    {'type': 'chat_message', 'message': {**message_data, 'client_id': client_id}}
+                )
+            except Exception:
+                logger.exception("Chat %s: falha ao enviar a mensagem %s ao grupo.", self.conversation_id, message_data['id'])
+
+    # Chamado quando o Consumer recebe uma mensagem do grupo
     async def chat_message(self, event):
-        message = event['message']
-        print(f"[WebSocket] Recebida mensagem do grupo para enviar ao cliente: {message['content']}")
-        
-        # Envia a mensagem pelo WebSocket de volta para o navegador do cliente
-        await self.send(text_data=json.dumps(message))
+        await self.send(text_data=json.dumps(event['message']))
+
+    # --- Eventos efêmeros (core.coalescer) ---
+
+    def add_event(self, event_type, **fields):
+        add_chat_event(self.room_group_name, {
+            'type': event_type, 'user_id': self.user.pk, 'username': self.user.username, **fields,
+        })
+
+    async def presence_heartbeat(self):
+        # Sem este refresh a presença expira (CHAT_PRESENCE_TIMEOUT)
+        while True:
+            await asyncio.sleep(getattr(settings, 'CHAT_PRESENCE_HEARTBEAT', 20))
+            try:
+                await database_sync_to_async(refresh_presence)(self.conversation_id, self.user.pk)
+            except Exception:
+                logger.warning("Chat %s: falha ao renovar a presença.", self.conversation_id, exc_info=True)
+
+    # Lote de eventos do grupo (presença, digitando, leitura)
+    async def chat_events(self, event):
+        await self.send(text_data=json.dumps({'type': 'events', 'events': event['events']}))
 
     # --- Funções Auxiliares de Banco de Dados ---
     @database_sync_to_async
-    def is_user_participant(self, conversation_id, user):
-        print(f"[DB Check] Verificando se {user} está em {conversation_id}...")
-        try:
-            conversation = Conversation.objects.get(id=conversation_id)
-            is_member = user in conversation.participants.all()
-            print(f"[DB Check] É participante: {is_member}")
-            return is_member
-        except Conversation.DoesNotExist:
-            print("[DB Check] Conversa não existe.")
-            return False
-            
+    def is_user_participant(self, conversation_id, user_id):
+        return is_participant(conversation_id, user_id)
+
     @database_sync_to_async
-    def get_conversation(self, conversation_id):
-        return Conversation.objects.get(id=conversation_id)
+    def join_presence(self):
+        connections = change_presence(self.conversation_id, self.user.pk, 1)
+        return connections, online_user_ids(self.conversation_id)
+
+    @database_sync_to_async
+    def leave_presence(self):
+        return change_presence(self.conversation_id, self.user.pk, -1)
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Um socket por usuário logado: empurra as mudanças nas contagens de não
+    lidos (sino), no lugar de o cliente ficar consultando o status.
+
+    Entra no grupo do próprio usuário (notificações sociais, leituras) e nos
+    grupos dos públicos de recado dele (core.audience.audience_key),
+    para que um recado novo chegue a todo o público com um só group_send.
+    """
+
+    async def connect(self):
+        self.user = self.scope['user']
+        if not self.user.is_authenticated:
+            await self.close()
+            return
+
+        self.groups_joined = []
+        await self.accept()
+        await self.join_groups_and_send_status()
+
+    async def disconnect(self, close_code):
+        await self.leave_groups()
+
+    async def join_groups_and_send_status(self):
+        group_names, counts = await self.get_groups_and_counts()
+        for group in group_names:
+            await self.channel_layer.group_add(group, self.channel_name)
+        self.groups_joined = group_names
+        await self.send_json({'type': 'unread_status', **counts})
+
+    async def leave_groups(self):
+        for group in getattr(self, 'groups_joined', []):
+            await self.channel_layer.group_discard(group, self.channel_name)
+        self.groups_joined = []
+
+    # --- Eventos do channel layer (core.notifications) ---
+    async def unread_delta(self, event):
+        await self.send_json({
+            'type': 'unread_delta',
+            'social': event['social'],
+            'announcements': event['announcements'],
+        })
+
+    async def unread_refresh(self, event):
+        await self.leave_groups()
+        await self.join_groups_and_send_status()
 
     @database_sync_to_async
-    def create_message(self, conversation, user, content):
-        return Message.objects.create(
-            conversation=conversation,
-            author=user,
-            content=content
-        )
\ No newline at end of file
+    def get_groups_and_counts(self):
+        profile = Profile.objects.get(user=self.user)
+        self.user.profile = profile
+        group_names = [user_group_name(self.user.pk)]
+        group_names += [audience_group_name(key) for key in profile_audience_keys(profile)]
+        return group_names, unread_counts(self.user)
@@ -0,0 +1,59 @@
+# core/counters.py
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Comment, PostReactionCount, Posts, Reaction
+
+
+def change_reaction_count(post_id, emoji, delta):
+    """
+    Soma 'delta' ao contador (post, emoji) com um UPDATE atômico
+    (count = count + delta). Cria a linha na primeira reação com esse emoji.
+    """
+    updated = PostReactionCount.objects.filter(post_id=post_id, emoji=emoji).update(count=F('count') + delta)
+    if updated or delta <= 0:
+        return
+
+    try:
+        with transaction.atomic():
+            PostReactionCount.objects.create(post_id=post_id, emoji=emoji, count=delta)
+    except IntegrityError:
+        # Outra requisição criou a linha ao mesmo tempo: basta incrementar
+        PostReactionCount.objects.filter(post_id=post_id, emoji=emoji).update(count=F('count') + delta)
+
+
+def change_comment_count(post_id, delta):
+    Posts.objects.filter(pk=post_id).update(comment_count=F('comment_count') + delta)
+
+
+def rebuild_post_counters(post_ids=None):
+    """
+    Recalcula os contadores a partir das tabelas Reaction e Comment.
+    Usado pelo comando 'rebuild_post_counters' para corrigir divergências.
+    """
+    posts = Posts.objects.all()
+    reactions = Reaction.objects.all()
+    counters = PostReactionCount.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+        reactions = reactions.filter(post_id__in=post_ids)
+        counters = counters.filter(post_id__in=post_ids)
+
+    totals = reactions.order_by().values('post_id', 'emoji').annotate(total=Count('id'))
+
+    comment_totals = Comment.objects.filter(post=OuterRef('pk')).order_by().values('post').annotate(
+        total=Count('id')
+    ).values('total')
+
+    with transaction.atomic():
+        counters.delete()
+        PostReactionCount.objects.bulk_create(
+            [PostReactionCount(post_id=row['post_id'], emoji=row['emoji'], count=row['total']) for row in totals],
+            batch_size=1000,
+        )
+        updated_posts = posts.update(
+            comment_count=Coalesce(Subquery(comment_totals, output_field=IntegerField()), Value(0))
+        )
+
+    return updated_posts
@@ -0,0 +1,234 @@
+# core/dispatcher.py
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Notification, Reaction
+from .notifications import change_unread_counts
+
+logger = logging.getLogger(__name__)
+
+
+def dispatcher_setting(name, default):
+    return getattr(settings, 'NOTIFICATION_DISPATCHER', {}).get(name, default)
+
+
+# ------------------------------------------------------------------------------
+# Escrita em lote
+# ------------------------------------------------------------------------------
+
+def write_notifications(events):
+    """
+    Grava um lote de eventos de notificação:
+
+    - 'unique' (follow, aprovação): no máximo uma por (destinatário,
+      remetente, verbo, comunidade), como o antigo get_or_create
+    - 'aggregate' (reação): uma só notificação não lida por (destinatário,
+      post); reações seguintes só atualizam o remetente e o actor_count
+      ("Fulano e outros 3 reagiram")
+    - as demais viram uma notificação cada
+
+    Tudo o que é novo entra num único bulk_create; os contadores de não
+    lidos (UnreadCounter) recebem um UPDATE por destinatário.
+    """
+    events = [event for event in events if event['recipient_id'] != event['sender_id']]
+    if not events:
+        return []
+
+    plain, unique, aggregate = [], {}, defaultdict(list)
+    for event in events:
+        if event.get('aggregate'):
+            aggregate[(event['recipient_id'], event['post_id'])].append(event)
+        elif event.get('unique'):
+            key = (event['recipient_id'], event['sender_id'], event['verb'], event.get('community_id'))
+            unique.setdefault(key, event)
+        else:
+            plain.append(event)
+
+    with transaction.atomic():
+        new = [build_notification(event) for event in plain]
+        new += [build_notification(event) for event in skip_existing(unique)]
+        new += aggregate_into_existing(aggregate)
+
+        Notification.objects.bulk_create(new)
+
+        for recipient_id, count in Counter(notification.recipient_id for notification in new).items():
+            change_unread_counts(recipient_id, social=count)
+
+    return new
+
+
+def build_notification(event, actor_count=1):
+    return Notification(
+        recipient_id=event['recipient_id'],
+        sender_id=event['sender_id'],
+        verb=event['verb'],
+        post_id=event.get('post_id'),
+        comment_id=event.get('comment_id'),
+        community_id=event.get('community_id'),
+        actor_count=actor_count,
+    )
+
+
+def skip_existing(unique):
+    """ Eventos 'unique' cuja notificação ainda não existe (uma query para o lote). """
+    if not unique:
+        return []
+    existing = set(
+        Notification.objects.filter(
+            recipient_id__in={key[0] for key in unique},
+            sender_id__in={key[1] for key in unique},
+            verb__in={key[2] for key in unique},
+        ).values_list('recipient_id', 'sender_id', 'verb', 'community_id')
+    )
+    return [event for key, event in unique.items() if key not in existing]
+
+
+def aggregate_into_existing(aggregate):
+    """
+    Atualiza as notificações não lidas que já existem para o post e devolve
+    as notificações novas (para os posts sem uma). 'actor_count' é quantas
+    pessoas reagem ao post, não quantos eventos chegaram: quem tira e põe a
+    reação de novo conta uma vez só.
+    """
+    if not aggregate:
+        return []
+
+    reactors = dict(
+        Reaction.objects.filter(post_id__in={key[1] for key in aggregate})
+        .exclude(user_id=F('post__owner_id'))
+        .values('post_id').annotate(total=Count('user_id', distinct=True))
+        .values_list('post_id', 'total')
+    )
+
+    existing = {
+        (recipient_id, post_id): pk
+        for recipient_id, post_id, pk in Notification.objects.filter(
+            verb='reaction',
+            read=False,
+            recipient_id__in={key[0] for key in aggregate},
+            post_id__in={key[1] for key in aggregate},
+        ).values_list('recipient_id', 'post_id', 'pk')
+    }
+
+    new = []
+    now = timezone.now()
+    for key, group in aggregate.items():
+        latest = group[-1]
+        # Pelo menos quem disparou o evento (a reação pode ter sido removida antes do lote)
+        actor_count = max(reactors.get(key[1], 0), 1)
+        if key in existing:
+            Notification.objects.filter(pk=existing[key]).update(
+                sender_id=latest['sender_id'], actor_count=actor_count, timestamp=now,
+            )
+        else:
+            new.append(build_notification(latest, actor_count=actor_count))
+    return new
+
+
+# ------------------------------------------------------------------------------
+# Fila + worker em segundo plano
+# ------------------------------------------------------------------------------
+
+class NotificationDispatcher:
+    """
+    Fila em memória (limitada) drenada por uma thread: as notificações saem
+    do caminho da requisição e são gravadas em lotes por write_notifications.
+
+    Os eventos só entram na fila depois do commit da transação que os gerou
+    (o comentário/seguidor/etc. precisa existir para a thread, que usa outra
+    conexão). Com NOTIFICATION_DISPATCHER['ASYNC'] = False a gravação é
+    síncrona, dentro da própria transação (testes, scripts).
+    """
+
+    def __init__(self):
+        self.queue = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def dispatch(self, **event):
+        if not dispatcher_setting('ASYNC', True):
+            write_notifications([event])
+            return
+        transaction.on_commit(lambda: self.put(event))
+
+    def put(self, event):
+        self.ensure_worker()
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # Fila cheia: grava agora mesmo em vez de perder a notificação
+            logger.warning("Fila de notificações cheia; gravando de forma síncrona.")
+            write_notifications([event])
+
+    def ensure_worker(self):
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.thread is not None and self.thread.is_alive():
+                return
+            if self.queue is None:
+                self.queue = queue.Queue(maxsize=dispatcher_setting('MAX_QUEUE_SIZE', 10000))
+            self.thread = threading.Thread(target=self.run, name='notification-dispatcher', daemon=True)
+            self.thread.start()
+
+    def next_batch(self):
+        """
+        Espera o primeiro evento e junta os que chegarem nos próximos
+        FLUSH_INTERVAL segundos, até BATCH_SIZE eventos.
+        """
+        batch = [self.queue.get()]
+        batch_size = dispatcher_setting('BATCH_SIZE', 500)
+        deadline = time.monotonic() + dispatcher_setting('FLUSH_INTERVAL', 0.5)
+        while len(batch) < batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            self.write(self.next_batch())
+
+    def write(self, batch):
+        close_old_connections()
+        try:
+            write_notifications(batch)
+        except Exception:
+            logger.exception("Falha ao gravar %d notificações.", len(batch))
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    def flush(self):
+        """ Grava o que estiver na fila (usado ao encerrar o processo). """
+        if self.queue is None:
+            return
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self.write(batch)
+
+
+dispatcher = NotificationDispatcher()
+atexit.register(dispatcher.flush)
+
+
+def dispatch_notification(**event):
+    dispatcher.dispatch(**event)
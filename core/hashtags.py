@@ -0,0 +1,135 @@
+# core/hashtags.py
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Posts, Tag, TagUsage
+from .search import normalize
+
+HASHTAG_RE = re.compile(r'(?<![\w&])#(\w+)')
+MAX_TAG_LENGTH = 50
+
+
+def normalize_tag(name):
+    """ '#Cálculo_II' -> 'calculo_ii': minúsculas, sem acentos, só [0-9a-z_]. """
+    return re.sub(r'[^0-9a-z_]', '', normalize(name.lstrip('#')))[:MAX_TAG_LENGTH]
+
+
+def extract_hashtags(text):
+    """ Tags normalizadas e distintas do texto, na ordem em que aparecem. """
+    names = (normalize_tag(match) for match in HASHTAG_RE.findall(text or ''))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def usage_day(post):
+    return timezone.localdate(post.createdAt)
+
+
+def change_tag_counts(tag_ids, day, delta):
+    """ Soma 'delta' ao total de cada tag e ao contador do dia. """
+    if not tag_ids:
+        return
+    Tag.objects.filter(pk__in=tag_ids).update(post_count=F('post_count') + delta)
+
+    updated = set(
+        TagUsage.objects.filter(tag_id__in=tag_ids, day=day).values_list('tag_id', flat=True)
+    )
+    TagUsage.objects.filter(tag_id__in=updated, day=day).update(count=F('count') + delta)
+    missing = [tag_id for tag_id in tag_ids if tag_id not in updated]
+    if not missing or delta <= 0:
+        return
+
+    try:
+        with transaction.atomic():
+            TagUsage.objects.bulk_create([TagUsage(tag_id=tag_id, day=day, count=delta) for tag_id in missing])
+    except IntegrityError:
+        # Outra requisição criou algum dos contadores ao mesmo tempo
+        for tag_id in missing:
+            usage, created = TagUsage.objects.get_or_create(tag_id=tag_id, day=day, defaults={'count': delta})
+            if not created:
+                TagUsage.objects.filter(pk=usage.pk).update(count=F('count') + delta)
+
+
+def get_or_create_tags(names):
+    """ {nome: id} das tags, criando as que faltam com um único INSERT. """
+    tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    missing = [name for name in names if name not in tag_ids]
+    if missing:
+        Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+        tag_ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+    return tag_ids
+
+
+def sync_post_tags(post):
+    """
+    Alinha as tags do post com as #hashtags do conteúdo: cria as tags novas
+    em lote, grava as ligações com um único INSERT na tabela intermediária
+    e atualiza os contadores só das tags que entraram ou saíram.
+    """
+    Through = Posts.tags.through
+    names = extract_hashtags(post.content)
+
+    with transaction.atomic():
+        tag_ids = set(get_or_create_tags(names).values()) if names else set()
+        current_ids = set(Through.objects.filter(posts_id=post.pk).values_list('tag_id', flat=True))
+
+        added = tag_ids - current_ids
+        removed = current_ids - tag_ids
+        if removed:
+            Through.objects.filter(posts_id=post.pk, tag_id__in=removed).delete()
+        if added:
+            Through.objects.bulk_create([Through(posts_id=post.pk, tag_id=tag_id) for tag_id in added])
+
+        change_tag_counts(added, usage_day(post), 1)
+        change_tag_counts(removed, usage_day(post), -1)
+
+    return added or removed
+
+
+def remove_post_tags(post):
+    """ Chamado antes de excluir um post: desconta as tags dele. """
+    tag_ids = list(Posts.tags.through.objects.filter(posts_id=post.pk).values_list('tag_id', flat=True))
+    change_tag_counts(tag_ids, usage_day(post), -1)
+
+
+def trending_tags(days=None, limit=10):
+    """ As tags mais usadas nos posts dos últimos 'days' dias. """
+    if days is None:
+        days = getattr(settings, 'TRENDING_TAGS_WINDOW_DAYS', 7)
+    since = timezone.localdate() - timedelta(days=days - 1)
+    return list(
+        TagUsage.objects.filter(day__gte=since)
+        .values(name=F('tag__name'))
+        .annotate(count=Sum('count'))
+        .filter(count__gt=0)
+        .order_by('-count', 'name')[:limit]
+    )
+
+
+def rebuild_tag_counters():
+    """
+    Recalcula post_count e os contadores diários a partir da tabela
+    intermediária (comando 'rebuild_tag_counters').
+    """
+    Through = Posts.tags.through
+    totals = {}
+    usage = {}
+    for tag_id, created_at in Through.objects.values_list('tag_id', 'posts__createdAt').iterator():
+        day = timezone.localdate(created_at)
+        totals[tag_id] = totals.get(tag_id, 0) + 1
+        usage[(tag_id, day)] = usage.get((tag_id, day), 0) + 1
+
+    with transaction.atomic():
+        Tag.objects.update(post_count=0)
+        for tag_id, total in totals.items():
+            Tag.objects.filter(pk=tag_id).update(post_count=total)
+        TagUsage.objects.all().delete()
+        TagUsage.objects.bulk_create(
+            [TagUsage(tag_id=tag_id, day=day, count=count) for (tag_id, day), count in usage.items()],
+            batch_size=1000,
+        )
+    return len(totals)
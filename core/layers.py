@@ -0,0 +1,230 @@
+# core/layers.py
+import asyncio
+import atexit
+import json
+import logging
+import os
+import secrets
+import socket
+import time
+from contextlib import suppress
+from copy import deepcopy
+
+from channels.exceptions import ChannelFull
+from channels.layers import InMemoryChannelLayer
+
+logger = logging.getLogger(__name__)
+
+
+class LocalChannelLayer(InMemoryChannelLayer):
+    """
+    Channel layer sem serviço externo, para deploys de uma máquina e testes.
+
+    Dentro do processo a entrega é direta: um group_send põe a mensagem na
+    fila de cada canal do grupo, sem task por canal e sem ida ao Redis.
+    Capacidade (capacity/channel_capacity), expiração das mensagens (expiry)
+    e dos grupos (group_expiry) funcionam como no InMemoryChannelLayer; a
+    limpeza dos expirados roda no máximo a cada CLEANUP_INTERVAL segundos, em
+    vez de varrer todos os canais a cada envio.
+
+    Com 'ipc_dir', vários processos da mesma máquina (workers do daphne/
+    uvicorn) conversam por sockets Unix de datagrama nesse diretório, um por
+    processo: o group_send também vai para os outros processos, que entregam
+    aos membros locais do grupo; send() para um canal de outro processo vai
+    direto para o socket dele. Entre processos as mensagens precisam ser
+    serializáveis em JSON e caber em 'max_message_size' bytes; se o outro
+    processo estiver com a fila cheia, a mensagem é descartada (como
+    ChannelFull).
+    """
+
+    CLEANUP_INTERVAL = 1.0
+    MAX_YIELDS = 10
+    PEERS_REFRESH_INTERVAL = 1.0
+
+    def __init__(self, ipc_dir=None, max_message_size=65536, **kwargs):
+        super().__init__(**kwargs)
+        self.node_id = secrets.token_hex(6)
+        self.next_cleanup = 0
+        self.ipc_dir = ipc_dir
+        self.max_message_size = max_message_size
+        self.socket = None
+        self.listener_loop = None
+        self.peers = []
+        self.peers_checked_at = 0
+
+    # --- API do channel layer ---
+
+    async def new_channel(self, prefix='specific.'):
+        # O ID do processo vai no nome: send() sabe para onde encaminhar
+        return f"{prefix.rstrip('.')}.{self.node_id}!{secrets.token_hex(8)}"
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        self.require_valid_channel_name(channel)
+        node_id = self.channel_node(channel)
+        if self.ipc_dir and node_id is not None and node_id != self.node_id:
+            self.ensure_listener()
+            self.send_datagram(self.socket_path(node_id), self.encode({'c': channel, 'm': message}))
+            return
+        self.put(channel, message)
+
+    async def receive(self, channel):
+        self.ensure_listener()
+        return await super().receive(channel)
+
+    async def group_add(self, group, channel):
+        self.ensure_listener()
+        await super().group_add(group, channel)
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        self.require_valid_group_name(group)
+        self._clean_expired()
+        self.deliver_to_group(group, message)
+        # Cede a vez ao event loop (algumas voltas, se alguma fila do grupo já
+        # passou da metade): em rajadas os consumers esvaziam as filas entre
+        # um envio e outro, em vez de a capacidade estourar e a mensagem cair
+        for _ in range(self.MAX_YIELDS):
+            await asyncio.sleep(0)
+            if not self.group_is_crowded(group):
+                break
+        if self.ipc_dir:
+            self.ensure_listener()
+            data = self.encode({'g': group, 'm': message})
+            for path in self.peer_paths():
+                self.send_datagram(path, data)
+
+    async def close(self):
+        if self.socket is not None:
+            if self.listener_loop is not None and not self.listener_loop.is_closed():
+                with suppress(Exception):
+                    self.listener_loop.remove_reader(self.socket.fileno())
+            self.remove_socket()
+
+    # --- Entrega local ---
+
+    def put(self, channel, message):
+        queue = self.channels.setdefault(channel, asyncio.Queue(maxsize=self.get_capacity(channel)))
+        try:
+            queue.put_nowait((time.time() + self.expiry, deepcopy(message)))
+        except asyncio.QueueFull:
+            raise ChannelFull(channel)
+
+    def deliver_to_group(self, group, message):
+        for channel in list(self.groups.get(group, ())):
+            try:
+                self.put(channel, message)
+            except ChannelFull:
+                logger.debug("Canal %s cheio; mensagem do grupo %s descartada.", channel, group)
+
+    def group_is_crowded(self, group):
+        for channel in self.groups.get(group, ()):
+            queue = self.channels.get(channel)
+            if queue is not None and queue.maxsize and queue.qsize() * 2 > queue.maxsize:
+                return True
+        return False
+
+    def _clean_expired(self):
+        now = time.monotonic()
+        if now < self.next_cleanup:
+            return
+        self.next_cleanup = now + self.CLEANUP_INTERVAL
+        super()._clean_expired()
+
+    # --- Entre processos (ipc_dir) ---
+
+    @staticmethod
+    def channel_node(channel):
+        name, separator, _ = channel.partition('!')
+        if not separator:
+            return None
+        return name.rsplit('.', 1)[-1]
+
+    def socket_path(self, node_id):
+        return os.path.join(self.ipc_dir, f'{node_id}.sock')
+
+    def ensure_listener(self):
+        """ Abre o socket do processo e o registra no event loop atual. """
+        if not self.ipc_dir:
+            return
+        loop = asyncio.get_running_loop()
+        if self.listener_loop is loop:
+            return
+
+        if self.socket is None:
+            os.makedirs(self.ipc_dir, exist_ok=True)
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self.socket.bind(self.socket_path(self.node_id))
+            self.socket.setblocking(False)
+            atexit.register(self.remove_socket)
+        elif self.listener_loop is not None and not self.listener_loop.is_closed():
+            with suppress(Exception):
+                self.listener_loop.remove_reader(self.socket.fileno())
+
+        loop.add_reader(self.socket.fileno(), self.read_datagrams)
+        self.listener_loop = loop
+
+    def remove_socket(self):
+        if self.socket is None:
+            return
+        self.socket.close()
+        self.socket = None
+        self.listener_loop = None
+        with suppress(OSError):
+            os.unlink(self.socket_path(self.node_id))
+
+    def peer_paths(self):
+        """ Sockets dos outros processos (a lista é relida a cada PEERS_REFRESH_INTERVAL). """
+        now = time.monotonic()
+        if now - self.peers_checked_at > self.PEERS_REFRESH_INTERVAL:
+            own = f'{self.node_id}.sock'
+            with suppress(OSError):
+                self.peers = [
+                    os.path.join(self.ipc_dir, name) for name in os.listdir(self.ipc_dir)
+                    if name.endswith('.sock') and name != own
+                ]
+            self.peers_checked_at = now
+        return self.peers
+
+    def encode(self, payload):
+        try:
+            data = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        except (TypeError, ValueError):
+            logger.warning("Mensagem não serializável em JSON; não enviada aos outros processos.", exc_info=True)
+            return None
+        if len(data) > self.max_message_size:
+            logger.warning("Mensagem de %d bytes passa de max_message_size; não enviada aos outros processos.", len(data))
+            return None
+        return data
+
+    def send_datagram(self, path, data):
+        if data is None or self.socket is None:
+            return
+        try:
+            self.socket.sendto(data, path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            # Processo que terminou sem apagar o socket
+            with suppress(OSError):
+                os.unlink(path)
+            self.peers_checked_at = 0
+        except BlockingIOError:
+            logger.warning("Fila do processo %s cheia; mensagem descartada.", path)
+        except OSError:
+            logger.warning("Falha ao enviar mensagem para %s.", path, exc_info=True)
+
+    def read_datagrams(self):
+        while self.socket is not None:
+            try:
+                data = self.socket.recv(self.max_message_size)
+            except (BlockingIOError, InterruptedError):
+                return
+            try:
+                payload = json.loads(data)
+                if 'g' in payload:
+                    self.deliver_to_group(payload['g'], payload['m'])
+                else:
+                    self.put(payload['c'], payload['m'])
+            except ChannelFull as error:
+                logger.debug("Canal %s cheio; mensagem de outro processo descartada.", error)
+            except (ValueError, KeyError, TypeError):
+                logger.warning("Datagrama inválido no channel layer descartado.")
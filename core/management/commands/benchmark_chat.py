@@ -0,0 +1,86 @@
+# core/management/commands/benchmark_chat.py
+import asyncio
+import time
+
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from core.chat import get_or_create_direct_conversation
+from core.consumers import ChatConsumer
+from core.models import Conversation
+
+LOCAL_LAYER = {'default': {'BACKEND': 'core.layers.LocalChannelLayer'}}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede quantas mensagens por segundo um worker do ChatConsumer processa "
+        "(conexão + envio + broadcast + entrega). Cria dois usuários temporários "
+        "no banco configurado e os apaga no final, junto com a conversa deles."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=1000, help="Mensagens enviadas (padrão: 1000).")
+        parser.add_argument('--connections', type=int, default=50,
+                            help="Conexões abertas e fechadas antes do envio (padrão: 50).")
+        parser.add_argument('--local-layer', action='store_true',
+                            help="Usa o LocalChannelLayer em vez de CHANNEL_LAYERS (sem Redis).")
+
+    def handle(self, *args, **options):
+        sender = User.objects.create_user('benchmark_chat_sender')
+        receiver = User.objects.create_user('benchmark_chat_receiver')
+        try:
+            conversation, _ = get_or_create_direct_conversation(sender, receiver)
+            if options['local_layer']:
+                with override_settings(CHANNEL_LAYERS=LOCAL_LAYER):
+                    results = asyncio.run(self.run(conversation.pk, sender, receiver, options))
+            else:
+                results = asyncio.run(self.run(conversation.pk, sender, receiver, options))
+        finally:
+            # A conversa direta não cai junto com os usuários (direct_user_* é
+            # SET_NULL), então sai antes; as mensagens vão em cascata
+            Conversation.objects.filter(participants__in=[sender, receiver]).delete()
+            User.objects.filter(pk__in=[sender.pk, receiver.pk]).delete()
+
+        connect_rate, message_rate = results
+        self.stdout.write(f"Conexões:  {connect_rate:,.0f}/s")
+        self.stdout.write(self.style.SUCCESS(f"Mensagens: {message_rate:,.0f}/s (entregues aos dois participantes)"))
+
+    def communicator(self, conversation_id, user):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f'/ws/chat/{conversation_id}/')
+        communicator.scope['user'] = user
+        communicator.scope['url_route'] = {'kwargs': {'conversation_id': str(conversation_id)}}
+        return communicator
+
+    async def run(self, conversation_id, sender, receiver, options):
+        started = time.perf_counter()
+        for _ in range(options['connections']):
+            communicator = self.communicator(conversation_id, sender)
+            connected, _ = await communicator.connect()
+            if not connected:
+                raise RuntimeError("O ChatConsumer recusou a conexão.")
+            await communicator.disconnect()
+        connect_rate = options['connections'] / (time.perf_counter() - started)
+
+        sending = self.communicator(conversation_id, sender)
+        receiving = self.communicator(conversation_id, receiver)
+        await sending.connect()
+        await receiving.connect()
+
+        count = options['messages']
+        started = time.perf_counter()
+        for i in range(count):
+            await sending.send_json_to({'message': f'mensagem {i}'})
+        received = 0
+        while received < count:
+            frame = await receiving.receive_json_from(timeout=30)
+            # Presença e eventos em lote (core.coalescer) não contam
+            if frame.get('type') not in ('presence_state', 'events'):
+                received += 1
+        message_rate = count / (time.perf_counter() - started)
+
+        await sending.disconnect()
+        await receiving.disconnect()
+        return connect_rate, message_rate
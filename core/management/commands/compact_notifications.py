@@ -0,0 +1,23 @@
+# core/management/commands/compact_notifications.py
+from django.core.management.base import BaseCommand
+
+from core.notifications import compact_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Junta e apaga notificações lidas antigas (ver NOTIFICATION_RETENTION). "
+        "Feito para rodar no cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--read-days', type=int,
+                            help="Apaga as lidas mais antigas que N dias (padrão: READ_DAYS).")
+        parser.add_argument('--max-read-per-user', type=int,
+                            help="Mantém no máximo N lidas por usuário (padrão: MAX_READ_PER_USER).")
+        parser.add_argument('--rollup-days', type=int,
+                            help="Junta por remetente e verbo as lidas mais antigas que N dias (padrão: ROLLUP_DAYS).")
+
+    def handle(self, *args, **options):
+        deleted = compact_notifications(options['read_days'], options['max_read_per_user'], options['rollup_days'])
+        self.stdout.write(self.style.SUCCESS(f"Notificações apagadas: {deleted}."))
@@ -0,0 +1,16 @@
+# core/management/commands/rebuild_post_counters.py
+from django.core.management.base import BaseCommand
+
+from core.counters import rebuild_post_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores de reações e comentários dos posts a partir das tabelas Reaction e Comment."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--post', type=int, action='append', dest='post_ids',
+                            help="Recalcula apenas o post com este ID (pode ser repetido).")
+
+    def handle(self, *args, **options):
+        total = rebuild_post_counters(options['post_ids'])
+        self.stdout.write(self.style.SUCCESS(f"Contadores recalculados para {total} post(s)."))
@@ -0,0 +1,16 @@
+# core/management/commands/rebuild_search_index.py
+from django.core.management.base import BaseCommand
+
+from core.search import SEARCH_FIELDS, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Reconstrói o índice de busca (usuários, posts e comunidades)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', dest='kinds', choices=list(SEARCH_FIELDS),
+                            help="Reconstrói apenas este tipo (pode ser repetido).")
+
+    def handle(self, *args, **options):
+        total = rebuild_index(options['kinds'])
+        self.stdout.write(self.style.SUCCESS(f"Documentos indexados: {total}."))
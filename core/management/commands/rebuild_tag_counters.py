@@ -0,0 +1,12 @@
+# core/management/commands/rebuild_tag_counters.py
+from django.core.management.base import BaseCommand
+
+from core.hashtags import rebuild_tag_counters
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores das hashtags (total e trending) a partir dos posts."
+
+    def handle(self, *args, **options):
+        total = rebuild_tag_counters()
+        self.stdout.write(self.style.SUCCESS(f"Tags recalculadas: {total}."))
@@ -0,0 +1,40 @@
+# core/management/commands/rebuild_timelines.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.timeline import oversized_timeline_user_ids, rebuild_timeline, trim_timelines
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstrói (ou apenas apara) as timelines materializadas do feed 'Seguindo'. "
+        "Com --trim-only, feito para rodar no cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames',
+                            help="Processa apenas este usuário (pode ser repetido).")
+        parser.add_argument('--trim-only', action='store_true',
+                            help="Só descarta as entradas além de TIMELINE_MAX_ENTRIES.")
+
+    def handle(self, *args, **options):
+        users = User.objects.select_related('profile').order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        if options['trim_only']:
+            # Só as timelines que passaram do limite (o fan-out não apara)
+            user_ids = list(users.values_list('pk', flat=True)) if options['usernames'] else None
+            oversized = oversized_timeline_user_ids(user_ids=user_ids)
+            deleted = trim_timelines(oversized)
+            self.stdout.write(self.style.SUCCESS(
+                f"Timelines aparadas: {len(oversized)} ({deleted} entradas descartadas)."
+            ))
+            return
+
+        total = 0
+        for user in users.iterator():
+            rebuild_timeline(user)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Timelines processadas: {total}."))
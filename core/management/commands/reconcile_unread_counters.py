@@ -0,0 +1,32 @@
+# core/management/commands/reconcile_unread_counters.py
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from core.notifications import push_unread_refresh, reconcile_unread_counter
+
+
+class Command(BaseCommand):
+    help = "Recalcula os contadores de não lidos (sino) a partir das notificações e recados."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', action='append', dest='usernames',
+                            help="Processa apenas este usuário (pode ser repetido).")
+
+    def handle(self, *args, **options):
+        users = User.objects.select_related('profile', 'unread_counter').order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+
+        repaired = 0
+        total = 0
+        for user in users.iterator():
+            counter = getattr(user, 'unread_counter', None)
+            before = (counter.unread_social, counter.unread_announcements) if counter else None
+            counts = reconcile_unread_counter(user)
+            if before != (counts['unread_social'], counts['unread_announcements']):
+                repaired += 1
+                # O socket aberto (se houver) relê o contador corrigido
+                push_unread_refresh(user.pk)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Contadores verificados: {total}; corrigidos: {repaired}."))
@@ -1,21 +1,101 @@
 # core/middleware.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import AnonymousUser, User
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import AccessToken
 from urllib.parse import parse_qs
 
+logger = logging.getLogger(__name__)
+
+# Campos do usuário guardados no cache (o resto fica "adiado": se algum
+# código precisar, o Django busca no banco na hora)
+SNAPSHOT_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def auth_cache_setting(name, default):
+    return getattr(settings, 'WEBSOCKET_AUTH_CACHE', {}).get(name, default)
+
+
+class TokenUserCache:
+    """
+    Cache LRU em memória: jti do token -> snapshot do usuário (uma tupla com
+    SNAPSHOT_FIELDS, não a instância do ORM). Cada entrada vale até o token
+    expirar (no máximo MAX_AGE segundos) e o cache guarda até MAX_SIZE
+    tokens, descartando os menos usados.
+
+    Uma tempestade de reconexões depois de um deploy vira leituras deste
+    dicionário, não do banco.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, jti):
+        with self.lock:
+            entry = self.entries.get(jti)
+            if entry is None:
+                return None
+            expires_at, snapshot = entry
+            if expires_at <= time.time():
+                del self.entries[jti]
+                return None
+            self.entries.move_to_end(jti)
+            return snapshot
+
+    def set(self, jti, snapshot, token_expires_at):
+        expires_at = min(token_expires_at, time.time() + auth_cache_setting('MAX_AGE', 300))
+        with self.lock:
+            self.entries[jti] = (expires_at, snapshot)
+            self.entries.move_to_end(jti)
+            while len(self.entries) > auth_cache_setting('MAX_SIZE', 10000):
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_user_cache = TokenUserCache()
+
+
+def user_from_snapshot(snapshot):
+    """ Um User sem ida ao banco, só com os campos do snapshot carregados. """
+    values = dict(zip(SNAPSHOT_FIELDS, snapshot))
+    # from_db espera os valores na ordem dos campos do modelo
+    field_names = [field.attname for field in User._meta.concrete_fields if field.attname in values]
+    return User.from_db('default', field_names, [values[name] for name in field_names])
+
+
 @database_sync_to_async
-def get_user(token_key):
+def load_user_snapshot(user_id):
+    return User.objects.filter(pk=user_id, is_active=True).values_list(*SNAPSHOT_FIELDS).first()
+
+
+async def get_user(token_key):
     try:
-        # Valida o token de acesso
+        # Valida o token de acesso (assinatura e expiração; não usa o banco)
         token = AccessToken(token_key)
-        # Pega o ID do usuário do token
-        user_id = token['user_id']
-        return User.objects.get(id=user_id)
-    except Exception as e:
-        print(f"Erro ao autenticar token: {e}")
+        jti, user_id, expires_at = token['jti'], token['user_id'], token['exp']
+    except (TokenError, KeyError) as error:
+        logger.info("Token de WebSocket recusado: %s", error)
         return AnonymousUser()
 
+    snapshot = token_user_cache.get(jti)
+    if snapshot is None:
+        snapshot = await load_user_snapshot(user_id)
+        if snapshot is None:
+            logger.info("Token de WebSocket de usuário inexistente ou inativo: %s", user_id)
+            return AnonymousUser()
+        token_user_cache.set(jti, snapshot, expires_at)
+    return user_from_snapshot(snapshot)
+
 class TokenAuthMiddleware:
     """
     Middleware de autenticação por Token para WebSockets.
@@ -28,14 +108,14 @@ class TokenAuthMiddleware:
         # Pega a string de query da conexão
         query_string = scope.get('query_string', b'').decode('utf-8')
         query_params = parse_qs(query_string)
-        
+
         # Pega o token (pega o primeiro item da lista de 'token')
         token = query_params.get('token', [None])[0]
 
         if token:
-            # Se tiver token, busca o usuário no banco
+            # Se tiver token, busca o usuário (cache por jti, ver TokenUserCache)
             scope['user'] = await get_user(token)
         else:
             scope['user'] = AnonymousUser()
-        
-        return await self.app(scope, receive, send)
\ No newline at end of file
+
+        return await self.app(scope, receive, send)
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Posts = apps.get_model('core', 'Posts')
+    Reaction = apps.get_model('core', 'Reaction')
+    Comment = apps.get_model('core', 'Comment')
+    PostReactionCount = apps.get_model('core', 'PostReactionCount')
+
+    totals = Reaction.objects.order_by().values('post_id', 'emoji').annotate(total=Count('id'))
+    PostReactionCount.objects.bulk_create(
+        [PostReactionCount(post_id=row['post_id'], emoji=row['emoji'], count=row['total']) for row in totals],
+        batch_size=1000,
+    )
+
+    comment_totals = Comment.objects.order_by().values('post_id').annotate(total=Count('id'))
+    for row in comment_totals:
+        Posts.objects.filter(pk=row['post_id']).update(comment_count=row['total'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_posts_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posts',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='PostReactionCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('emoji', models.CharField(max_length=5)),
+                ('count', models.IntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reaction_counts', to='core.posts')),
+            ],
+            options={
+                'unique_together': {('post', 'emoji')},
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
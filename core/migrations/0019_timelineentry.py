@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_timelines(apps, schema_editor):
+    Profile = apps.get_model('core', 'Profile')
+    Posts = apps.get_model('core', 'Posts')
+    TimelineEntry = apps.get_model('core', 'TimelineEntry')
+
+    for profile in Profile.objects.all():
+        followed_user_ids = list(profile.following.values_list('user_id', flat=True))
+        recent_posts = (
+            Posts.objects.filter(owner_id__in=followed_user_ids, community__isnull=True)
+            .order_by('-createdAt', '-pk')
+            .values_list('pk', 'createdAt')[:1000]
+        )
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=profile.user_id, post_id=pk, created_at=created_at) for pk, created_at in recent_posts],
+            batch_size=1000,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_post_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='core.posts')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'created_at', 'post'], name='timeline_user_created_idx')],
+                'unique_together': {('user', 'post')},
+            },
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:46
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+# Cópia congelada do tokenizador de core.search, como era nesta migração:
+# a migração não pode depender do código atual do app
+SEARCH_FIELDS = {
+    'user': {'username': 10, 'first_name': 6, 'last_name': 6, 'universidade': 2, 'curso': 2},
+    'post': {'title': 5, 'content': 1},
+    'community': {'name': 10, 'related_course': 5, 'description': 1},
+}
+MAX_TERM_LENGTH = 64
+TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    return list(dict.fromkeys(token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(normalize(text))))
+
+
+def document_terms(kind, texts):
+    terms = []
+    for field, weight in SEARCH_FIELDS[kind].items():
+        terms.extend((field, term, weight) for term in tokenize(texts.get(field)))
+    return terms
+
+
+def backfill_search_index(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Posts = apps.get_model('core', 'Posts')
+    Community = apps.get_model('core', 'Community')
+    SearchTerm = apps.get_model('core', 'SearchTerm')
+
+    documents = []
+    for user in User.objects.select_related('profile'):
+        profile = getattr(user, 'profile', None)
+        documents.append(('user', user.pk, {
+            'username': user.username,
+            'first_name': user.first_name,
+            'last_name': user.last_name,
+            'universidade': profile.universidade if profile else '',
+            'curso': profile.curso if profile else '',
+        }))
+    for post in Posts.objects.filter(community__isnull=True):
+        documents.append(('post', post.pk, {'title': post.title, 'content': post.content}))
+    for community in Community.objects.all():
+        documents.append(('community', community.pk, {
+            'name': community.name,
+            'related_course': community.related_course,
+            'description': community.description,
+        }))
+
+    SearchTerm.objects.bulk_create(
+        [
+            SearchTerm(kind=kind, object_id=object_id, field=field, term=term, weight=weight)
+            for kind, object_id, texts in documents
+            for field, term, weight in document_terms(kind, texts)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_timelineentry'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('user', 'Usuário'), ('post', 'Post'), ('community', 'Comunidade')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('field', models.CharField(max_length=20)),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['kind', 'term'], name='search_kind_term_idx'), models.Index(fields=['kind', 'object_id'], name='search_kind_object_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:49
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils import timezone
+
+# Cópia congelada da extração de core.hashtags, como era nesta migração:
+# a migração não pode depender do código atual do app
+HASHTAG_RE = re.compile(r'(?<![\w&])#(\w+)')
+MAX_TAG_LENGTH = 50
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def normalize_tag(name):
+    return re.sub(r'[^0-9a-z_]', '', normalize(name.lstrip('#')))[:MAX_TAG_LENGTH]
+
+
+def extract_hashtags(text):
+    names = (normalize_tag(match) for match in HASHTAG_RE.findall(text or ''))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+def normalize_and_count_tags(apps, schema_editor):
+    Tag = apps.get_model('core', 'Tag')
+    TagUsage = apps.get_model('core', 'TagUsage')
+    Posts = apps.get_model('core', 'Posts')
+    Through = Posts.tags.through
+
+    # 1. Normaliza os nomes existentes, juntando as tags que viram a mesma
+    canonical = {}
+    for tag in Tag.objects.order_by('pk'):
+        name = normalize_tag(tag.name) or tag.name
+        if name in canonical:
+            post_ids = Through.objects.filter(tag_id=tag.pk).values_list('posts_id', flat=True)
+            Through.objects.bulk_create(
+                [Through(posts_id=post_id, tag_id=canonical[name].pk) for post_id in post_ids],
+                ignore_conflicts=True,
+            )
+            tag.delete()
+        else:
+            canonical[name] = tag
+    for name, tag in canonical.items():
+        if tag.name != name:
+            Tag.objects.filter(pk=tag.pk).update(name=name)
+
+    # 2. Extrai as #hashtags dos posts já publicados
+    tag_ids = {name: tag.pk for name, tag in canonical.items()}
+    links = []
+    for post_id, content in Posts.objects.values_list('pk', 'content').iterator():
+        for name in extract_hashtags(content):
+            if name not in tag_ids:
+                tag_ids[name] = Tag.objects.create(name=name).pk
+            links.append(Through(posts_id=post_id, tag_id=tag_ids[name]))
+    Through.objects.bulk_create(links, batch_size=1000, ignore_conflicts=True)
+
+    # 3. Contadores (total e por dia)
+    totals = {}
+    usage = {}
+    for tag_id, created_at in Through.objects.values_list('tag_id', 'posts__createdAt').iterator():
+        day = timezone.localdate(created_at)
+        totals[tag_id] = totals.get(tag_id, 0) + 1
+        usage[(tag_id, day)] = usage.get((tag_id, day), 0) + 1
+    for tag_id, total in totals.items():
+        Tag.objects.filter(pk=tag_id).update(post_count=total)
+    TagUsage.objects.bulk_create(
+        [TagUsage(tag_id=tag_id, day=day, count=count) for (tag_id, day), count in usage.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_searchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='post_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='TagUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('count', models.IntegerField(default=0)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='usage', to='core.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'tag'], name='tagusage_day_tag_idx')],
+                'unique_together': {('tag', 'day')},
+            },
+        ),
+        migrations.RunPython(normalize_and_count_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Q
+
+
+def backfill_unread_counters(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    Announcement = apps.get_model('core', 'Announcement')
+    Notification = apps.get_model('core', 'Notification')
+    UnreadCounter = apps.get_model('core', 'UnreadCounter')
+
+    counters = []
+    for user in User.objects.select_related('profile'):
+        profile = getattr(user, 'profile', None)
+        unread_announcements = 0
+        if profile is not None and profile.onboarding_complete:
+            unread_announcements = Announcement.objects.filter(
+                Q(target_university='', target_course='')
+                | Q(target_university=profile.universidade, target_course='')
+                | Q(target_university=profile.universidade, target_course=profile.curso)
+            ).exclude(read_by=user).distinct().count()
+        counters.append(UnreadCounter(
+            user=user,
+            unread_announcements=unread_announcements,
+            unread_social=Notification.objects.filter(recipient=user, read=False).count(),
+        ))
+    UnreadCounter.objects.bulk_create(counters, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0021_hashtag_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UnreadCounter',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='unread_counter', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('unread_social', models.IntegerField(default=0)),
+                ('unread_announcements', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_unread_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:53
+
+import hashlib
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Cópia congelada de core.audience.audience_key, como era nesta migração
+def audience_key(university='', course=''):
+    if not university and not course:
+        return 'all'
+    if not course:
+        return 'uni_' + hashlib.md5(university.encode('utf-8')).hexdigest()[:16]
+    return 'course_' + hashlib.md5(f'{university}|{course}'.encode('utf-8')).hexdigest()[:16]
+
+
+def fill_audience_keys(apps, schema_editor):
+    Announcement = apps.get_model('core', 'Announcement')
+    for announcement in Announcement.objects.all():
+        key = audience_key(announcement.target_university, announcement.target_course)
+        if key != announcement.audience_key:
+            Announcement.objects.filter(pk=announcement.pk).update(audience_key=key)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_unreadcounter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='audience_key',
+            field=models.CharField(default='all', editable=False, max_length=40),
+        ),
+        migrations.RunPython(fill_audience_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='announcement',
+            index=models.Index(fields=['audience_key', '-timestamp', 'id'], name='announcement_audience_idx'),
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:54
+
+import hashlib
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Cópia congelada de core.audience, como era nesta migração
+def audience_key(university='', course=''):
+    if not university and not course:
+        return 'all'
+    if not course:
+        return 'uni_' + hashlib.md5(university.encode('utf-8')).hexdigest()[:16]
+    return 'course_' + hashlib.md5(f'{university}|{course}'.encode('utf-8')).hexdigest()[:16]
+
+
+def profile_audience_keys(profile):
+    if not profile.onboarding_complete:
+        return []
+    keys = [audience_key(), audience_key(profile.universidade), audience_key(profile.universidade, profile.curso)]
+    return list(dict.fromkeys(keys))
+
+
+def convert_read_by(apps, schema_editor):
+    """
+    read_by -> marca d'água + exceções: a marca avança enquanto os recados
+    visíveis (do mais antigo ao mais novo) estão lidos; os lidos depois do
+    primeiro não lido viram exceções.
+    """
+    User = apps.get_model('auth', 'User')
+    Announcement = apps.get_model('core', 'Announcement')
+    AnnouncementReadState = apps.get_model('core', 'AnnouncementReadState')
+    AnnouncementReadException = apps.get_model('core', 'AnnouncementReadException')
+    ReadBy = Announcement.read_by.through
+
+    reader_ids = ReadBy.objects.values_list('user_id', flat=True).distinct()
+    for user in User.objects.filter(pk__in=reader_ids).select_related('profile'):
+        read_ids = set(ReadBy.objects.filter(user_id=user.pk).values_list('announcement_id', flat=True))
+        profile = getattr(user, 'profile', None)
+        keys = profile_audience_keys(profile) if profile is not None else []
+        visible = Announcement.objects.filter(audience_key__in=keys).order_by('timestamp', 'id')
+
+        read_until = None
+        for announcement_id, timestamp in visible.values_list('pk', 'timestamp'):
+            if announcement_id not in read_ids:
+                break
+            read_until = timestamp
+
+        AnnouncementReadState.objects.create(user=user, read_until=read_until)
+        exceptions = Announcement.objects.filter(pk__in=read_ids)
+        if read_until is not None:
+            exceptions = exceptions.filter(timestamp__gt=read_until)
+        AnnouncementReadException.objects.bulk_create(
+            [AnnouncementReadException(user=user, announcement_id=pk) for pk in exceptions.values_list('pk', flat=True)],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0023_announcement_audience_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnouncementReadState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='announcement_read_state', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('read_until', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AnnouncementReadException',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('announcement', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='read_exceptions', to='core.announcement')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='announcement_read_exceptions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'announcement')},
+            },
+        ),
+        migrations.RunPython(convert_read_by, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='announcement',
+            name='read_by',
+        ),
+    ]
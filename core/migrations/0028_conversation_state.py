@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:00
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+PREVIEW_LENGTH = 120
+
+
+# Cópia congelada de core.chat.message_preview: as conversas antigas ficam
+# com a mesma prévia das novas
+def message_preview(content):
+    preview = ' '.join(content.split())
+    if len(preview) > PREVIEW_LENGTH:
+        preview = preview[:PREVIEW_LENGTH - 1] + '…'
+    return preview
+
+
+def fill_conversation_state(apps, schema_editor):
+    """
+    Última mensagem de cada conversa e, para cada participante, a última
+    mensagem como lida (não havia registro de leitura antes).
+    """
+    Conversation = apps.get_model('core', 'Conversation')
+    ConversationParticipant = apps.get_model('core', 'ConversationParticipant')
+    Message = apps.get_model('core', 'Message')
+
+    Conversation.objects.update(last_message_at=F('created_at'))
+    for message in Message.objects.filter(
+        pk__in=Subquery(
+            Message.objects.filter(conversation_id=OuterRef('conversation_id'))
+            .order_by('-timestamp', '-id').values('pk')[:1]
+        )
+    ).iterator():
+        Conversation.objects.filter(pk=message.conversation_id).update(
+            last_message=message,
+            last_message_preview=message_preview(message.content),
+            last_message_at=message.timestamp,
+        )
+    ConversationParticipant.objects.update(
+        last_read_message=Subquery(
+            Conversation.objects.filter(pk=OuterRef('conversation_id')).values('last_message')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0027_message_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.message'),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='last_message_preview',
+            field=models.CharField(blank=True, default='', max_length=120),
+        ),
+        # A tabela automática de 'participants' vira o modelo ConversationParticipant
+        # (mesma tabela, mesmas colunas): só o estado muda.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ConversationParticipant',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('conversation', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participant_states', to='core.conversation')),
+                        ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_states', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'db_table': 'core_conversation_participants',
+                        'unique_together': {('conversation', 'user')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='conversation',
+                    name='participants',
+                    field=models.ManyToManyField(related_name='conversations', through='core.ConversationParticipant', to=settings.AUTH_USER_MODEL),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversationparticipant',
+            name='last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='core.message'),
+        ),
+        migrations.AddIndex(
+            model_name='conversation',
+            index=models.Index(fields=['-last_message_at', '-id'], name='conversation_inbox_idx'),
+        ),
+        migrations.RunPython(fill_conversation_state, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_direct_pairs(apps, schema_editor):
+    """
+    Conversas com exatamente dois participantes viram DMs. Se já existir
+    mais de uma para o mesmo par, a mais recente fica com a chave; as
+    outras continuam na lista de conversas, só não são mais reabertas.
+    """
+    Conversation = apps.get_model('core', 'Conversation')
+    ConversationParticipant = apps.get_model('core', 'ConversationParticipant')
+
+    members = {}
+    for conversation_id, user_id in ConversationParticipant.objects.values_list('conversation_id', 'user_id'):
+        members.setdefault(conversation_id, []).append(user_id)
+
+    latest_by_pair = {}
+    conversations = Conversation.objects.filter(pk__in=members).order_by('last_message_at', 'id')
+    for conversation_id in conversations.values_list('pk', flat=True):
+        user_ids = members[conversation_id]
+        if len(user_ids) == 2 and user_ids[0] != user_ids[1]:
+            latest_by_pair[tuple(sorted(user_ids))] = conversation_id
+
+    for (low, high), conversation_id in latest_by_pair.items():
+        Conversation.objects.filter(pk=conversation_id).update(direct_user_low_id=low, direct_user_high_id=high)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0028_conversation_state'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='direct_user_high',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='direct_user_low',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(fill_direct_pairs, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='conversation',
+            constraint=models.UniqueConstraint(fields=('direct_user_low', 'direct_user_high'), name='conversation_direct_pair_unique'),
+        ),
+    ]
@@ -1,15 +1,45 @@
 # core/models.py
 from django.db import models
+from django.conf import settings
 from django.contrib.auth.models import User 
+from django.core.cache import cache
 from django.db.models import Max, Q # 1. Importar Q
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .audience import audience_key
+from .cache import make_key
 
 # --- NOVO MODELO: Tag (para #hashtags) ---
 class Tag(models.Model):
+    # Sempre normalizado (core.hashtags.normalize_tag): a busca é por igualdade
     name = models.CharField(max_length=50, unique=True)
+    # Quantos posts usam a tag (desnormalizado, ver core.hashtags)
+    post_count = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.name
 
+
+# --- Contadores diários de uso das tags (trending) ---
+class TagUsage(models.Model):
+    """
+    Quantos posts criados em 'day' usam a tag. Os trending tags somam
+    os últimos dias daqui, sem varrer os posts.
+    """
+    tag = models.ForeignKey(Tag, related_name='usage', on_delete=models.CASCADE)
+    day = models.DateField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('tag', 'day')
+        indexes = [
+            models.Index(fields=['day', 'tag'], name='tagusage_day_tag_idx'),
+        ]
+
+    def __str__(self):
+        return f'#{self.tag.name} em {self.day}: {self.count}'
+
 # --- MODELO ATUALIZADO: Posts ---
 class Posts(models.Model):
     owner = models.ForeignKey(User, related_name='posts', on_delete=models.CASCADE)
@@ -28,9 +58,39 @@ class Posts(models.Model):
                                   blank=True)
     tags = models.ManyToManyField(Tag, blank=True, related_name="posts")
 
+    # Contador desnormalizado (mantido por core.counters)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        # Suporta a paginação keyset (createdAt, pk) dos feeds
+        indexes = [
+            models.Index(fields=['createdAt', 'id'], name='posts_created_id_idx'),
+        ]
+
     def __str__(self):
         return self.title
 
+# --- Timeline materializada do feed "Seguindo" ---
+class TimelineEntry(models.Model):
+    """
+    Uma linha por (seguidor, post) que aparece no feed "Seguindo".
+    Preenchida por core.timeline quando o post é criado (fan-out na escrita)
+    e quando o usuário segue alguém (backfill).
+    """
+    user = models.ForeignKey(User, related_name='timeline_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Posts, related_name='timeline_entries', on_delete=models.CASCADE)
+    # Cópia de post.createdAt, para ordenar sem precisar do JOIN
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'post'], name='timeline_user_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'Post {self.post_id} na timeline de {self.user_id}'
+
 # --- MODELO ATUALIZADO: Badge (Com JSONField de Permissão) ---
 class Badge(models.Model):
     name = models.CharField(max_length=50, unique=True) 
@@ -81,12 +141,29 @@ class Profile(models.Model):
     def __str__(self):
         return f'{self.user.username} Profile'
 
+    @cached_property
+    def permission_set(self):
+        """
+        Permissões ativas em qualquer badge do perfil.
+        Calculado uma vez por instância (ou seja, por request) e guardado no
+        cache do Django; os sinais invalidam quando Badge.permissions ou
+        Profile.badges mudam.
+        """
+        key = make_key('permissions', ('permissions',), self.pk)
+        permissions = cache.get(key)
+        if permissions is None:
+            permissions = set()
+            for badge_permissions in self.badges.values_list('permissions', flat=True):
+                permissions.update(name for name, enabled in badge_permissions.items() if enabled is True)
+            permissions = frozenset(permissions)
+            cache.set(key, permissions, getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 300))
+        return permissions
+
     def has_permission(self, permission_name):
         if self.user.is_staff:
             return True
             
-        query_filter = {f'permissions__{permission_name}': True}
-        return self.badges.filter(**query_filter).exists()
+        return permission_name in self.permission_set
     
     @property
     def is_admin(self):
@@ -101,16 +178,54 @@ class Announcement(models.Model):
     
     target_university = models.CharField(max_length=200, blank=True)
     target_course = models.CharField(max_length=200, blank=True) 
+    # Público normalizado (core.audience), derivado dos dois campos acima no save()
+    audience_key = models.CharField(max_length=40, default='all', editable=False)
 
-    # 2. NOVO CAMPO PARA RASTREAR LEITURAS
-    read_by = models.ManyToManyField(User, related_name="read_announcements", blank=True)
+    # Leituras: ver AnnouncementReadState / AnnouncementReadException
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Feed de recados: IN (públicos do perfil) + range scan ordenado
+            models.Index(fields=['audience_key', '-timestamp', 'id'], name='announcement_audience_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.audience_key = audience_key(self.target_university, self.target_course)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'target_university', 'target_course'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'audience_key'}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Anúncio de {self.author.username} para {self.target_course or self.target_university or 'Global'}"
     
+
+# --- Leitura de recados (marca d'água + exceções) ---
+class AnnouncementReadState(models.Model):
+    """
+    Todo recado visível com timestamp <= 'read_until' está lido. Depois da
+    marca, só os que estão em AnnouncementReadException. Ocupa uma linha por
+    usuário, em vez de uma por (usuário, recado). Ver core.notifications.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='announcement_read_state')
+    read_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.user.username} leu até {self.read_until}'
+
+
+class AnnouncementReadException(models.Model):
+    """ Recado lido fora de ordem (mais novo que a marca d'água do usuário). """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='announcement_read_exceptions')
+    announcement = models.ForeignKey(Announcement, on_delete=models.CASCADE, related_name='read_exceptions')
+
+    class Meta:
+        unique_together = ('user', 'announcement')
+
+    def __str__(self):
+        return f'{self.user.username} leu o recado {self.announcement_id}'
+
 # --- (Restante dos modelos Reaction, Comment, Community, etc. permanecem iguais) ---
 
 class Reaction(models.Model):
@@ -126,6 +241,21 @@ class Reaction(models.Model):
     def __str__(self):
         return f'{self.user.username} reacted {self.emoji} to post {self.post.pk}'
 
+class PostReactionCount(models.Model):
+    """
+    Total de reações por emoji de um post, mantido por core.counters
+    para que o feed não precise ler todas as linhas de Reaction.
+    """
+    post = models.ForeignKey(Posts, related_name='reaction_counts', on_delete=models.CASCADE)
+    emoji = models.CharField(max_length=5)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('post', 'emoji')
+
+    def __str__(self):
+        return f'{self.emoji} x{self.count} no post {self.post_id}'
+
 class Comment(models.Model):
     post = models.ForeignKey(Posts, related_name='comments', on_delete=models.CASCADE)
     user = models.ForeignKey(User, related_name='comments', on_delete=models.CASCADE) 
@@ -199,21 +329,85 @@ class Notification(models.Model):
 
     read = models.BooleanField(default=False)
     timestamp = models.DateTimeField(auto_now_add=True)
+    # Notificações agregadas (reações): quantas pessoas, contando 'sender'
+    actor_count = models.PositiveIntegerField(default=1)
 
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Caixa de entrada paginada (NotificationCursorPagination)
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notification_inbox_idx'),
+            # Não lidas / retenção das lidas antigas (compact_notifications)
+            models.Index(fields=['recipient', 'read', 'timestamp'], name='notification_read_idx'),
+        ]
 
     def __str__(self):
         return f'{self.sender.username} {self.verb} -> {self.recipient.username}'
 
+
+# --- Contadores de não lidos (sino) ---
+class UnreadCounter(models.Model):
+    """
+    Contagens de não lidos de cada usuário, mantidas incrementalmente
+    (core.notifications). /api/notifications/status/ só lê esta linha.
+    """
+    user = models.OneToOneField(User, primary_key=True, on_delete=models.CASCADE, related_name='unread_counter')
+    unread_social = models.IntegerField(default=0)
+    unread_announcements = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.user.username}: {self.unread_social} sociais, {self.unread_announcements} recados'
+
 class Conversation(models.Model):
-    participants = models.ManyToManyField(User, related_name="conversations")
+    participants = models.ManyToManyField(User, related_name="conversations", through='ConversationParticipant')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Última mensagem, desnormalizada (core.chat): a lista de conversas não
+    # precisa consultar as mensagens. Sem mensagens, last_message_at é a criação.
+    last_message = models.ForeignKey('Message', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    last_message_preview = models.CharField(max_length=120, blank=True, default='')
+    last_message_at = models.DateTimeField(default=timezone.now)
+
+    # Conversa direta (DM): o par de usuários em ordem (menor ID, maior ID).
+    # A restrição única garante uma só conversa por par (core.chat).
+    direct_user_low = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', db_index=False, editable=False
+    )
+    direct_user_high = models.ForeignKey(
+        User, null=True, blank=True, on_delete=models.SET_NULL, related_name='+', editable=False
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-last_message_at', '-id'], name='conversation_inbox_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['direct_user_low', 'direct_user_high'], name='conversation_direct_pair_unique'),
+        ]
+
     def __str__(self):
         return f"Conversa entre {', '.join([user.username for user in self.participants.all()])}"
 
+class ConversationParticipant(models.Model):
+    """
+    Participação numa conversa (a tabela intermediária de 'participants'),
+    com o estado de leitura de cada participante.
+    """
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='participant_states')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_states')
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_message = models.ForeignKey(
+        'Message', null=True, blank=True, on_delete=models.SET_NULL, related_name='+'
+    )
+
+    class Meta:
+        db_table = 'core_conversation_participants'
+        unique_together = ('conversation', 'user')
+
+    def __str__(self):
+        return f'{self.user.username} em {self.conversation_id}: {self.unread_count} não lidas'
+
 class Message(models.Model):
     conversation = models.ForeignKey(Conversation, related_name='messages', on_delete=models.CASCADE)
     author = models.ForeignKey(User, related_name='messages', on_delete=models.CASCADE)
@@ -222,6 +416,36 @@ class Message(models.Model):
 
     class Meta:
         ordering = ['timestamp'] 
+        indexes = [
+            # Histórico paginado da conversa (MessageCursorPagination)
+            models.Index(fields=['conversation', '-timestamp', '-id'], name='message_history_idx'),
+        ]
+
+    def __str__(self):
+        return f"Mensagem de {self.author.username} em {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
+
+# --- Índice de busca (core.search) ---
+class SearchTerm(models.Model):
+    """
+    Índice invertido: uma linha por (objeto, campo, termo normalizado).
+    A busca por prefixo vira um range scan em (kind, term).
+    """
+    KIND_CHOICES = [
+        ('user', 'Usuário'),
+        ('post', 'Post'),
+        ('community', 'Comunidade'),
+    ]
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    field = models.CharField(max_length=20)
+    term = models.CharField(max_length=64)
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['kind', 'term'], name='search_kind_term_idx'),
+            models.Index(fields=['kind', 'object_id'], name='search_kind_object_idx'),
+        ]
 
     def __str__(self):
-        return f"Mensagem de {self.author.username} em {self.timestamp.strftime('%Y-%m-%d %H:%M')}"
\ No newline at end of file
+        return f'{self.term} -> {self.kind} {self.object_id} ({self.field})'
@@ -0,0 +1,347 @@
+# core/notifications.py
+import logging
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, Max, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .audience import profile_audience_keys
+from .models import Announcement, AnnouncementReadException, AnnouncementReadState, Notification, UnreadCounter
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------------------
+# Público-alvo dos recados
+# ------------------------------------------------------------------------------
+
+def announcements_for_profile(profile):
+    """
+    Recados visíveis para o perfil: globais, da universidade ou do curso.
+    Um IN sobre audience_key, sem OR nem DISTINCT: cada recado tem um só
+    público, e o índice (audience_key, timestamp) já entrega a ordem.
+    """
+    keys = profile_audience_keys(profile)
+    if not keys:
+        return Announcement.objects.none()
+    return Announcement.objects.filter(audience_key__in=keys)
+
+
+def audience_filter(announcement, prefix='user__profile__'):
+    """
+    O inverso de announcements_for_profile: Q que seleciona os perfis
+    (ou o que aponta para eles, via 'prefix') que recebem o recado.
+    """
+    conditions = {'onboarding_complete': True}
+    if announcement.target_university or announcement.target_course:
+        conditions['universidade'] = announcement.target_university
+    if announcement.target_course:
+        conditions['curso'] = announcement.target_course
+    return Q(**{prefix + field: value for field, value in conditions.items()})
+
+
+# ------------------------------------------------------------------------------
+# Leitura de recados: marca d'água + exceções
+# ------------------------------------------------------------------------------
+
+def announcement_read_state(user):
+    """ (read_until, {IDs lidos depois da marca}) do usuário. """
+    read_until = AnnouncementReadState.objects.filter(pk=user.pk).values_list('read_until', flat=True).first()
+    exceptions = set(AnnouncementReadException.objects.filter(user=user).values_list('announcement_id', flat=True))
+    return read_until, exceptions
+
+
+def is_announcement_read(announcement, read_state):
+    read_until, exceptions = read_state
+    return (read_until is not None and announcement.timestamp <= read_until) or announcement.pk in exceptions
+
+
+def unread_announcements(user, read_until=None):
+    """
+    Recados visíveis e não lidos: depois da marca d'água e fora das exceções
+    (um conjunto pequeno, indexado por usuário).
+    """
+    if read_until is None:
+        read_until = AnnouncementReadState.objects.filter(pk=user.pk).values_list('read_until', flat=True).first()
+    queryset = announcements_for_profile(user.profile)
+    if read_until is not None:
+        queryset = queryset.filter(timestamp__gt=read_until)
+    return queryset.exclude(pk__in=AnnouncementReadException.objects.filter(user=user).values('announcement_id'))
+
+
+def lock_unread_counter(user):
+    """
+    Trava a linha do UnreadCounter do usuário até o fim da transação: duas
+    marcações de leitura simultâneas contariam os mesmos recados como não
+    lidos e descontariam duas vezes.
+    """
+    list(UnreadCounter.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+
+
+def mark_announcements_read(user, announcement_ids):
+    """
+    Marca recados específicos como lidos, desconta do UnreadCounter e devolve
+    quantos ainda não estavam. Os lidos viram exceções (um INSERT que ignora
+    conflitos) e a marca d'água avança se der (advance_read_watermark).
+    """
+    with transaction.atomic():
+        lock_unread_counter(user)
+        newly_read = list(unread_announcements(user).filter(pk__in=announcement_ids).values_list('pk', flat=True))
+        if not newly_read:
+            return 0
+
+        AnnouncementReadException.objects.bulk_create(
+            [AnnouncementReadException(user=user, announcement_id=pk) for pk in newly_read],
+            ignore_conflicts=True,
+        )
+        advance_read_watermark(user)
+        change_unread_counts(user.pk, announcements=-len(newly_read))
+    return len(newly_read)
+
+
+def mark_announcements_read_up_to(user, announcement_id):
+    """
+    Marca como lido tudo até o recado 'announcement_id' (inclusive): só
+    move a marca d'água, não importa quantos recados isso cubra. Desconta
+    do UnreadCounter e devolve quantos estavam não lidos.
+    """
+    timestamp = (
+        announcements_for_profile(user.profile).filter(pk=announcement_id).values_list('timestamp', flat=True).first()
+    )
+    if timestamp is None:
+        return 0
+
+    with transaction.atomic():
+        lock_unread_counter(user)
+        read_until = AnnouncementReadState.objects.filter(pk=user.pk).values_list('read_until', flat=True).first()
+        if read_until is not None and timestamp <= read_until:
+            return 0
+
+        marked = unread_announcements(user, read_until).filter(timestamp__lte=timestamp).count()
+        set_read_until(user, timestamp)
+        advance_read_watermark(user)
+        change_unread_counts(user.pk, announcements=-marked)
+    return marked
+
+
+def set_read_until(user, read_until):
+    AnnouncementReadState.objects.update_or_create(user=user, defaults={'read_until': read_until})
+    # Exceções que ficaram para trás da marca não são mais necessárias
+    AnnouncementReadException.objects.filter(user=user, announcement__timestamp__lte=read_until).delete()
+
+
+def advance_read_watermark(user):
+    """
+    Avança a marca d'água até logo antes do recado não lido mais antigo.
+    Quem lê tudo termina com uma marca e nenhuma exceção.
+    """
+    read_until = AnnouncementReadState.objects.filter(pk=user.pk).values_list('read_until', flat=True).first()
+    oldest_unread = (
+        unread_announcements(user, read_until).order_by('timestamp', 'id').values_list('timestamp', flat=True).first()
+    )
+    read = announcements_for_profile(user.profile)
+    if oldest_unread is not None:
+        read = read.filter(timestamp__lt=oldest_unread)
+    new_read_until = read.aggregate(latest=Max('timestamp'))['latest']
+
+    if new_read_until is not None and (read_until is None or new_read_until > read_until):
+        set_read_until(user, new_read_until)
+
+
+def mark_notifications_read(user, ids=None, up_to=None):
+    """
+    Marca notificações sociais como lidas com um único UPDATE: todas, só
+    'ids', ou todas até a notificação 'up_to' (inclusive, na ordem da caixa
+    de entrada). Devolve quantas mudaram.
+    """
+    unread = Notification.objects.filter(recipient=user, read=False)
+    if ids is not None:
+        unread = unread.filter(pk__in=ids)
+    elif up_to is not None:
+        position = Notification.objects.filter(pk=up_to, recipient=user).values('timestamp')
+        unread = unread.filter(Q(timestamp__lt=Subquery(position)) | Q(timestamp=Subquery(position), pk__lte=up_to))
+
+    marked = unread.update(read=True)
+    change_unread_counts(user.pk, social=-marked)
+    return marked
+
+
+# ------------------------------------------------------------------------------
+# Contagens de não lidos
+# ------------------------------------------------------------------------------
+
+def unread_counts(user):
+    """
+    Os dois números da "bolinha" do sino (ver NotificationStatusView):
+    uma leitura pela chave primária do UnreadCounter.
+    """
+    counter = UnreadCounter.objects.filter(pk=user.pk).values('unread_announcements', 'unread_social').first()
+    if counter is None:
+        counter = reconcile_unread_counter(user)
+    return {
+        'unread_announcements_count': counter['unread_announcements'],
+        'unread_social_count': counter['unread_social'],
+    }
+
+
+def reconcile_unread_counter(user):
+    """ Recalcula do zero as contagens do usuário (comando reconcile_unread_counters). """
+    counts = {
+        'unread_announcements': unread_announcements(user).count(),
+        'unread_social': user.notifications.filter(read=False).count(),
+    }
+    UnreadCounter.objects.update_or_create(user=user, defaults=counts)
+    return counts
+
+
+def change_unread_counts(user_id, social=0, announcements=0):
+    """ Soma os deltas ao contador (UPDATE atômico) e avisa o socket do usuário. """
+    if not social and not announcements:
+        return
+    UnreadCounter.objects.filter(pk=user_id).update(
+        unread_social=F('unread_social') + social,
+        unread_announcements=F('unread_announcements') + announcements,
+    )
+    push_unread_delta(user_id, social=social, announcements=announcements)
+
+
+def count_new_announcement(announcement):
+    """ +1 para todo o público do recado: um único UPDATE e um único group_send. """
+    UnreadCounter.objects.filter(audience_filter(announcement)).update(
+        unread_announcements=F('unread_announcements') + 1
+    )
+    push_announcement(announcement)
+
+
+def discount_announcement(announcement):
+    """ Antes de excluir um recado: -1 para quem estava no público e não o leu. """
+    UnreadCounter.objects.filter(audience_filter(announcement)).exclude(
+        user__announcement_read_state__read_until__gte=announcement.timestamp
+    ).exclude(
+        user__in=announcement.read_exceptions.values('user_id')
+    ).update(unread_announcements=F('unread_announcements') - 1)
+    # Quem já tinha lido não muda: cada socket relê o próprio contador
+    send_to_group(audience_group_name(announcement.audience_key), {'type': 'unread.refresh'})
+
+
+# ------------------------------------------------------------------------------
+# Retenção
+# ------------------------------------------------------------------------------
+
+def delete_in_chunks(queryset, chunk_size=1000):
+    """ Apaga em blocos de PKs (os sinais de post_delete carregam cada linha). """
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:chunk_size])
+        if not pks:
+            return deleted
+        deleted += Notification.objects.filter(pk__in=pks).delete()[1].get(Notification._meta.label, 0)
+
+
+def roll_up_notifications(rollup_days):
+    """
+    Junta as notificações lidas mais antigas que 'rollup_days' por (usuário,
+    remetente, verbo): de "Fulano comentou" dez vezes fica só a mais nova.
+    Só entram as de uma pessoa (actor_count=1), que a mais nova já representa;
+    as agregadas ("Fulano e mais 4 reagiram") ficam, para não perder a
+    contagem. Devolve quantas foram apagadas.
+    """
+    read = Notification.objects.filter(read=True)
+    newer_sibling = read.filter(
+        recipient=OuterRef('recipient'), sender=OuterRef('sender'), verb=OuterRef('verb'),
+    ).filter(Q(timestamp__gt=OuterRef('timestamp')) | Q(timestamp=OuterRef('timestamp'), id__gt=OuterRef('id')))
+    return delete_in_chunks(
+        read.filter(timestamp__lt=timezone.now() - timedelta(days=rollup_days), actor_count=1)
+        .filter(Exists(newer_sibling))
+    )
+
+
+def compact_notifications(read_days=None, max_read_per_user=None, rollup_days=None):
+    """
+    Compacta as notificações lidas: junta as mais antigas que 'rollup_days'
+    (roll_up_notifications), apaga as mais antigas que 'read_days' e, de cada
+    usuário, as que passam de 'max_read_per_user' (das mais antigas para as
+    mais novas). Não lidas ficam sempre. Devolve quantas foram apagadas.
+    """
+    retention = getattr(settings, 'NOTIFICATION_RETENTION', {})
+    if read_days is None:
+        read_days = retention.get('READ_DAYS', 90)
+    if max_read_per_user is None:
+        max_read_per_user = retention.get('MAX_READ_PER_USER', 500)
+    if rollup_days is None:
+        rollup_days = retention.get('ROLLUP_DAYS', 7)
+
+    read = Notification.objects.filter(read=True)
+    deleted = roll_up_notifications(rollup_days)
+    deleted += delete_in_chunks(read.filter(timestamp__lt=timezone.now() - timedelta(days=read_days)))
+
+    crowded_inboxes = (
+        read.values('recipient_id').annotate(total=Count('id')).filter(total__gt=max_read_per_user)
+        .values_list('recipient_id', flat=True)
+    )
+    for recipient_id in list(crowded_inboxes):
+        if max_read_per_user <= 0:
+            deleted += delete_in_chunks(read.filter(recipient_id=recipient_id))
+            continue
+        oldest_kept = (
+            read.filter(recipient_id=recipient_id).order_by('-timestamp', '-id')
+            .values_list('timestamp', 'id')[max_read_per_user - 1:max_read_per_user]
+        )
+        timestamp, pk = oldest_kept[0]
+        deleted += delete_in_chunks(
+            read.filter(recipient_id=recipient_id).filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+        )
+    return deleted
+
+
+# ------------------------------------------------------------------------------
+# Push pelo WebSocket (NotificationConsumer)
+# ------------------------------------------------------------------------------
+
+def user_group_name(user_id):
+    return f'notifications_user_{user_id}'
+
+
+def audience_group_name(key):
+    return f'notifications_audience_{key}'
+
+
+def send_to_group(group, event):
+    """
+    Envia o evento ao grupo depois do commit (não avisa sobre algo que pode
+    sofrer rollback). Falhas do channel layer não derrubam a requisição:
+    o cliente ainda pode buscar /api/notifications/status/.
+    """
+    def send():
+        try:
+            channel_layer = get_channel_layer()
+            if channel_layer is None:
+                return
+            async_to_sync(channel_layer.group_send)(group, event)
+        except Exception:
+            logger.warning("Falha ao enviar evento para o grupo %s", group, exc_info=True)
+
+    transaction.on_commit(send)
+
+
+def push_unread_delta(user_id, social=0, announcements=0):
+    if social or announcements:
+        send_to_group(user_group_name(user_id), {
+            'type': 'unread.delta', 'social': social, 'announcements': announcements,
+        })
+
+
+def push_announcement(announcement):
+    """ Um recado novo: +1 para todo o público, com um único group_send. """
+    send_to_group(audience_group_name(announcement.audience_key), {
+        'type': 'unread.delta', 'social': 0, 'announcements': 1,
+    })
+
+
+def push_unread_refresh(user_id):
+    """ O público do usuário mudou (ex: trocou de curso): o socket recarrega tudo. """
+    send_to_group(user_group_name(user_id), {'type': 'unread.refresh'})
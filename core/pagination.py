@@ -0,0 +1,206 @@
+# core/pagination.py
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    """
+    Paginação por cursor "keyset": em vez de OFFSET, cada página começa
+    exatamente depois da última linha da página anterior, comparando a tupla
+    de ordenação (ex: (createdAt, pk)).
+
+    - O custo de qualquer página é o mesmo (range scan no índice).
+    - Inserções concorrentes não duplicam nem pulam itens entre páginas.
+
+    O último campo de 'ordering' precisa ser único (normalmente 'pk').
+    """
+    ordering = ('-createdAt', '-pk')
+    page_size = getattr(settings, 'FEED_PAGE_SIZE', 20)
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.current_page_size = self.get_page_size(request)
+
+        cursor = self.decode_cursor(request)
+        self.reverse = bool(cursor and cursor['r'])
+
+        ordering = self.get_ordering(reverse=self.reverse)
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self.build_keyset_filter(ordering, cursor['v']))
+            except (ValidationError, ValueError, TypeError):
+                # Cursor bem formado, mas com valores que não batem com os campos
+                # (o Django valida os valores ao montar o filtro)
+                raise NotFound(self.invalid_cursor_message)
+
+        # Busca um item a mais só para saber se existe uma próxima página
+        rows = list(queryset[:self.current_page_size + 1])
+        has_more = len(rows) > self.current_page_size
+        rows = rows[:self.current_page_size]
+
+        if self.reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    # --- Configuração ---
+
+    def get_ordering(self, reverse=False):
+        if not reverse:
+            return list(self.ordering)
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    # --- Links ---
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Página vazia vinda de um cursor reverso: volta para o início
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    # --- Cursor ---
+
+    def get_position(self, obj):
+        values = []
+        for field in self.ordering:
+            value = getattr(obj, field.lstrip('-'))
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return values
+
+    def encode_cursor(self, obj, reverse):
+        payload = json.dumps({'v': self.get_position(obj), 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            values = cursor['v']
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return {'v': values, 'r': bool(cursor.get('r'))}
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+    def build_keyset_filter(self, ordering, values):
+        """
+        Monta o equivalente a "(a, b) < (x, y)" respeitando a direção de cada campo:
+        (a < x) OR (a = x AND b < y)
+        """
+        keyset = Q()
+        equal_prefix = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            keyset |= equal_prefix & Q(**{f'{name}__{lookup}': value})
+            equal_prefix &= Q(**{name: value})
+        return keyset
+
+
+class FeedCursorPagination(KeysetCursorPagination):
+    """ Feeds de posts: mais recentes primeiro. """
+    ordering = ('-createdAt', '-pk')
+
+
+class FollowingFeedCursorPagination(KeysetCursorPagination):
+    """ Feed "Seguindo": ordenado pela timeline materializada (core.timeline). """
+    ordering = ('-feed_created_at', '-feed_post_id')
+
+
+class CommentCursorPagination(KeysetCursorPagination):
+    """ Conversa de um post: do comentário mais antigo para o mais novo. """
+    ordering = ('created_at', 'pk')
+
+
+class CommunityCursorPagination(KeysetCursorPagination):
+    """ Lista de comunidades em ordem alfabética. """
+    ordering = ('name', 'pk')
+
+
+class AdminFeedCursorPagination(KeysetCursorPagination):
+    """ Painel admin: lista os posts em ordem cronológica. """
+    ordering = ('createdAt', 'pk')
+
+
+class NotificationCursorPagination(KeysetCursorPagination):
+    """ Caixa de notificações: mais recentes primeiro. """
+    ordering = ('-timestamp', '-pk')
+
+
+class MessageCursorPagination(KeysetCursorPagination):
+    """
+    Histórico do chat: abre nas mensagens mais recentes. 'next' traz as
+    anteriores (rolar para cima) e 'previous' as que chegaram depois.
+    """
+    ordering = ('-timestamp', '-pk')
+    page_size = 50
+    max_page_size = 200
+
+
+class ConversationCursorPagination(KeysetCursorPagination):
+    """ Lista de conversas: a com a mensagem mais recente primeiro. """
+    ordering = ('-last_message_at', '-pk')
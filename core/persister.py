@@ -0,0 +1,132 @@
+# core/persister.py
+import asyncio
+import logging
+
+from channels.db import database_sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .chat import write_messages
+from .models import Message
+from .serializers import MessageSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def persister_setting(name, default):
+    return getattr(settings, 'CHAT_PERSISTER', {}).get(name, default)
+
+
+def write_and_serialize(messages):
+    """
+    Grava o lote e devolve, para cada mensagem, os dados serializados ou a
+    exceção que a impediu. Se o lote inteiro falhar (uma conversa apagada
+    com o socket aberto, um conteúdo inválido...), cada mensagem é gravada
+    sozinha: só a ruim falha, não as das outras conversas.
+    """
+    close_old_connections()
+    try:
+        return MessageSerializer(write_messages(messages), many=True).data
+    except Exception:
+        if len(messages) == 1:
+            raise
+        logger.warning("Falha ao gravar um lote de %d mensagens; gravando uma a uma.", len(messages), exc_info=True)
+    return [write_one(message) for message in messages]
+
+
+def write_one(message):
+    # A transação do lote voltou atrás: a mensagem ainda não existe
+    message.pk = None
+    message._state.adding = True
+    try:
+        return MessageSerializer(write_messages([message])[0]).data
+    except Exception as error:
+        logger.exception("Falha ao gravar mensagem na conversa %s.", message.conversation_id)
+        return error
+
+
+class MessagePersister:
+    """
+    Fila (limitada) das mensagens de todos os ChatConsumers do processo,
+    gravadas em lotes por uma task do event loop: um único hop para a
+    thread do banco e um bulk_create por lote (core.chat.write_messages),
+    em vez de um por mensagem.
+
+    O lote é o que se acumulou enquanto o anterior era gravado (mais até
+    FLUSH_INTERVAL segundos, se configurado): com pouco tráfego cada
+    mensagem sai sozinha, sem espera; em rajadas os lotes crescem sozinhos.
+
+    save() só retorna depois do commit, com o ID e o timestamp do servidor
+    (o ack ao cliente). Com a fila cheia, save() espera: o consumer para de
+    ler o socket até haver espaço (backpressure).
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.queue = None
+        self.task = None
+
+    async def enqueue(self, conversation_id, author, content):
+        """ Põe a mensagem na fila e devolve o future do ack (espera se a fila estiver cheia). """
+        self.ensure_worker()
+        future = self.loop.create_future()
+        message = Message(conversation_id=conversation_id, author=author, content=content)
+        await self.queue.put((message, future))
+        return future
+
+    async def save(self, conversation_id, author, content):
+        return await (await self.enqueue(conversation_id, author, content))
+
+    def ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self.loop is not loop:
+            # Primeiro uso, ou um novo event loop (testes, benchmark_chat)
+            self.loop = loop
+            self.queue = asyncio.Queue(maxsize=persister_setting('MAX_QUEUE_SIZE', 5000))
+            self.task = None
+        if self.task is None or self.task.done():
+            self.task = loop.create_task(self.run())
+
+    async def next_batch(self):
+        batch = [await self.queue.get()]
+        batch_size = persister_setting('BATCH_SIZE', 200)
+        deadline = self.loop.time() + persister_setting('FLUSH_INTERVAL', 0)
+        while len(batch) < batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - self.loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        while True:
+            batch = await self.next_batch()
+            try:
+                results = await database_sync_to_async(write_and_serialize)([message for message, _ in batch])
+            except Exception as error:
+                logger.exception("Falha ao gravar %d mensagens do chat.", len(batch))
+                results = [error] * len(batch)
+
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+
+persister = MessagePersister()
+
+
+async def enqueue_message(conversation_id, author, content):
+    """ Future com os dados serializados da mensagem, resolvido depois do commit. """
+    return await persister.enqueue(conversation_id, author, content)
@@ -0,0 +1,59 @@
+# core/queries.py
+from django.conf import settings
+from django.db.models import OuterRef, Prefetch, Subquery
+from django.db.models.functions import JSONObject
+
+from .models import Comment, CommunityMembership, PostReactionCount, Reaction
+
+
+def post_feed_queryset(queryset, user=None):
+    """
+    Prepara um queryset de Posts para ser renderizado pelo PostSerializer
+    com um número constante de queries, não importa quantos posts há na página:
+
+    - owner e owner.profile via JOIN (select_related)
+    - badges do dono e tags via prefetch
+    - só os N comentários mais recentes de cada post (+ autor e perfil),
+      num único prefetch fatiado (ROW_NUMBER() no banco)
+    - contadores de reações (PostReactionCount) via prefetch
+    - a reação do usuário logado numa única subquery anotada
+    """
+    queryset = queryset.select_related('owner__profile').prefetch_related(
+        'owner__profile__badges',
+        'tags',
+        Prefetch('comments', queryset=latest_comments_queryset(), to_attr='latest_comments'),
+        Prefetch('reaction_counts', queryset=PostReactionCount.objects.filter(count__gt=0)),
+    )
+
+    if user is not None and user.is_authenticated:
+        current_reaction = Reaction.objects.filter(post=OuterRef('pk'), user=user).values(
+            data=JSONObject(id='id', emoji='emoji', created_at='created_at')
+        )[:1]
+        queryset = queryset.annotate(current_user_reaction_data=Subquery(current_reaction))
+
+    return queryset
+
+
+
+def latest_comments_queryset(post=None):
+    """
+    Os POST_COMMENT_PREVIEW_SIZE comentários mais recentes. Sem 'post', serve
+    de queryset para o Prefetch (fatiado por post); com 'post', só os dele
+    (o filtro precisa vir antes do slice).
+    """
+    preview_size = getattr(settings, 'POST_COMMENT_PREVIEW_SIZE', 3)
+    queryset = Comment.objects.select_related('user__profile')
+    if post is not None:
+        queryset = queryset.filter(post=post)
+    return queryset.order_by('-created_at', '-pk')[:preview_size]
+
+
+def user_memberships_by_community(user):
+    """
+    Todas as inscrições do usuário logado, indexadas pelo ID da comunidade.
+    Passado no contexto do CommunitySerializer para que membership_status e
+    membership_id não façam uma query por comunidade.
+    """
+    if user is None or not user.is_authenticated:
+        return {}
+    return {membership.community_id: membership for membership in CommunityMembership.objects.filter(user=user)}
@@ -8,4 +8,7 @@ websocket_urlpatterns = [
     # e o passa para o Consumer como 'conversation_id'
     re_path(r'ws/chat/(?P<conversation_id>\d+)/$', consumers.ChatConsumer.as_asgi()),
 
+    # Contagens de não lidos do sino (NotificationConsumer)
+    re_path(r'ws/notifications/$', consumers.NotificationConsumer.as_asgi()),
+
 ]
\ No newline at end of file
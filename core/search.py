@@ -0,0 +1,195 @@
+# core/search.py
+import re
+import unicodedata
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Max, Q, Sum, Value, When
+
+from .models import Community, Posts, SearchTerm
+
+# Campos indexados de cada tipo e o peso de um termo encontrado em cada um
+SEARCH_FIELDS = {
+    'user': {'username': 10, 'first_name': 6, 'last_name': 6, 'universidade': 2, 'curso': 2},
+    'post': {'title': 5, 'content': 1},
+    'community': {'name': 10, 'related_course': 5, 'description': 1},
+}
+
+MAX_TERM_LENGTH = 64
+# Prefixos mais curtos que isso só casam com o termo exato: um prefixo de
+# uma letra varreria boa parte do índice a cada tecla digitada.
+MIN_PREFIX_LENGTH = 2
+# Casar o termo inteiro vale mais que casar só o prefixo
+EXACT_MATCH_MULTIPLIER = 2
+
+TOKEN_RE = re.compile(r'[0-9a-z]+')
+
+
+def normalize(text):
+    """ Minúsculas e sem acentos: 'Ciência da Computação' -> 'ciencia da computacao'. """
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(char for char in text if not unicodedata.combining(char)).lower()
+
+
+def tokenize(text):
+    """ Termos distintos do texto, na ordem em que aparecem. """
+    return list(dict.fromkeys(token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(normalize(text))))
+
+
+def document_terms(kind, texts):
+    """
+    Linhas do índice para um documento: {campo: texto} -> [(campo, termo, peso)].
+    A migração 0020 tem uma cópia congelada; mudanças aqui valem para a
+    indexação nova e para o comando 'rebuild_search_index'.
+    """
+    terms = []
+    for field, weight in SEARCH_FIELDS[kind].items():
+        terms.extend((field, term, weight) for term in tokenize(texts.get(field)))
+    return terms
+
+
+# ------------------------------------------------------------------------------
+# Indexação (chamada pelos sinais em core/signals.py)
+# ------------------------------------------------------------------------------
+
+def user_texts(user, profile=None):
+    profile = profile or user.profile
+    return {
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'universidade': profile.universidade,
+        'curso': profile.curso,
+    }
+
+
+def post_texts(post):
+    return {'title': post.title, 'content': post.content}
+
+
+def community_texts(community):
+    return {'name': community.name, 'related_course': community.related_course, 'description': community.description}
+
+
+def index_document(kind, object_id, texts):
+    """ Substitui as linhas do índice de um objeto. """
+    with transaction.atomic():
+        remove_document(kind, object_id)
+        SearchTerm.objects.bulk_create([
+            SearchTerm(kind=kind, object_id=object_id, field=field, term=term, weight=weight)
+            for field, term, weight in document_terms(kind, texts)
+        ])
+
+
+def remove_document(kind, object_id):
+    SearchTerm.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def index_profile(profile):
+    index_document('user', profile.user_id, user_texts(profile.user, profile))
+
+
+def index_post(post):
+    # Posts de comunidades ficam fora da busca global (podem ser privados)
+    if post.community_id is not None:
+        remove_document('post', post.pk)
+    else:
+        index_document('post', post.pk, post_texts(post))
+
+
+def index_community(community):
+    index_document('community', community.pk, community_texts(community))
+
+
+def rebuild_index(kinds=None):
+    """ Reconstrói o índice do zero (comando 'rebuild_search_index'). """
+    kinds = kinds or list(SEARCH_FIELDS)
+    sources = {
+        'user': lambda: (
+            (user.pk, user_texts(user)) for user in User.objects.select_related('profile').iterator()
+        ),
+        'post': lambda: (
+            (post.pk, post_texts(post)) for post in Posts.objects.filter(community__isnull=True).iterator()
+        ),
+        'community': lambda: (
+            (community.pk, community_texts(community)) for community in Community.objects.iterator()
+        ),
+    }
+
+    total = 0
+    for kind in kinds:
+        with transaction.atomic():
+            SearchTerm.objects.filter(kind=kind).delete()
+            batch = []
+            for object_id, texts in sources[kind]():
+                batch.extend(
+                    SearchTerm(kind=kind, object_id=object_id, field=field, term=term, weight=weight)
+                    for field, term, weight in document_terms(kind, texts)
+                )
+                total += 1
+                if len(batch) >= 1000:
+                    SearchTerm.objects.bulk_create(batch)
+                    batch = []
+            SearchTerm.objects.bulk_create(batch)
+    return total
+
+
+# ------------------------------------------------------------------------------
+# Consulta
+# ------------------------------------------------------------------------------
+
+def token_filter(token, exact=False):
+    """
+    Casa o termo exato ou, para typeahead, todos os termos que começam com
+    'token'. O prefixo vira um intervalo [token, token + '{'), que o SQLite
+    resolve com um range scan no índice (kind, term) — ao contrário de
+    LIKE 'token%'. Funciona porque os termos só têm [0-9a-z] e '{' vem
+    logo depois de 'z'.
+    """
+    if exact or len(token) < MIN_PREFIX_LENGTH:
+        return Q(term=token)
+    return Q(term__gte=token, term__lt=token + '{')
+
+
+def search_ids(kind, query, fields=None, exclude_ids=(), limit=20, offset=0):
+    """
+    IDs dos objetos que casam com TODOS os termos da busca, do mais relevante
+    para o menos relevante. A relevância é a soma dos pesos dos campos onde
+    cada termo aparece (em dobro quando o termo casa inteiro).
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    any_token = Q()
+    hits = {}
+    for position, token in enumerate(tokens):
+        condition = token_filter(token)
+        any_token |= condition
+        hits[f'hit_{position}'] = Max(Case(When(condition, then=Value(1)), default=Value(0)))
+
+    rows = SearchTerm.objects.filter(any_token, kind=kind)
+    if fields:
+        rows = rows.filter(field__in=fields)
+    if exclude_ids:
+        rows = rows.exclude(object_id__in=exclude_ids)
+
+    multiplier = Case(
+        When(term__in=tokens, then=Value(EXACT_MATCH_MULTIPLIER)), default=Value(1), output_field=IntegerField()
+    )
+    ranked = (
+        rows.values('object_id')
+        .annotate(score=Sum(F('weight') * multiplier), **hits)
+        .filter(**{name: 1 for name in hits})
+        .order_by('-score', 'object_id')
+        .values_list('object_id', flat=True)
+    )
+    return list(ranked[offset:offset + limit])
+
+
+def in_rank_order(queryset, ids):
+    """ Filtra o queryset pelos IDs, mantendo a ordem do ranking. """
+    if not ids:
+        return queryset.none()
+    order = Case(*[When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)], output_field=IntegerField())
+    return queryset.filter(pk__in=ids).order_by(order)
@@ -1,12 +1,17 @@
 # core/serializers.py
+from datetime import timezone as dt_timezone
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import (
     Posts, Profile, Reaction, Comment, Conversation, Message,
     Tag, Badge, Community, CommunityMembership, Announcement,
     Notification  
 )
+from .queries import latest_comments_queryset
+from .notifications import announcement_read_state, is_announcement_read
 
 # --- SERIALIZER ATUALIZADO: Badge ---
 class BadgeSerializer(serializers.ModelSerializer):
@@ -37,6 +42,12 @@ class TagSerializer(serializers.ModelSerializer):
         fields = ['name']
 
 
+class TrendingTagSerializer(serializers.Serializer):
+    # Linhas agregadas de core.hashtags.trending_tags
+    name = serializers.CharField()
+    count = serializers.IntegerField()
+
+
 class CommunitySmallSerializer(serializers.ModelSerializer):
     class Meta:
         model = Community
@@ -183,7 +194,9 @@ class CommentSerializer(serializers.ModelSerializer):
 class PostSerializer(serializers.ModelSerializer):
     owner = serializers.ReadOnlyField(source='owner.username')
     owner_badges = BadgeSerializer(many=True, read_only=True, source='owner.profile.badges')
-    comments = CommentSerializer(many=True, read_only=True)
+    # Prévia: só os comentários mais recentes (a conversa completa é paginada)
+    comments = serializers.SerializerMethodField(read_only=True)
+    comments_count = serializers.ReadOnlyField(source='comment_count')
     tags = TagSerializer(many=True, read_only=True) 
     reactions_summary = serializers.SerializerMethodField(read_only=True)
     current_user_reaction = serializers.SerializerMethodField(read_only=True)
@@ -193,25 +206,46 @@ class PostSerializer(serializers.ModelSerializer):
         fields = [
             'pk', 'owner', 'owner_badges', 'title', 'content', 'image', 'video', 'attachment',
             'community', 'tags', 'createdAt', 'updatedAt',
-            'comments', 'reactions_summary', 'current_user_reaction'
+            'comments', 'comments_count', 'reactions_summary', 'current_user_reaction'
         ]
 
+    def get_comments(self, obj):
+        latest = getattr(obj, 'latest_comments', None)
+        if latest is None:
+            latest = latest_comments_queryset(post=obj)
+        # Exibidos em ordem cronológica, como na conversa completa
+        comments = sorted(latest, key=lambda comment: (comment.created_at, comment.pk))
+        return CommentSerializer(comments, many=True, context=self.context).data
+
     def get_reactions_summary(self, obj):
-        summary = {}
-        reactions = obj.reactions.all()
-        for reaction in reactions:
-            summary[reaction.emoji] = summary.get(reaction.emoji, 0) + 1
-        return summary
+        # Lê os contadores desnormalizados (prefetch em post_feed_queryset)
+        return {counter.emoji: counter.count for counter in obj.reaction_counts.all() if counter.count > 0}
 
     def get_current_user_reaction(self, obj):
         request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            try:
-                reaction = obj.reactions.get(user=request.user)
-                return ReactionSerializer(reaction).data
-            except Reaction.DoesNotExist:
+        if not request or not request.user.is_authenticated:
+            return None
+
+        # Veio anotado por post_feed_queryset: nenhuma query extra
+        if hasattr(obj, 'current_user_reaction_data'):
+            data = obj.current_user_reaction_data
+            if not data:
                 return None
-        return None
+            created_at = parse_datetime(data['created_at'])
+            if timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at, dt_timezone.utc)
+            return {
+                'id': data['id'],
+                'user': request.user.username,
+                'emoji': data['emoji'],
+                'created_at': serializers.DateTimeField().to_representation(created_at),
+            }
+
+        try:
+            reaction = obj.reactions.get(user=request.user)
+            return ReactionSerializer(reaction).data
+        except Reaction.DoesNotExist:
+            return None
 
 # --- SERIALIZERS DE COMUNIDADE E ANÚNCIOS ---
 
@@ -230,49 +264,63 @@ class CommunitySerializer(serializers.ModelSerializer):
             'membership_status', 'membership_id' # --- Adicionados ao fields
         ]
 
-    def get_membership_status(self, obj):
-        """ Retorna o status do usuário logado: admin, member, pending, ou none """
+    def get_user_membership(self, obj):
+        """
+        Inscrição do usuário logado nesta comunidade (ou None).
+        As views de lista/detalhe carregam todas de uma vez em
+        context['memberships']; sem isso, busca só a desta comunidade.
+        """
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
+            return None
+
+        memberships = self.context.get('memberships')
+        if memberships is not None:
+            return memberships.get(obj.id)
+
+        return CommunityMembership.objects.filter(community=obj, user=request.user).first()
+
+    def get_membership_status(self, obj):
+        """ Retorna o status do usuário logado: admin, member, pending, ou none """
+        membership = self.get_user_membership(obj)
+        if membership is None:
             return "none"
-        
-        try:
-            # Busca a inscrição do usuário nesta comunidade
-            membership = CommunityMembership.objects.get(community=obj, user=request.user)
-            
-            # O Dono original (admin) ou um membro promovido (is_admin)
-            if obj.admin == request.user or membership.is_admin:
-                return "admin"
-            if membership.status == 'approved':
-                return "member"
-            if membership.status == 'pending':
-                return "pending"
-                
-        except CommunityMembership.DoesNotExist:
-            return "none"
-        
+
+        # O Dono original (admin) ou um membro promovido (is_admin)
+        if obj.admin_id == membership.user_id or membership.is_admin:
+            return "admin"
+        if membership.status == 'approved':
+            return "member"
+        if membership.status == 'pending':
+            return "pending"
+
         return "none"
 
     def get_membership_id(self, obj):
         """ Retorna o ID do membership do usuário (para Sair/Deletar) """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return None
-        
-        try:
-            membership = CommunityMembership.objects.get(community=obj, user=request.user)
-            return membership.id
-        except CommunityMembership.DoesNotExist:
-            return None
+        membership = self.get_user_membership(obj)
+        return membership.id if membership else None
 
 
 
 class AnnouncementSerializer(serializers.ModelSerializer):
     author = serializers.ReadOnlyField(source='author.username')
+    # Só se o usuário logado já leu (a lista de leitores não é exposta)
+    is_read = serializers.SerializerMethodField()
     
     class Meta:
         model = Announcement
-        fields = ['id', 'author', 'content', 'timestamp', 'target_course', 'target_university', 'read_by']
+        fields = ['id', 'author', 'content', 'timestamp', 'target_course', 'target_university', 'is_read']
+
+    def get_is_read(self, obj):
+        read_state = self.context.get('announcement_read_state')
+        if read_state is None:
+            request = self.context.get('request')
+            if not request or not request.user.is_authenticated:
+                return False
+            read_state = announcement_read_state(request.user)
+            self.context['announcement_read_state'] = read_state
+        return is_announcement_read(obj, read_state)
 
 # --- SERIALIZERS DO CHAT ---
 
@@ -286,21 +334,30 @@ class MessageSerializer(serializers.ModelSerializer):
 
 
 class ConversationSerializer(serializers.ModelSerializer):
+    """
+    Lê só o estado desnormalizado da conversa (core.chat): a última mensagem
+    vem por select_related e o estado de leitura por anotação (inbox_queryset).
+    """
     participant_usernames = serializers.SerializerMethodField()
-    last_message = serializers.SerializerMethodField()
+    last_message = MessageSerializer(read_only=True)
+    unread_count = serializers.SerializerMethodField()
+    last_read_message = serializers.SerializerMethodField()
 
     class Meta:
         model = Conversation
-        fields = ['id', 'participant_usernames', 'last_message', 'updated_at']
+        fields = [
+            'id', 'participant_usernames', 'last_message', 'last_message_preview', 'last_message_at',
+            'unread_count', 'last_read_message', 'updated_at',
+        ]
 
     def get_participant_usernames(self, obj):
         return [user.username for user in obj.participants.all()]
 
-    def get_last_message(self, obj):
-        last_msg = obj.messages.all().last()
-        if last_msg:
-            return MessageSerializer(last_msg).data
-        return None
+    def get_unread_count(self, obj):
+        return getattr(obj, 'unread_count', 0)
+
+    def get_last_read_message(self, obj):
+        return getattr(obj, 'last_read_message_id', None)
 
 # --- SERIALIZERS DA BUSCA ---
 
@@ -337,5 +394,6 @@ class NotificationSerializer(serializers.ModelSerializer):
             'community_id', 
             'community_name',
             'read',         
-            'timestamp'
+            'timestamp',
+            'actor_count',
         ]
\ No newline at end of file
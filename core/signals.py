@@ -1,8 +1,19 @@
 # core/signals.py
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Profile, Comment, CommunityMembership, Notification
+from .models import (
+    Profile, Posts, Comment, Reaction, Tag, Badge,
+    Community, CommunityMembership, Notification, Announcement, UnreadCounter
+)
+from .counters import change_comment_count, change_reaction_count
+from .timeline import fanout_post, backfill_timeline, refresh_celebrity_status, remove_from_timeline
+from .cache import bump_generation
+from .search import index_profile, index_post, index_community, remove_document
+from .hashtags import sync_post_tags, remove_post_tags
+from .notifications import change_unread_counts, count_new_announcement, discount_announcement
+from .dispatcher import dispatch_notification
 
 # ==============================================================================
 # SINAIS DE CRIAÇÃO DE PERFIL (Existentes)
@@ -23,28 +34,203 @@ def save_profile(sender, instance, **kwargs):
     """
     instance.profile.save()
 
+# ==============================================================================
+# SINAIS DA TIMELINE (Feed "Seguindo")
+# ==============================================================================
+
+@receiver(post_save, sender=Posts)
+def fanout_new_post(sender, instance, created, **kwargs):
+    """
+    Copia o post novo para a timeline dos seguidores do autor.
+    """
+    if created:
+        fanout_post(instance)
+
+@receiver(m2m_changed, sender=Profile.following.through)
+def sync_timeline_on_follow(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Mantém a timeline em dia quando alguém segue ou deixa de seguir.
+
+    Sem 'reverse', 'instance' é quem segue e 'pk_set' quem é seguido
+    (profile.following.add); com 'reverse' os papéis se invertem
+    (profile.followers.add).
+    """
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+
+    if action == 'pre_clear':
+        if not reverse:
+            # Quem perde um seguidor pode cair abaixo do limite de fan-out (post_clear)
+            instance.cleared_followed_user_ids = list(instance.following.values_list('user_id', flat=True))
+            remove_from_timeline(instance.user_id)
+        else:
+            instance.cleared_followed_user_ids = [instance.user_id]
+            follower_ids = instance.followers.values_list('user_id', flat=True)
+            for follower_id in follower_ids:
+                remove_from_timeline(follower_id, [instance.user_id])
+        return
+    if action == 'post_clear':
+        refresh_celebrity_status(getattr(instance, 'cleared_followed_user_ids', []))
+        return
+
+    other_user_ids = list(Profile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+    if not reverse:
+        pairs = [(instance.user_id, other_user_ids)]
+        refresh_celebrity_status(other_user_ids)
+    else:
+        pairs = [(follower_id, [instance.user_id]) for follower_id in other_user_ids]
+        refresh_celebrity_status([instance.user_id])
+
+    for follower_id, followed_ids in pairs:
+        if action == 'post_add':
+            backfill_timeline(follower_id, followed_ids)
+        else:
+            remove_from_timeline(follower_id, followed_ids)
+
+@receiver(pre_delete, sender=Profile)
+def remember_followed_on_delete(sender, instance, **kwargs):
+    # O DELETE em cascata das ligações não dispara m2m_changed
+    instance.deleted_followed_user_ids = list(instance.following.values_list('user_id', flat=True))
+
+@receiver(post_delete, sender=Profile)
+def refresh_celebrities_on_delete(sender, instance, **kwargs):
+    refresh_celebrity_status(getattr(instance, 'deleted_followed_user_ids', []))
+
+# ==============================================================================
+# SINAIS DE HASHTAGS (core.hashtags)
+# ==============================================================================
+
+@receiver(post_save, sender=Posts)
+def extract_post_hashtags(sender, instance, update_fields=None, **kwargs):
+    """
+    Preenche Posts.tags com as #hashtags do conteúdo e atualiza os
+    contadores das tags (total e trending).
+    """
+    if update_fields is None or 'content' in update_fields:
+        sync_post_tags(instance)
+
+@receiver(pre_delete, sender=Posts)
+def discount_post_hashtags(sender, instance, **kwargs):
+    # Antes do DELETE: depois dele as ligações com as tags já não existem
+    remove_post_tags(instance)
+
+# ==============================================================================
+# CONTADORES DOS POSTS (core.counters)
+# ==============================================================================
+
+# Criação e troca de emoji são contadas nas views, na mesma transação. As
+# exclusões passam por aqui porque também acontecem em cascata (excluir um
+# usuário apaga os comentários e reações dele nos posts dos outros).
+
+def deleting_posts(origin):
+    """ A exclusão começou num post (ou queryset de posts)? Então os contadores vão junto. """
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Posts
+
+@receiver(post_delete, sender=Comment)
+def discount_deleted_comment(sender, instance, origin=None, **kwargs):
+    if not deleting_posts(origin):
+        change_comment_count(instance.post_id, -1)
+
+@receiver(post_delete, sender=Reaction)
+def discount_deleted_reaction(sender, instance, origin=None, **kwargs):
+    if not deleting_posts(origin):
+        change_reaction_count(instance.post_id, instance.emoji, -1)
+
+# ==============================================================================
+# SINAIS DE INVALIDAÇÃO DE CACHE (core.cache)
+# ==============================================================================
+
+# Qual namespace de cache cada modelo afeta quando muda
+CACHE_NAMESPACES_BY_SENDER = {
+    Posts: ('posts',),
+    Comment: ('posts',),
+    Reaction: ('posts',),
+    Tag: ('posts',),
+    Posts.tags.through: ('posts',),
+    Badge: ('posts', 'users', 'permissions'),
+    User: ('posts', 'users'),
+    Profile: ('posts', 'users'),
+    Profile.badges.through: ('posts', 'users', 'permissions'),
+    Profile.following.through: ('users',),
+    Profile.saved_posts.through: ('users',),
+    Community: ('communities',),
+    CommunityMembership: ('communities',),
+}
+
+def invalidate_cache_on_save(sender, update_fields=None, **kwargs):
+    """
+    Invalida as respostas cacheadas que dependem do modelo salvo/excluído.
+    """
+    # Login só atualiza 'last_login', que não aparece em nenhuma resposta
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    bump_generation(*CACHE_NAMESPACES_BY_SENDER[sender])
+
+def invalidate_cache_on_m2m(sender, instance, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_generation(*CACHE_NAMESPACES_BY_SENDER[sender])
+        # A instância em memória também pode ter as permissões calculadas
+        if isinstance(instance, Profile):
+            instance.__dict__.pop('permission_set', None)
+
+for cached_sender in CACHE_NAMESPACES_BY_SENDER:
+    if cached_sender._meta.auto_created:
+        m2m_changed.connect(invalidate_cache_on_m2m, sender=cached_sender)
+    else:
+        post_save.connect(invalidate_cache_on_save, sender=cached_sender)
+        post_delete.connect(invalidate_cache_on_save, sender=cached_sender)
+
+# ==============================================================================
+# SINAIS DO ÍNDICE DE BUSCA (core.search)
+# ==============================================================================
+
+# Mudanças no User também passam por aqui: save_profile salva o Profile
+@receiver(post_save, sender=Profile)
+def index_profile_on_save(sender, instance, **kwargs):
+    index_profile(instance)
+
+@receiver(post_delete, sender=Profile)
+def remove_profile_from_index(sender, instance, **kwargs):
+    remove_document('user', instance.user_id)
+
+@receiver(post_save, sender=Posts)
+def index_post_on_save(sender, instance, **kwargs):
+    index_post(instance)
+
+@receiver(post_delete, sender=Posts)
+def remove_post_from_index(sender, instance, **kwargs):
+    remove_document('post', instance.pk)
+
+@receiver(post_save, sender=Community)
+def index_community_on_save(sender, instance, **kwargs):
+    index_community(instance)
+
+@receiver(post_delete, sender=Community)
+def remove_community_from_index(sender, instance, **kwargs):
+    remove_document('community', instance.pk)
+
 # ==============================================================================
 # SINAIS DE NOTIFICAÇÃO (Novos)
 # ==============================================================================
 
+# As notificações vão para a fila do core.dispatcher, que as grava em lote
+# numa thread, fora da requisição.
+
 @receiver(post_save, sender=Comment)
 def create_comment_notification(sender, instance, created, **kwargs):
     """
     Cria uma notificação quando um novo comentário é feito em um post.
     """
     if created:
-        recipient = instance.post.owner # O dono do post
-        sender = instance.user          # O autor do comentário
-        
-        # Não envie notificação se você comentar no seu próprio post
-        if recipient != sender:
-            Notification.objects.create(
-                recipient=recipient,
-                sender=sender,
-                verb='comentou',
-                post=instance.post,
-                comment=instance
-            )
+        # O dispatcher descarta notificações para si mesmo
+        dispatch_notification(
+            recipient_id=instance.post.owner_id, # O dono do post
+            sender_id=instance.user_id,          # O autor do comentário
+            verb='comentou',
+            post_id=instance.post_id,
+            comment_id=instance.pk,
+        )
 
 @receiver(post_save, sender=CommunityMembership)
 def create_membership_approval_notification(sender, instance, created, **kwargs):
@@ -59,16 +245,13 @@ def create_membership_approval_notification(sender, instance, created, **kwargs)
         # Se 'status' foi um dos campos atualizados, criamos a notificação.
         update_fields = kwargs.get('update_fields') or set()
         if 'status' in update_fields:
-            recipient = instance.user                # O usuário que foi aprovado
-            sender = instance.community.admin      # O admin que aprovou
-            
-            if recipient != sender:
-                Notification.objects.get_or_create(
-                    recipient=recipient,
-                    sender=sender,
-                    verb='membership_approved',
-                    community=instance.community
-                )
+            dispatch_notification(
+                recipient_id=instance.user_id,              # O usuário que foi aprovado
+                sender_id=instance.community.admin_id,      # O admin que aprovou
+                verb='membership_approved',
+                community_id=instance.community_id,
+                unique=True,
+            )
 
 @receiver(m2m_changed, sender=Profile.following.through)
 def create_follow_notification(sender, instance, action, pk_set, **kwargs):
@@ -80,21 +263,51 @@ def create_follow_notification(sender, instance, action, pk_set, **kwargs):
     """
     # 'post_add' significa que uma nova relação foi adicionada
     if action == 'post_add':
-        sender_user = instance.user # O usuário que está seguindo
-        
-        # 'pk_set' pode ter múltiplos IDs, então iteramos sobre ele
-        for pk in pk_set:
-            recipient_profile = Profile.objects.get(pk=pk)
-            recipient_user = recipient_profile.user # O usuário que FOI seguido
-            
-            if recipient_user != sender_user:
-                Notification.objects.get_or_create(
-                    recipient=recipient_user,
-                    sender=sender_user,
-                    verb='follow'
-                )
-
-# NOTA: O sinal para 'reaction' (curtida) é muito "barulhento" e
-# pode sobrecarregar o sistema. É comum implementar reações
-# sem notificações, ou agrupá-las (ex: "Fulano e outros 3 reagiram...").
-# Por isso, deixei de fora por enquanto para manter a performance.
\ No newline at end of file
+        # Uma única query para todos os perfis seguidos
+        recipient_ids = Profile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True)
+        for recipient_id in recipient_ids:
+            dispatch_notification(recipient_id=recipient_id, sender_id=instance.user_id, verb='follow', unique=True)
+
+@receiver(post_save, sender=Reaction)
+def create_reaction_notification(sender, instance, created, **kwargs):
+    """
+    Reações são agregadas: uma notificação não lida por post
+    ("Fulano e outros 3 reagiram"), atualizada a cada nova reação.
+    """
+    if created:
+        dispatch_notification(
+            recipient_id=instance.post.owner_id,
+            sender_id=instance.user_id,
+            verb='reaction',
+            post_id=instance.post_id,
+            aggregate=True,
+        )
+
+# ==============================================================================
+# CONTADORES DE NÃO LIDOS (UnreadCounter + push pelo NotificationConsumer)
+# ==============================================================================
+
+@receiver(post_save, sender=User)
+def create_unread_counter(sender, instance, created, **kwargs):
+    if created:
+        UnreadCounter.objects.create(user=instance)
+
+@receiver(post_save, sender=Notification)
+def count_new_notification(sender, instance, created, **kwargs):
+    if created and not instance.read:
+        change_unread_counts(instance.recipient_id, social=1)
+
+@receiver(post_delete, sender=Notification)
+def discount_deleted_notification(sender, instance, **kwargs):
+    if not instance.read:
+        change_unread_counts(instance.recipient_id, social=-1)
+
+@receiver(post_save, sender=Announcement)
+def count_new_announcement_on_save(sender, instance, created, **kwargs):
+    if created:
+        count_new_announcement(instance)
+
+@receiver(pre_delete, sender=Announcement)
+def discount_deleted_announcement(sender, instance, **kwargs):
+    # Antes do DELETE: as exceções de leitura ainda dizem quem já tinha lido
+    discount_announcement(instance)
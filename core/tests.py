@@ -1,3 +1,1115 @@
-from django.test import TestCase
+import asyncio
+import base64
+import queue
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.query import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .consumers import ChatConsumer
+from .counters import rebuild_post_counters
+from .timeline import oversized_timeline_user_ids
+from .layers import LocalChannelLayer
+from .pagination import CommentCursorPagination
+from .middleware import get_user, token_user_cache
+from .persister import write_and_serialize
+from .chat import (
+    PRESENCE_KEY, create_message, get_or_create_direct_conversation, is_participant, online_user_ids, write_messages,
+)
+from .dispatcher import NotificationDispatcher, write_notifications
+from .audience import profile_audience_keys
+from .notifications import audience_group_name, compact_notifications, reconcile_unread_counter, user_group_name
+from .models import Announcement, AnnouncementReadException, AnnouncementReadState, Badge, Comment, Community, CommunityMembership, Conversation, ConversationParticipant, Message, Notification, Posts, PostReactionCount, Reaction, Tag, TimelineEntry, UnreadCounter
+
+
+class PostFeedQueryCountTests(TestCase):
+    """
+    O número de queries para renderizar uma página do feed não pode
+    depender da quantidade de posts (nem de comentários/reações).
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.viewer = User.objects.create_user('viewer')
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        self.badge = Badge.objects.create(name='Professor')
+        self.tag = Tag.objects.create(name='calculo')
+
+    def create_posts(self, count):
+        for i in range(count):
+            author = User.objects.create_user(f'autor{Posts.objects.count()}')
+            author.profile.badges.add(self.badge)
+            post = Posts.objects.create(owner=author, title=f'Post {i}', content='...')
+            post.tags.add(self.tag)
+            Comment.objects.create(post=post, user=self.viewer, content='Boa!')
+            Comment.objects.create(post=post, user=author, content='Valeu')
+            Reaction.objects.create(post=post, user=self.viewer, emoji='👍')
+            Reaction.objects.create(post=post, user=author, emoji='❤️')
+        rebuild_post_counters()
+
+    def count_feed_queries(self, url='/api/posts/'):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_query_count_is_constant(self):
+        self.create_posts(2)
+        small_page_queries, _ = self.count_feed_queries()
+
+        self.create_posts(10)
+        large_page_queries, response = self.count_feed_queries()
+
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertEqual(small_page_queries, large_page_queries)
+
+    def test_feed_payload(self):
+        self.create_posts(1)
+        _, response = self.count_feed_queries()
+        post = response.data['results'][0]
+
+        self.assertEqual(post['reactions_summary'], {'👍': 1, '❤️': 1})
+        self.assertEqual(post['current_user_reaction']['emoji'], '👍')
+        self.assertEqual(post['current_user_reaction']['user'], 'viewer')
+        self.assertEqual(post['owner_badges'][0]['name'], 'Professor')
+        self.assertEqual(len(post['comments']), 2)
+        self.assertEqual(post['comments_count'], 2)
+
+    @override_settings(POST_COMMENT_PREVIEW_SIZE=3)
+    def test_feed_embeds_only_latest_comments(self):
+        self.create_posts(1)
+        post = Posts.objects.get()
+        for i in range(5):
+            Comment.objects.create(post=post, user=self.viewer, content=f'Extra {i}')
+        rebuild_post_counters()
+
+        _, response = self.count_feed_queries()
+        data = response.data['results'][0]
+
+        self.assertEqual(data['comments_count'], 7)
+        self.assertEqual([c['content'] for c in data['comments']], ['Extra 2', 'Extra 3', 'Extra 4'])
+
+    def test_create_post_returns_preview(self):
+        response = self.client.post('/api/posts/', {'title': 'Novo', 'content': 'Primeiro post'})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['comments'], [])
+        self.assertEqual(response.data['comments_count'], 0)
+
+
+class KeysetCursorPaginationTests(TestCase):
+    """ Paginação por cursor, pela conversa de um post (ordem: created_at, pk). """
+
+    def setUp(self):
+        self.user = User.objects.create_user('leitor')
+        self.post = Posts.objects.create(owner=self.user, title='Post', content='...')
+        self.client = APIClient()
+        self.url = f'/api/posts/{self.post.pk}/comments/'
+
+    def create_comments(self, count):
+        comments = Comment.objects.bulk_create([
+            Comment(post=self.post, user=self.user, content=str(i)) for i in range(count)
+        ])
+        # Todos com o mesmo horário: a ordem vem só do desempate por pk
+        Comment.objects.update(created_at=timezone.now())
+        return comments
+
+    def contents(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [comment['content'] for comment in response.data['results']]
+
+    def test_next_and_previous_round_trip(self):
+        self.create_comments(5)
+
+        first = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(self.contents(first), ['0', '1'])
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        self.assertEqual(self.contents(second), ['2', '3'])
+        third = self.client.get(second.data['next'])
+        self.assertEqual(self.contents(third), ['4'])
+        self.assertIsNone(third.data['next'])
+
+        back = self.client.get(third.data['previous'])
+        self.assertEqual(self.contents(back), ['2', '3'])
+        start = self.client.get(back.data['previous'])
+        self.assertEqual(self.contents(start), ['0', '1'])
+        self.assertIsNone(start.data['previous'])
+
+    def test_ties_do_not_skip_or_repeat(self):
+        self.create_comments(7)
+        seen, url, params = [], self.url, {'page_size': 3}
+        while url:
+            response = self.client.get(url, params)
+            seen.extend(self.contents(response))
+            url, params = response.data['next'], None
+        self.assertEqual(seen, [str(i) for i in range(7)])
+
+    def test_malformed_cursor_is_not_found(self):
+        self.create_comments(1)
+        bad_position = base64.urlsafe_b64encode(b'{"v":["ontem","x"],"r":0}').decode()
+        wrong_shape = base64.urlsafe_b64encode(b'{"v":[1]}').decode()
+        for cursor in ('@@@', 'bm90LWpzb24=', wrong_shape, bad_position):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_query_errors_are_not_reported_as_bad_cursor(self):
+        # Só o cursor vira 404; erros ao executar a consulta precisam aparecer
+        request = Request(APIRequestFactory().get(self.url))
+        with mock.patch.object(QuerySet, '_fetch_all', side_effect=ValueError('boom')):
+            with self.assertRaisesMessage(ValueError, 'boom'):
+                CommentCursorPagination().paginate_queryset(Comment.objects.all(), request)
+
+    def test_page_size_is_capped(self):
+        self.create_comments(CommentCursorPagination.max_page_size + 5)
+        response = self.client.get(self.url, {'page_size': 1000})
+        self.assertEqual(len(self.contents(response)), CommentCursorPagination.max_page_size)
+        self.assertIsNotNone(response.data['next'])
+
+
+class PostCounterTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('leitor')
+        self.post = Posts.objects.create(owner=self.user, title='Post', content='...')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def summary(self):
+        return dict(self.post.reaction_counts.filter(count__gt=0).values_list('emoji', 'count'))
+
+    def test_reaction_toggle_updates_counters(self):
+        url = f'/api/posts/{self.post.pk}/react/'
+
+        self.client.post(url, {'emoji': '👍'})
+        self.assertEqual(self.summary(), {'👍': 1})
+
+        self.client.post(url, {'emoji': '❤️'})
+        self.assertEqual(self.summary(), {'❤️': 1})
+
+        self.client.post(url, {'emoji': '❤️'})
+        self.assertEqual(self.summary(), {})
+
+    def test_comment_creation_updates_counter(self):
+        self.client.post(f'/api/posts/{self.post.pk}/comments/', {'content': 'Oi'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_cascade_deletes_discount_counters(self):
+        visitor = User.objects.create_user('visitante')
+        client = APIClient()
+        client.force_authenticate(visitor)
+        client.post(f'/api/posts/{self.post.pk}/comments/', {'content': 'Oi'})
+        client.post(f'/api/posts/{self.post.pk}/react/', {'emoji': '👍'})
+        self.client.post(f'/api/posts/{self.post.pk}/react/', {'emoji': '👍'})
+
+        # O visitante apaga a conta: o comentário e a reação dele caem em cascata
+        self.assertEqual(client.delete('/api/profile/delete/').status_code, 204)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertEqual(self.summary(), {'👍': 1})
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.post.delete()
+        self.assertFalse(any('UPDATE "core_postreactioncount"' in query['sql'] for query in ctx.captured_queries))
+
+    def test_rebuild_repairs_drift(self):
+        Reaction.objects.create(post=self.post, user=self.user, emoji='😂')
+        Comment.objects.create(post=self.post, user=self.user, content='Oi')
+        PostReactionCount.objects.create(post=self.post, emoji='👍', count=7)
+
+        rebuild_post_counters()
+
+        self.post.refresh_from_db()
+        self.assertEqual(self.summary(), {'😂': 1})
+        self.assertEqual(self.post.comment_count, 1)
+
+
+class FollowingTimelineTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.reader = User.objects.create_user('leitor')
+        self.author = User.objects.create_user('autor')
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+
+    def feed_titles(self):
+        response = self.client.get('/api/feed/following/')
+        return [post['title'] for post in response.data['results']]
+
+    def test_follow_backfills_and_new_posts_fan_out(self):
+        Posts.objects.create(owner=self.author, title='Antigo', content='...')
+        self.client.post('/api/users/autor/follow/')
+        Posts.objects.create(owner=self.author, title='Novo', content='...')
+
+        self.assertEqual(self.feed_titles(), ['Novo', 'Antigo'])
+
+        self.client.delete('/api/users/autor/follow/')
+        self.assertEqual(self.feed_titles(), [])
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader).exists())
+
+    def test_community_posts_stay_out_of_the_following_feed(self):
+        community = Community.objects.create(admin=self.author, name='Cálculo I')
+        # Um antes de seguir (backfill) e um depois (fan-out)
+        Posts.objects.create(owner=self.author, title='Na comunidade', content='...', community=community)
+        self.client.post('/api/users/autor/follow/')
+        Posts.objects.create(owner=self.author, title='Também na comunidade', content='...', community=community)
+        Posts.objects.create(owner=self.author, title='No perfil', content='...')
+
+        self.assertEqual(self.feed_titles(), ['No perfil'])
+
+    @override_settings(TIMELINE_MAX_ENTRIES=2)
+    def test_trim_command_trims_only_oversized_timelines(self):
+        self.client.post('/api/users/autor/follow/')
+        other = User.objects.create_user('outro')
+        other.profile.following.add(self.author.profile)
+        for i in range(4):
+            Posts.objects.create(owner=self.author, title=f'Post {i}', content='...')
+        quiet = User.objects.create_user('quieto')
+        TimelineEntry.objects.create(user=quiet, post=Posts.objects.first(), created_at=timezone.now())
+
+        # O fan-out não apara; o comando apara só quem passou do limite
+        self.assertEqual(TimelineEntry.objects.filter(user=other).count(), 4)
+        self.assertEqual(sorted(oversized_timeline_user_ids()), sorted([self.reader.pk, other.pk]))
+        call_command('rebuild_timelines', '--trim-only', stdout=StringIO())
+
+        self.assertEqual(self.feed_titles(), ['Post 3', 'Post 2'])
+        self.assertEqual(TimelineEntry.objects.filter(user=other).count(), 2)
+        self.assertEqual(TimelineEntry.objects.filter(user=quiet).count(), 1)
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=1)
+    def test_crossing_the_fanout_threshold_keeps_posts_in_feeds(self):
+        self.client.post('/api/users/autor/follow/')
+        fan = User.objects.create_user('fa')
+        fan.profile.following.add(self.author.profile)
+        # Dois seguidores: passou do limite, os posts passam a ser lidos na hora
+        Posts.objects.create(owner=self.author, title='Famoso', content='...')
+        self.assertFalse(TimelineEntry.objects.filter(post__title='Famoso').exists())
+        self.assertEqual(self.feed_titles(), ['Famoso'])
+
+        # Voltou para baixo do limite: o post da fase "celebridade" entra na timeline
+        fan.profile.following.remove(self.author.profile)
+        Posts.objects.create(owner=self.author, title='Comum', content='...')
+        self.assertEqual(self.feed_titles(), ['Comum', 'Famoso'])
+        self.assertEqual(TimelineEntry.objects.filter(user=self.reader).count(), 2)
+
+    @override_settings(TIMELINE_FANOUT_THRESHOLD=0)
+    def test_celebrity_posts_are_read_on_demand(self):
+        self.client.post('/api/users/autor/follow/')
+        cache.clear()
+        Posts.objects.create(owner=self.author, title='Post famoso', content='...')
+
+        self.assertFalse(TimelineEntry.objects.exists())
+        self.assertEqual(self.feed_titles(), ['Post famoso'])
+
+
+class ResponseCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('autor')
+        self.client = APIClient()
+
+    def test_post_list_is_cached_until_a_post_changes(self):
+        Posts.objects.create(owner=self.author, title='Primeiro', content='...')
+        self.client.get('/api/posts/')
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/posts/')
+        self.assertEqual(len(response.data['results']), 1)
+
+        Posts.objects.create(owner=self.author, title='Segundo', content='...')
+        response = self.client.get('/api/posts/')
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_cache_key_varies_per_user(self):
+        post = Posts.objects.create(owner=self.author, title='Post', content='...')
+        Reaction.objects.create(post=post, user=self.author, emoji='👍')
+
+        anonymous = self.client.get('/api/posts/').data['results'][0]
+        self.client.force_authenticate(self.author)
+        authenticated = self.client.get('/api/posts/').data['results'][0]
+
+        self.assertIsNone(anonymous['current_user_reaction'])
+        self.assertEqual(authenticated['current_user_reaction']['emoji'], '👍')
+
+
+class PermissionCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('professor')
+        self.badge = Badge.objects.create(name='Professor', permissions={'can_send_announcement': True})
+        self.user.profile.badges.add(self.badge)
+
+    def fresh_profile(self):
+        return User.objects.select_related('profile').get(pk=self.user.pk).profile
+
+    def test_permissions_are_loaded_once(self):
+        profile = self.fresh_profile()
+        with self.assertNumQueries(1):
+            self.assertTrue(profile.has_permission('can_send_announcement'))
+            self.assertFalse(profile.has_permission('can_moderate_global_posts'))
+
+        # Outra request (nova instância) reaproveita o cache do Django
+        profile = self.fresh_profile()
+        with self.assertNumQueries(0):
+            self.assertTrue(profile.has_permission('can_send_announcement'))
+
+    def test_badge_changes_invalidate_cache(self):
+        self.assertFalse(self.fresh_profile().has_permission('can_moderate_global_posts'))
+
+        self.badge.permissions['can_moderate_global_posts'] = True
+        self.badge.save()
+        self.assertTrue(self.fresh_profile().has_permission('can_moderate_global_posts'))
+
+        self.user.profile.badges.remove(self.badge)
+        self.assertFalse(self.fresh_profile().has_permission('can_send_announcement'))
+
+
+class CommunityListQueryCountTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('aluno')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_communities(self, count):
+        for i in range(count):
+            owner = User.objects.create_user(f'dono{Community.objects.count()}')
+            community = Community.objects.create(admin=owner, name=f'Comunidade {Community.objects.count()}')
+            CommunityMembership.objects.create(user=self.user, community=community, status='approved')
+
+    def count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/communities/')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_query_count_is_constant(self):
+        self.create_communities(2)
+        small_queries, _ = self.count_list_queries()
+
+        self.create_communities(10)
+        large_queries, response = self.count_list_queries()
+
+        self.assertEqual(len(response.data['results']), 12)
+        self.assertEqual(small_queries, large_queries)
+        self.assertEqual({c['membership_status'] for c in response.data['results']}, {'member'})
+
+
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('buscador')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def search_usernames(self, query):
+        response = self.client.get('/api/users/search/', {'q': query})
+        return [user['username'] for user in response.data]
+
+    def test_prefix_search_is_ranked_and_accent_insensitive(self):
+        ana = User.objects.create_user('ana_souza', first_name='Ana')
+        User.objects.create_user('mariana', first_name='Mariana')
+        joao = User.objects.create_user('joao', first_name='João')
+        joao.profile.curso = 'Ciência da Computação'
+        joao.profile.save()
+
+        self.assertEqual(self.search_usernames('ana'), ['ana_souza'])
+        self.assertEqual(self.search_usernames('jo'), ['joao'])
+        self.assertEqual(self.search_usernames('joao compu'), ['joao'])
+        self.assertEqual(self.search_usernames('buscador'), [])
+
+        ana.username = 'ana_lima'
+        ana.save()
+        self.assertEqual(self.search_usernames('souza'), [])
+        self.assertEqual(self.search_usernames('lima'), ['ana_lima'])
+
+    def test_global_search_skips_community_posts(self):
+        community = Community.objects.create(admin=self.user, name='Cálculo I', related_course='Engenharia')
+        Posts.objects.create(owner=self.user, title='Lista de cálculo', content='...')
+        Posts.objects.create(owner=self.user, title='Cálculo privado', content='...', community=community)
+
+        response = self.client.get('/api/search/', {'q': 'calc'})
+        self.assertEqual([post['title'] for post in response.data['posts']], ['Lista de cálculo'])
+        self.assertEqual([c['name'] for c in response.data['communities']], ['Cálculo I'])
+
+        response = self.client.get('/api/communities/find-by-course/', {'course': 'engenharia'})
+        self.assertEqual([c['name'] for c in response.data], ['Cálculo I'])
+
+
+class HashtagTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('autor')
+        self.client = APIClient()
+
+    def test_hashtags_are_extracted_and_counted(self):
+        post = Posts.objects.create(owner=self.user, title='Prova', content='Estudando #Cálculo e #calculo #TCC')
+        Posts.objects.create(owner=self.user, title='Outra', content='#tcc amanhã')
+
+        self.assertEqual(sorted(post.tags.values_list('name', flat=True)), ['calculo', 'tcc'])
+        self.assertEqual(Tag.objects.get(name='tcc').post_count, 2)
+
+        response = self.client.get('/api/tags/trending/')
+        self.assertEqual(response.data, [{'name': 'tcc', 'count': 2}, {'name': 'calculo', 'count': 1}])
+
+        response = self.client.get('/api/posts/tags/TCC/')
+        self.assertEqual(len(response.data['results']), 2)
+
+        post.content = 'Só #tcc agora'
+        post.save()
+        post.delete()
+        self.assertEqual(Tag.objects.get(name='calculo').post_count, 0)
+        self.assertEqual(Tag.objects.get(name='tcc').post_count, 1)
+
+
+@override_settings(
+    CHANNEL_LAYERS={'default': {'BACKEND': 'core.layers.LocalChannelLayer'}},
+    NOTIFICATION_DISPATCHER={'ASYNC': False},
+)
+class NotificationPushTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('aluno')
+        self.other = User.objects.create_user('colega')
+        profile = self.user.profile
+        profile.universidade = 'UFSC'
+        profile.curso = 'Direito'
+        profile.onboarding_complete = True
+        profile.save()
+
+        self.channel_layer = get_channel_layer()
+        self.channel = async_to_sync(self.channel_layer.new_channel)()
+
+    def listen(self, group):
+        async_to_sync(self.channel_layer.group_add)(group, self.channel)
+
+    def receive(self):
+        return async_to_sync(self.channel_layer.receive)(self.channel)
+
+    def test_new_notification_pushes_delta_to_recipient(self):
+        self.listen(user_group_name(self.user.pk))
+        post = Posts.objects.create(owner=self.user, title='Post', content='...')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=post, user=self.other, content='Oi')
+
+        self.assertEqual(self.receive(), {'type': 'unread.delta', 'social': 1, 'announcements': 0})
+
+    def test_announcement_is_pushed_once_to_its_audience(self):
+        for key in profile_audience_keys(self.user.profile):
+            self.listen(audience_group_name(key))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Announcement.objects.create(author=self.other, content='Prova', target_university='UFSC', target_course='Direito')
+
+        self.assertEqual(self.receive()['announcements'], 1)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/api/notifications/status/')
+        self.assertEqual(response.data, {'unread_announcements_count': 1, 'unread_social_count': 0})
+
+
+@override_settings(NOTIFICATION_DISPATCHER={'ASYNC': False})
+class UnreadCounterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('aluno')
+        self.other = User.objects.create_user('colega')
+        profile = self.user.profile
+        profile.universidade = 'UFSC'
+        profile.onboarding_complete = True
+        profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def status(self):
+        return self.client.get('/api/notifications/status/').data
+
+    def test_counters_follow_creates_and_reads(self):
+        post = Posts.objects.create(owner=self.user, title='Post', content='...')
+        Comment.objects.create(post=post, user=self.other, content='Oi')
+        announcement = Announcement.objects.create(author=self.other, content='Geral')
+        Announcement.objects.create(author=self.other, content='Outra', target_university='UFRGS')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.status(), {'unread_announcements_count': 1, 'unread_social_count': 1})
+
+        self.client.post('/api/notifications/mark-read/')
+        self.client.post('/api/announcements/mark-read/', {'ids': [announcement.pk]}, format='json')
+        self.assertEqual(self.status(), {'unread_announcements_count': 0, 'unread_social_count': 0})
+
+    def test_reconcile_repairs_drift(self):
+        Announcement.objects.create(author=self.other, content='Geral')
+        UnreadCounter.objects.filter(user=self.user).update(unread_announcements=9, unread_social=4)
+
+        call_command('reconcile_unread_counters', stdout=StringIO())
+        self.assertEqual(self.status(), {'unread_announcements_count': 1, 'unread_social_count': 0})
+
+
+class AnnouncementAudienceTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('aluno')
+        self.author = User.objects.create_user('professor')
+        profile = self.user.profile
+        profile.universidade = 'UFSC'
+        profile.curso = 'Direito'
+        profile.onboarding_complete = True
+        profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_list_uses_audience_keys(self):
+        for university, course in [('', ''), ('UFSC', ''), ('UFSC', 'Direito'), ('UFSC', 'Medicina'), ('UFRGS', '')]:
+            Announcement.objects.create(
+                author=self.author, content=f'{university}/{course}',
+                target_university=university, target_course=course,
+            )
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/announcements/')
+        self.assertEqual([a['content'] for a in response.data], ['UFSC/Direito', 'UFSC/', '/'])
+        self.assertNotIn('DISTINCT', ctx.captured_queries[0]['sql'])
+
+    def test_reading_in_order_compacts_to_a_watermark(self):
+        first, second, third = [
+            Announcement.objects.create(author=self.author, content=str(i)) for i in range(3)
+        ]
+
+        self.client.post('/api/announcements/mark-read/', {'ids': [third.pk]}, format='json')
+        self.assertEqual(AnnouncementReadException.objects.filter(user=self.user).count(), 1)
+        response = self.client.get('/api/announcements/')
+        self.assertEqual([a['is_read'] for a in response.data], [True, False, False])
+
+        self.client.post('/api/announcements/mark-read/', {'ids': [first.pk, second.pk]}, format='json')
+        state = AnnouncementReadState.objects.get(user=self.user)
+        self.assertEqual(state.read_until, third.timestamp)
+        self.assertFalse(AnnouncementReadException.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get('/api/notifications/status/').data['unread_announcements_count'], 0)
+
+    def test_mark_read_up_to_only_moves_the_watermark(self):
+        first, second, third = [
+            Announcement.objects.create(author=self.author, content=str(i)) for i in range(3)
+        ]
+        self.client.post('/api/announcements/mark-read/', {'ids': [first.pk]}, format='json')
+
+        response = self.client.post('/api/announcements/mark-read/', {'up_to': second.pk}, format='json')
+
+        self.assertEqual(response.data['marked'], 1)
+        self.assertEqual(AnnouncementReadState.objects.get(user=self.user).read_until, second.timestamp)
+        self.assertFalse(AnnouncementReadException.objects.filter(user=self.user).exists())
+        self.assertEqual(self.client.get('/api/notifications/status/').data['unread_announcements_count'], 1)
+
+    def test_repeated_mark_read_discounts_once(self):
+        first, second, third = [
+            Announcement.objects.create(author=self.author, content=str(i)) for i in range(3)
+        ]
+
+        # Cada requisição repete a anterior: só a primeira tem o que descontar
+        for body in ({'ids': [first.pk]}, {'ids': [first.pk]}, {'up_to': second.pk}, {'up_to': second.pk}):
+            self.client.post('/api/announcements/mark-read/', body, format='json')
+
+        counter = UnreadCounter.objects.get(pk=self.user.pk)
+        self.assertEqual(counter.unread_announcements, 1)
+        self.assertEqual(reconcile_unread_counter(self.user)['unread_announcements'], 1)
+
+
+@override_settings(NOTIFICATION_DISPATCHER={'ASYNC': False})
+class NotificationDispatcherTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user('dono')
+        self.post = Posts.objects.create(owner=self.owner, title='Post', content='...')
+
+    def test_reactions_are_aggregated(self):
+        for i in range(3):
+            fan = User.objects.create_user(f'fan{i}')
+            Reaction.objects.create(post=self.post, user=fan, emoji='👍')
+
+        notification = Notification.objects.get(recipient=self.owner)
+        self.assertEqual(notification.verb, 'reaction')
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.sender.username, 'fan2')
+        self.assertEqual(UnreadCounter.objects.get(user=self.owner).unread_social, 1)
+
+    def test_reaction_toggles_count_each_person_once(self):
+        fan, other = User.objects.create_user('fan'), User.objects.create_user('outro')
+        Reaction.objects.create(post=self.post, user=fan, emoji='👍')
+        Reaction.objects.get(user=fan).delete()
+        Reaction.objects.create(post=self.post, user=fan, emoji='❤️')
+        self.assertEqual(Notification.objects.get(recipient=self.owner).actor_count, 1)
+
+        Reaction.objects.create(post=self.post, user=other, emoji='👍')
+        self.assertEqual(Notification.objects.get(recipient=self.owner).actor_count, 2)
+
+    def test_follow_notifications_are_unique(self):
+        fan = User.objects.create_user('fan')
+        fan.profile.following.add(self.owner.profile)
+        fan.profile.following.remove(self.owner.profile)
+        fan.profile.following.add(self.owner.profile)
+        self.assertEqual(Notification.objects.filter(verb='follow').count(), 1)
+
+    def test_batch_is_written_with_constant_queries(self):
+        fans = [User.objects.create_user(f'fan{i}') for i in range(20)]
+
+        def events(count):
+            return [
+                {'recipient_id': self.owner.pk, 'sender_id': fan.pk, 'verb': 'comentou', 'post_id': self.post.pk}
+                for fan in fans[:count]
+            ]
+
+        with CaptureQueriesContext(connection) as small:
+            write_notifications(events(2))
+        with CaptureQueriesContext(connection) as large:
+            write_notifications(events(20))
+
+        self.assertEqual(len(small.captured_queries), len(large.captured_queries))
+        self.assertEqual(UnreadCounter.objects.get(user=self.owner).unread_social, 22)
+
+
+@override_settings(NOTIFICATION_DISPATCHER={'ASYNC': True, 'FLUSH_INTERVAL': 0.05})
+class NotificationDispatcherWorkerTests(TransactionTestCase):
+    """
+    O modo de produção (ASYNC): a thread grava com a própria conexão, por
+    isso os dados do teste precisam estar commitados (TransactionTestCase).
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user('dono')
+        self.post = Posts.objects.create(owner=self.owner, title='Post', content='...')
+        self.fans = [User.objects.create_user(f'fan{i}') for i in range(3)]
+        self.dispatcher = NotificationDispatcher()
+
+    def reaction(self, fan):
+        return {'recipient_id': self.owner.pk, 'sender_id': fan.pk, 'verb': 'reaction',
+                'post_id': self.post.pk, 'aggregate': True}
+
+    def test_worker_thread_writes_after_commit(self):
+        # Sem sinais: os eventos vão só para o dispatcher deste teste
+        Reaction.objects.bulk_create([Reaction(post=self.post, user=fan, emoji='👍') for fan in self.fans])
+        with transaction.atomic():
+            for fan in self.fans:
+                self.dispatcher.dispatch(**self.reaction(fan))
+            # Nada entra na fila antes do commit
+            self.assertIsNone(self.dispatcher.queue)
+
+        self.dispatcher.queue.join()
+        self.assertTrue(self.dispatcher.thread.is_alive())
+        notification = Notification.objects.get(recipient=self.owner)
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(UnreadCounter.objects.get(user=self.owner).unread_social, 1)
+
+    def test_full_queue_writes_synchronously(self):
+        # Um worker ocupado (gravando o lote anterior) não esvazia a fila
+        release = threading.Event()
+        self.dispatcher.thread = threading.Thread(target=release.wait, daemon=True)
+        self.dispatcher.thread.start()
+        self.addCleanup(release.set)
+        self.dispatcher.queue = queue.Queue(maxsize=1)
+
+        follow = {'recipient_id': self.owner.pk, 'sender_id': self.fans[0].pk, 'verb': 'follow', 'unique': True}
+        self.dispatcher.put(follow)
+        with self.assertLogs('core.dispatcher', 'WARNING'):
+            self.dispatcher.put(self.reaction(self.fans[1]))
+        self.assertEqual(list(Notification.objects.values_list('verb', flat=True)), ['reaction'])
+
+        # O que ficou na fila é gravado ao encerrar o processo (atexit)
+        self.dispatcher.flush()
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(self.dispatcher.queue.unfinished_tasks, 0)
+
+
+class NotificationInboxTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('aluno')
+        self.sender = User.objects.create_user('colega')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_notifications(self, count, read=False):
+        Notification.objects.bulk_create([
+            Notification(recipient=self.user, sender=self.sender, verb='follow', read=read) for _ in range(count)
+        ])
+
+    def test_inbox_is_paginated(self):
+        self.create_notifications(25)
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(len(response.data['results']), 20)
+        self.assertIsNotNone(response.data['next'])
+
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNone(response.data['next'])
+
+    def test_mark_read_up_to_is_a_single_update(self):
+        self.create_notifications(30)
+        newest_seen = Notification.objects.order_by('-timestamp', '-id')[5]
+        self.create_notifications(1)
+        reconcile_unread_counter(self.user)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post('/api/notifications/mark-read/', {'up_to': newest_seen.pk}, format='json')
+
+        self.assertEqual(response.data['marked'], 25)
+        self.assertEqual(len([q for q in ctx.captured_queries if q['sql'].startswith('UPDATE "core_notification"')]), 1)
+        self.assertEqual(self.client.get('/api/notifications/status/').data['unread_social_count'], 6)
+
+    def test_mark_read_rejects_invalid_ids(self):
+        response = self.client.post('/api/notifications/mark-read/', {'ids': ['1']}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_compaction_keeps_unread_and_recent_read(self):
+        self.create_notifications(5, read=True)
+        self.create_notifications(2, read=False)
+        Notification.objects.filter(pk=Notification.objects.filter(read=True).order_by('id').first().pk).update(
+            timestamp=timezone.now() - timedelta(days=365)
+        )
+
+        deleted = compact_notifications(read_days=90, max_read_per_user=3)
+
+        self.assertEqual(deleted, 2)
+        self.assertEqual(Notification.objects.filter(read=False).count(), 2)
+        self.assertEqual(Notification.objects.filter(read=True).count(), 3)
+
+    def test_compaction_rolls_up_old_read_notifications(self):
+        commenter = User.objects.create_user('comentarista')
+        post = Posts.objects.create(owner=self.user, title='Post', content='...')
+        Notification.objects.bulk_create(
+            [Notification(recipient=self.user, sender=commenter, verb='comentou', post=post, read=True) for _ in range(4)]
+            + [Notification(recipient=self.user, sender=self.sender, verb='comentou', post=post, read=True)]
+            + [Notification(recipient=self.user, sender=commenter, verb='comentou', post=post, read=False)]
+        )
+        # Agregada mais antiga: a contagem de pessoas não pode sumir na junção
+        aggregated = Notification.objects.create(
+            recipient=self.user, sender=commenter, verb='comentou', post=post, read=True, actor_count=4,
+        )
+        Notification.objects.update(timestamp=timezone.now() - timedelta(days=30))
+        Notification.objects.filter(pk=aggregated.pk).update(timestamp=timezone.now() - timedelta(days=31))
+        newest = Notification.objects.filter(sender=commenter, read=True).order_by('-timestamp', '-id').first()
+
+        deleted = compact_notifications(read_days=90, max_read_per_user=100, rollup_days=7)
+
+        self.assertEqual(deleted, 3)
+        self.assertTrue(Notification.objects.filter(pk=newest.pk).exists())
+        self.assertEqual(Notification.objects.get(pk=aggregated.pk).actor_count, 4)
+        self.assertEqual(Notification.objects.filter(sender=self.sender).count(), 1)
+        self.assertEqual(Notification.objects.filter(read=False).count(), 1)
+
+
+class ChatHistoryTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('aluno')
+        self.friend = User.objects.create_user('colega')
+        self.conversation = Conversation.objects.create()
+        self.conversation.participants.add(self.user, self.friend)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_messages(self, count):
+        Message.objects.bulk_create([
+            Message(conversation=self.conversation, author=[self.user, self.friend][i % 2], content=str(i))
+            for i in range(count)
+        ])
+
+    def test_history_opens_on_newest_page(self):
+        self.create_messages(120)
+        url = f'/api/chat/conversations/{self.conversation.pk}/messages/'
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(response.data['results'][0]['content'], '119')
+        self.assertEqual(len(response.data['results']), 50)
+        self.assertIsNone(response.data['previous'])
+
+        older = self.client.get(response.data['next'])
+        self.assertEqual(older.data['results'][0]['content'], '69')
+
+        newer = self.client.get(older.data['previous'])
+        self.assertEqual([m['id'] for m in newer.data['results']], [m['id'] for m in response.data['results']])
+
+    def test_history_requires_participation(self):
+        self.create_messages(3)
+        self.client.force_authenticate(User.objects.create_user('intruso'))
+        response = self.client.get(f'/api/chat/conversations/{self.conversation.pk}/messages/')
+        self.assertEqual(response.data['results'], [])
+
+    def test_new_message_updates_conversation_state(self):
+        create_message(self.conversation.pk, self.friend, 'oi')
+        message = create_message(self.conversation.pk, self.friend, 'tudo bem?')
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message, message)
+        self.assertEqual(self.conversation.last_message_preview, 'tudo bem?')
+        states = {s.user_id: s for s in ConversationParticipant.objects.filter(conversation=self.conversation)}
+        self.assertEqual(states[self.user.pk].unread_count, 2)
+        self.assertEqual(states[self.friend.pk].last_read_message, message)
+
+        self.client.post(f'/api/chat/conversations/{self.conversation.pk}/read/')
+        response = self.client.get('/api/chat/conversations/')
+        self.assertEqual(response.data['results'][0]['unread_count'], 0)
+        self.assertEqual(response.data['results'][0]['last_read_message'], message.pk)
+
+    def test_inbox_query_count_does_not_depend_on_conversations(self):
+        for i in range(5):
+            other = User.objects.create_user(f'amigo{i}')
+            conversation = Conversation.objects.create()
+            conversation.participants.add(self.user, other)
+            create_message(conversation.pk, other, f'mensagem {i}')
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/chat/conversations/')
+        # Conversas (com a última mensagem e o estado de leitura) + participantes
+        self.assertEqual(len(ctx.captured_queries), 2)
+        self.assertEqual(response.data['results'][0]['last_message']['content'], 'mensagem 4')
+        self.assertEqual(response.data['results'][0]['unread_count'], 1)
+
+    def test_direct_conversation_is_unique_per_pair(self):
+        self.conversation.direct_user_low, self.conversation.direct_user_high = sorted(
+            (self.user, self.friend), key=lambda user: user.pk
+        )
+        self.conversation.save()
+
+        response = self.client.post(f'/api/chat/start/{self.friend.username}/')
+        self.assertEqual(response.data['id'], self.conversation.pk)
+
+        conversation, created = get_or_create_direct_conversation(self.friend, User.objects.create_user('novo'))
+        self.assertTrue(created)
+        self.assertEqual(conversation.participants.count(), 2)
+
+    def test_membership_check_is_cached(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertTrue(is_participant(self.conversation.pk, self.user.pk))
+            self.assertTrue(is_participant(self.conversation.pk, self.user.pk))
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertFalse(is_participant(self.conversation.pk, User.objects.create_user('intruso').pk))
+
+    def chat_communicator(self, user):
+        communicator = WebsocketCommunicator(ChatConsumer.as_asgi(), f'/ws/chat/{self.conversation.pk}/')
+        communicator.scope['user'] = user
+        communicator.scope['url_route'] = {'kwargs': {'conversation_id': str(self.conversation.pk)}}
+        return communicator
+
+    async def receive_chat_frames(self, communicator, count):
+        """ Os próximos frames de mensagem/ack, ignorando presença e eventos em lote. """
+        frames = []
+        while len(frames) < count:
+            frame = await communicator.receive_json_from()
+            if frame.get('type') not in ('presence_state', 'events'):
+                frames.append(frame)
+        return frames
+
+    async def receive_events(self, communicator):
+        while True:
+            frame = await communicator.receive_json_from()
+            if frame.get('type') == 'events':
+                return frame['events']
+
+    @override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'core.layers.LocalChannelLayer'}})
+    async def test_consumer_acks_with_server_ids(self):
+        sender, receiver = self.chat_communicator(self.user), self.chat_communicator(self.friend)
+        self.assertTrue((await sender.connect())[0])
+        self.assertTrue((await receiver.connect())[0])
+
+        for i in range(3):
+            await sender.send_json_to({'message': f'oi {i}', 'client_id': f'c{i}'})
+        frames = await self.receive_chat_frames(sender, 6)
+        delivered = await self.receive_chat_frames(receiver, 3)
+        await sender.disconnect()
+        await receiver.disconnect()
+
+        acks = [frame for frame in frames if frame.get('type') == 'ack']
+        self.assertEqual([ack['client_id'] for ack in acks], ['c0', 'c1', 'c2'])
+        self.assertEqual([message['id'] for message in delivered], [ack['id'] for ack in acks])
+        self.assertEqual([message['content'] for message in delivered], ['oi 0', 'oi 1', 'oi 2'])
+
+    @override_settings(
+        CHANNEL_LAYERS={'default': {'BACKEND': 'core.layers.LocalChannelLayer'}}, CHAT_EVENTS_INTERVAL=0.05,
+    )
+    async def test_typing_and_presence_are_coalesced(self):
+        watcher = self.chat_communicator(self.friend)
+        self.assertTrue((await watcher.connect())[0])
+        self.assertEqual(await watcher.receive_json_from(), {'type': 'presence_state', 'online': [self.friend.pk]})
+        await self.receive_events(watcher)
+
+        typist = self.chat_communicator(self.user)
+        self.assertTrue((await typist.connect())[0])
+        for typing in (True, False, True, True):
+            await typist.send_json_to({'type': 'typing', 'typing': typing})
+        events = await self.receive_events(watcher)
+        await typist.disconnect()
+        await watcher.disconnect()
+
+        # Um frame para a conexão e as quatro teclas, só o último estado de cada tipo
+        self.assertEqual(
+            sorted((event['type'], event['user_id']) for event in events),
+            [('presence', self.user.pk), ('typing', self.user.pk)],
+        )
+        self.assertTrue(next(event for event in events if event['type'] == 'typing')['typing'])
+
+    @override_settings(
+        CHANNEL_LAYERS={'default': {'BACKEND': 'core.layers.LocalChannelLayer'}}, CHAT_EVENTS_INTERVAL=0.05,
+    )
+    async def test_read_receipt_is_persisted_as_pointer(self):
+        messages = await database_sync_to_async(write_messages)([
+            Message(conversation=self.conversation, author=self.friend, content=str(i)) for i in range(3)
+        ])
+        reader = self.chat_communicator(self.user)
+        self.assertTrue((await reader.connect())[0])
+        await reader.send_json_to({'type': 'read', 'up_to': messages[1].pk})
+        events = await self.receive_events(reader)
+        while not any(event['type'] == 'read' for event in events):
+            events = await self.receive_events(reader)
+        await reader.disconnect()
+
+        read = next(event for event in events if event['type'] == 'read')
+        self.assertEqual(read, {
+            'type': 'read', 'user_id': self.user.pk, 'username': self.user.username,
+            'last_read_message': messages[1].pk,
+        })
+        state = await ConversationParticipant.objects.aget(conversation=self.conversation, user=self.user)
+        self.assertEqual(state.last_read_message_id, messages[1].pk)
+        self.assertEqual(state.unread_count, 1)
+
+    @override_settings(
+        CHANNEL_LAYERS={'default': {'BACKEND': 'core.layers.LocalChannelLayer'}}, CHAT_PRESENCE_HEARTBEAT=0.01,
+    )
+    async def test_presence_heartbeat_restores_expired_counter(self):
+        communicator = self.chat_communicator(self.user)
+        self.assertTrue((await communicator.connect())[0])
+        # O contador expirou (ou o cache reiniciou) com a conexão ainda aberta
+        await cache.adelete(PRESENCE_KEY.format(self.conversation.pk, self.user.pk))
+        await asyncio.sleep(0.1)
+        online = await database_sync_to_async(online_user_ids)(self.conversation.pk)
+        await communicator.disconnect()
+
+        self.assertEqual(online, [self.user.pk])
+        self.assertEqual(await database_sync_to_async(online_user_ids)(self.conversation.pk), [])
+
+    def test_batch_updates_read_state_per_author(self):
+        authors = [self.friend, self.user, self.friend, self.friend]
+        messages = write_messages([
+            Message(conversation=self.conversation, author=author, content=str(i)) for i, author in enumerate(authors)
+        ])
+
+        self.conversation.refresh_from_db()
+        self.assertEqual(self.conversation.last_message, messages[-1])
+        states = {s.user_id: s for s in ConversationParticipant.objects.filter(conversation=self.conversation)}
+        # 'aluno' escreveu a segunda: leu até ali e ainda tem as duas seguintes
+        self.assertEqual((states[self.user.pk].last_read_message, states[self.user.pk].unread_count), (messages[1], 2))
+        self.assertEqual((states[self.friend.pk].last_read_message, states[self.friend.pk].unread_count), (messages[3], 0))
+
+    def test_bad_message_fails_alone(self):
+        other = Conversation.objects.create()
+        other.participants.add(self.friend, self.user)
+        results = write_and_serialize([
+            Message(conversation=self.conversation, author=self.user, content='oi'),
+            Message(conversation=other, author=self.friend, content=None),
+            Message(conversation=other, author=self.friend, content='tudo bem?'),
+        ])
+
+        self.assertEqual(results[0]['content'], 'oi')
+        self.assertIsInstance(results[1], Exception)
+        self.assertEqual(results[2]['content'], 'tudo bem?')
+        self.assertEqual(Message.objects.count(), 2)
+        other.refresh_from_db()
+        self.assertEqual(other.last_message_preview, 'tudo bem?')
+
+
+class WebSocketAuthTests(TestCase):
+
+    def setUp(self):
+        token_user_cache.clear()
+        self.user = User.objects.create_user('aluno')
+        self.token = str(AccessToken.for_user(self.user))
+
+    def test_reconnects_reuse_the_cached_snapshot(self):
+        with CaptureQueriesContext(connection) as ctx:
+            first = async_to_sync(get_user)(self.token)
+            second = async_to_sync(get_user)(self.token)
+            username = second.username
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual((first.pk, username), (self.user.pk, 'aluno'))
+        self.assertTrue(second.is_authenticated)
+
+    def test_invalid_token_is_anonymous(self):
+        self.assertFalse(async_to_sync(get_user)(self.token + 'x').is_authenticated)
+
+    def test_cache_is_bounded(self):
+        with override_settings(WEBSOCKET_AUTH_CACHE={'MAX_SIZE': 2}):
+            for _ in range(3):
+                async_to_sync(get_user)(str(AccessToken.for_user(self.user)))
+        self.assertEqual(len(token_user_cache.entries), 2)
+
+
+class LocalChannelLayerTests(TestCase):
+
+    def test_group_send_reaches_other_processes(self):
+        async def scenario(ipc_dir):
+            here, there = LocalChannelLayer(ipc_dir=ipc_dir), LocalChannelLayer(ipc_dir=ipc_dir)
+            local_channel, remote_channel = await here.new_channel(), await there.new_channel()
+            await here.group_add('chat_1', local_channel)
+            await there.group_add('chat_1', remote_channel)
+
+            await here.group_send('chat_1', {'type': 'chat.message', 'text': 'oi'})
+            received = [
+                await asyncio.wait_for(here.receive(local_channel), 1),
+                await asyncio.wait_for(there.receive(remote_channel), 1),
+            ]
+            # send() para um canal do outro processo vai direto para o socket dele
+            await here.send(remote_channel, {'type': 'direct'})
+            received.append(await asyncio.wait_for(there.receive(remote_channel), 1))
+            await here.close()
+            await there.close()
+            return received
+
+        with tempfile.TemporaryDirectory() as ipc_dir:
+            received = async_to_sync(scenario)(ipc_dir)
+        self.assertEqual(received, [
+            {'type': 'chat.message', 'text': 'oi'}, {'type': 'chat.message', 'text': 'oi'}, {'type': 'direct'},
+        ])
+
+    def test_full_channels_drop_group_messages(self):
+        async def scenario():
+            layer = LocalChannelLayer(capacity=2)
+            channel = await layer.new_channel()
+            await layer.group_add('chat_1', channel)
+            for i in range(5):
+                await layer.group_send('chat_1', {'type': 'chat.message', 'n': i})
+            return layer.channels[channel].qsize()
+
+        self.assertEqual(async_to_sync(scenario)(), 2)
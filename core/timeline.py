@@ -0,0 +1,210 @@
+# core/timeline.py
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Posts, Profile, TimelineEntry
+
+CELEBRITY_CACHE_KEY = 'timeline:celebrity_user_ids'
+CELEBRITY_CACHE_TIMEOUT = 300
+# Usuários aparados por DELETE em trim_timelines
+TRIM_BATCH_SIZE = 500
+
+
+def fanout_threshold():
+    return getattr(settings, 'TIMELINE_FANOUT_THRESHOLD', 1000)
+
+
+def celebrity_user_ids():
+    """
+    IDs dos usuários com mais seguidores que o limite de fan-out.
+    Os posts deles não são copiados para as timelines: são lidos na hora.
+
+    É a única fonte para o fan-out e para a leitura, por isso os dois lados
+    sempre concordam. refresh_celebrity_status() atualiza o conjunto quando
+    alguém cruza o limite; com vários processos, use um cache compartilhado.
+    """
+    user_ids = cache.get(CELEBRITY_CACHE_KEY)
+    if user_ids is None:
+        user_ids = frozenset(
+            Profile.objects.annotate(total_followers=Count('followers'))
+            .filter(total_followers__gt=fanout_threshold())
+            .values_list('user_id', flat=True)
+        )
+        cache.set(CELEBRITY_CACHE_KEY, user_ids, CELEBRITY_CACHE_TIMEOUT)
+    return user_ids
+
+
+def fanout_post(post):
+    """
+    Fan-out na escrita: copia um post novo (fora de comunidades) para a
+    timeline de todos os seguidores do autor, com um único INSERT em lote.
+    Não apara as timelines aqui (seria varrer a de cada seguidor dentro da
+    requisição): o excesso sai no comando 'rebuild_timelines --trim-only'.
+    """
+    if post.community_id is not None:
+        return 0
+
+    # O mesmo conjunto que following_feed_queryset usa para ler na hora
+    if post.owner_id in celebrity_user_ids():
+        return 0
+
+    follower_ids = list(Profile.objects.filter(following__user_id=post.owner_id).values_list('user_id', flat=True))
+
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post_id=post.pk, created_at=post.createdAt) for user_id in follower_ids],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    return len(follower_ids)
+
+
+def refresh_celebrity_status(user_ids):
+    """
+    Depois que 'user_ids' ganham ou perdem seguidores: se algum cruzou
+    TIMELINE_FANOUT_THRESHOLD, recalcula celebrity_user_ids(). Quem caiu
+    abaixo do limite volta ao fan-out, e os posts recentes dele (que até
+    agora eram lidos na hora) são copiados para a timeline dos seguidores.
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    celebrities = celebrity_user_ids()
+    now_celebrities = set(
+        Profile.objects.filter(user_id__in=user_ids).annotate(total_followers=Count('followers'))
+        .filter(total_followers__gt=fanout_threshold()).values_list('user_id', flat=True)
+    )
+    demoted = (user_ids & celebrities) - now_celebrities
+    if not demoted and now_celebrities <= celebrities:
+        return
+
+    cache.delete(CELEBRITY_CACHE_KEY)
+    for owner_id in demoted:
+        for follower_id in Profile.objects.filter(following__user_id=owner_id).values_list('user_id', flat=True):
+            backfill_timeline(follower_id, [owner_id])
+
+
+def backfill_timeline(user_id, followed_user_ids):
+    """ Ao seguir alguém, traz os posts recentes dessa pessoa para a timeline. """
+    celebrities = celebrity_user_ids()
+    followed_user_ids = [pk for pk in followed_user_ids if pk not in celebrities]
+    if not followed_user_ids:
+        return
+
+    backfill_size = getattr(settings, 'TIMELINE_BACKFILL_SIZE', 50)
+    entries = []
+    for owner_id in followed_user_ids:
+        recent_posts = (
+            Posts.objects.filter(owner_id=owner_id, community__isnull=True)
+            .order_by('-createdAt', '-pk')
+            .values_list('pk', 'createdAt')[:backfill_size]
+        )
+        entries.extend(
+            TimelineEntry(user_id=user_id, post_id=post_id, created_at=created_at)
+            for post_id, created_at in recent_posts
+        )
+
+    TimelineEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+    trim_timeline(user_id)
+
+
+def remove_from_timeline(user_id, unfollowed_user_ids=None):
+    """ Ao deixar de seguir, remove os posts dessa pessoa da timeline. """
+    entries = TimelineEntry.objects.filter(user_id=user_id)
+    if unfollowed_user_ids is not None:
+        entries = entries.filter(post__owner_id__in=unfollowed_user_ids)
+    entries.delete()
+
+
+def trim_timeline(user_id, max_entries=None):
+    """ Descarta as entradas mais antigas além de TIMELINE_MAX_ENTRIES. """
+    if max_entries is None:
+        max_entries = getattr(settings, 'TIMELINE_MAX_ENTRIES', 1000)
+
+    oldest_kept = (
+        TimelineEntry.objects.filter(user_id=user_id)
+        .order_by('-created_at', '-post_id')
+        .values_list('created_at', 'post_id')[max_entries:max_entries + 1]
+    )
+    oldest_kept = list(oldest_kept)
+    if not oldest_kept:
+        return 0
+
+    created_at, post_id = oldest_kept[0]
+    deleted, _ = TimelineEntry.objects.filter(user_id=user_id).filter(
+        Q(created_at__lt=created_at) | Q(created_at=created_at, post_id__lte=post_id)
+    ).delete()
+    return deleted
+
+
+def oversized_timeline_user_ids(max_entries=None, user_ids=None):
+    """ Usuários com mais de TIMELINE_MAX_ENTRIES entradas (um COUNT agrupado). """
+    if max_entries is None:
+        max_entries = getattr(settings, 'TIMELINE_MAX_ENTRIES', 1000)
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+    return list(
+        entries.order_by().values('user_id').annotate(total=Count('id'))
+        .filter(total__gt=max_entries).values_list('user_id', flat=True)
+    )
+
+
+def trim_timelines(user_ids, max_entries=None):
+    """
+    trim_timeline para muitos usuários (comando 'rebuild_timelines
+    --trim-only'): um SELECT com ROW_NUMBER() e um DELETE a cada
+    TRIM_BATCH_SIZE usuários, em vez de duas queries por usuário.
+    """
+    if max_entries is None:
+        max_entries = getattr(settings, 'TIMELINE_MAX_ENTRIES', 1000)
+
+    deleted = 0
+    for start in range(0, len(user_ids), TRIM_BATCH_SIZE):
+        overflow = list(
+            TimelineEntry.objects.filter(user_id__in=user_ids[start:start + TRIM_BATCH_SIZE])
+            .annotate(position=Window(
+                RowNumber(), partition_by=[F('user_id')], order_by=[F('created_at').desc(), F('post_id').desc()],
+            ))
+            .filter(position__gt=max_entries)
+            .values_list('pk', flat=True)
+        )
+        if overflow:
+            deleted += TimelineEntry.objects.filter(pk__in=overflow).delete()[0]
+    return deleted
+
+
+def rebuild_timeline(user):
+    """ Reconstrói a timeline de um usuário do zero (comando rebuild_timelines). """
+    remove_from_timeline(user.pk)
+    followed_user_ids = list(user.profile.following.values_list('user_id', flat=True))
+    backfill_timeline(user.pk, followed_user_ids)
+
+
+def following_feed_queryset(user):
+    """
+    Posts do feed "Seguindo", anotados com 'feed_created_at'/'feed_post_id'
+    para a paginação.
+
+    No caso comum é um range scan no índice (user, created_at, post) da
+    timeline. Se o usuário segue "celebridades" (acima do limite de fan-out),
+    os posts delas entram na hora, direto da tabela de posts.
+
+    Como no feed anterior à timeline, posts feitos em comunidades ficam de
+    fora (aparecem no feed de cada comunidade, que pode ser privada).
+    """
+    followed_celebrities = list(
+        user.profile.following.filter(user_id__in=celebrity_user_ids()).values_list('user_id', flat=True)
+    )
+
+    if not followed_celebrities:
+        return Posts.objects.filter(timeline_entries__user=user).annotate(
+            feed_created_at=F('timeline_entries__created_at'),
+            feed_post_id=F('timeline_entries__post_id'),
+        )
+
+    timeline_post_ids = TimelineEntry.objects.filter(user=user).values('post_id')
+    return Posts.objects.filter(
+        Q(pk__in=timeline_post_ids) | Q(owner_id__in=followed_celebrities, community__isnull=True)
+    ).annotate(feed_created_at=F('createdAt'), feed_post_id=F('pk'))
@@ -8,10 +8,12 @@ from .views import (
     ReactionCreateDeleteView,
     ToggleSavePostView,
     HashtagPostListView,
+    TrendingTagListView,
 
     # Usuário e Perfil
     UserCreateAPIView,
     UserSearchView,
+    SearchView,
     UserDetailView, 
     UserUpdateView,
     ProfileUpdateView, 
@@ -26,6 +28,7 @@ from .views import (
     StartConversationView, 
     ConversationListView, 
     MessageListView,
+    MarkConversationReadView,
 
     # Comunidades
     CommunityCreateView,
@@ -66,6 +69,7 @@ urlpatterns = [
     # --- Posts, Comentários, Reações ---
     path('api/posts/', PostListAPIView.as_view(), name='posts_list_api'),
     path('api/posts/tags/<str:tag_name>/', HashtagPostListView.as_view(), name='post-hashtag-list'),
+    path('api/tags/trending/', TrendingTagListView.as_view(), name='trending-tags'),
     path('api/posts/<int:pk>/', PostDetailsAPIView.as_view(), name='posts_details_api'),
     path('api/posts/<int:post_pk>/comments/', CommentListCreateView.as_view(), name='post-comments'),
     path('api/posts/<int:post_pk>/react/', ReactionCreateDeleteView.as_view(), name='post-react'),
@@ -74,6 +78,7 @@ urlpatterns = [
     # --- Usuário, Perfil e Busca ---
     path('api/register/', UserCreateAPIView.as_view(), name='user_register'),
     path('api/users/search/', UserSearchView.as_view(), name='user-search'), 
+    path('api/search/', SearchView.as_view(), name='search'),
     path('api/users/<str:username>/follow/', FollowUserView.as_view(), name='follow-user'), 
     path('api/users/<str:username>/', UserDetailView.as_view(), name='user_detail'), 
     path('api/user/update/', UserUpdateView.as_view(), name='user-update'),
@@ -88,6 +93,7 @@ urlpatterns = [
     path('api/chat/start/<str:username>/', StartConversationView.as_view(), name='start-chat'),
     path('api/chat/conversations/', ConversationListView.as_view(), name='chat-list'),
     path('api/chat/conversations/<int:conversation_id>/messages/', MessageListView.as_view(), name='chat-messages'),
+    path('api/chat/conversations/<int:conversation_id>/read/', MarkConversationReadView.as_view(), name='chat-mark-read'),
 
     # --- Comunidades ---
     path('api/communities/', CommunityListView.as_view(), name='community-list'),
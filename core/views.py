@@ -3,38 +3,62 @@ from rest_framework import generics, permissions, status, serializers
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
-from django.db.models import Count, Q # 1. IMPORTAR Q
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from django.contrib.auth.models import User 
 from django_filters.rest_framework import DjangoFilterBackend 
 
 # Importação de todos os modelos e serializers necessários
 from .models import (
-    Posts, Profile, Comment, Reaction, Conversation, Message,
-    Community, CommunityMembership, Announcement, Tag, Notification, Badge
+    Posts, Profile, Comment, Reaction, Message,
+    Community, CommunityMembership, Tag, Badge
 )
 from .serializers import (
     PostSerializer, UserSerializer, MyTokenObtainPairSerializer, ProfileSerializer, 
     UserSearchSerializer, CommentSerializer, ReactionSerializer, 
     ConversationSerializer, MessageSerializer, UserUpdateSerializer,
     CommunitySerializer, CommunityMembershipSerializer, AnnouncementSerializer,
-    TagSerializer, NotificationSerializer, AdminUserSerializer, BadgeSerializer,  
+    TagSerializer, TrendingTagSerializer, NotificationSerializer, AdminUserSerializer, BadgeSerializer,
 )
 # Importação de todas as permissões
 from .permissions import IsOwnerOrReadOnly, IsCommunityAdmin, IsCommunityOwner, IsAdminUser
+from .pagination import (
+    FeedCursorPagination, AdminFeedCursorPagination, CommentCursorPagination,
+    FollowingFeedCursorPagination, CommunityCursorPagination, NotificationCursorPagination,
+    MessageCursorPagination, ConversationCursorPagination,
+)
+from .queries import post_feed_queryset, user_memberships_by_community
+from .counters import change_reaction_count, change_comment_count
+from .timeline import following_feed_queryset
+from .cache import CachedResponseMixin
+from .search import search_ids, in_rank_order
+from .hashtags import normalize_tag, trending_tags
+from .chat import get_or_create_direct_conversation, inbox_queryset, mark_conversation_read
+from .notifications import (
+    announcements_for_profile, announcement_read_state, mark_announcements_read,
+    mark_announcements_read_up_to, mark_notifications_read,
+    unread_counts, reconcile_unread_counter, push_unread_refresh,
+)
+
+# Máximo de resultados por tipo nas buscas (typeahead e /api/search/)
+SEARCH_RESULTS_LIMIT = 20
 
 # ==============================================================================
 # VIEWS DE POSTS E INTERAÇÕES (Existentes)
 # ==============================================================================
 
-class PostListAPIView(generics.ListCreateAPIView):
+class PostListAPIView(CachedResponseMixin, generics.ListCreateAPIView):
     serializer_class = PostSerializer
+    cache_name = 'posts'
+    cache_namespaces = ('posts',)
+    pagination_class = FeedCursorPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly] 
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['owner__username']
 
     def get_queryset(self):
-        return Posts.objects.filter(community__isnull=True).order_by('-createdAt')
+        queryset = Posts.objects.filter(community__isnull=True).order_by('-createdAt')
+        return post_feed_queryset(queryset, self.request.user)
 
     def perform_create(self, serializer):
         serializer.save(owner=self.request.user)
@@ -44,10 +68,12 @@ class PostListAPIView(generics.ListCreateAPIView):
 
 
 class PostDetailsAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Posts.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly]
 
+    def get_queryset(self):
+        return post_feed_queryset(Posts.objects.all(), self.request.user)
+
     def get_serializer_context(self):
         return {'request': self.request}
 
@@ -62,35 +88,49 @@ class ReactionCreateDeleteView(APIView):
         if not emoji:
             return Response({"error": "Emoji é obrigatório."}, status=status.HTTP_400_BAD_REQUEST)
 
-        reaction, created = Reaction.objects.get_or_create(
-            post=post,
-            user=request.user,
-            defaults={'emoji': emoji}
-        )
+        # A reação e os contadores do post mudam juntos (ou nada muda)
+        with transaction.atomic():
+            reaction, created = Reaction.objects.get_or_create(
+                post=post,
+                user=request.user,
+                defaults={'emoji': emoji}
+            )
 
-        if not created and reaction.emoji != emoji:
-             reaction.emoji = emoji
-             reaction.save()
-        elif not created and reaction.emoji == emoji:
-             reaction.delete()
-             return Response(status=status.HTTP_204_NO_CONTENT)
+            if created:
+                change_reaction_count(post.pk, emoji, 1)
+            elif reaction.emoji != emoji:
+                change_reaction_count(post.pk, reaction.emoji, -1)
+                change_reaction_count(post.pk, emoji, 1)
+                reaction.emoji = emoji
+                reaction.save()
+            else:
+                # O contador é descontado pelo sinal post_delete (core/signals.py)
+                reaction.delete()
+                return Response(status=status.HTTP_204_NO_CONTENT)
 
         serializer = ReactionSerializer(reaction)
         return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
 
 class CommentListCreateView(generics.ListCreateAPIView):
+    """
+    Conversa completa de um post, paginada por cursor.
+    Os feeds trazem só uma prévia; o cliente busca o resto daqui sob demanda.
+    """
     serializer_class = CommentSerializer
+    pagination_class = CommentCursorPagination
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         post_pk = self.kwargs['post_pk']
-        return Comment.objects.filter(post_id=post_pk)
+        return Comment.objects.filter(post_id=post_pk).select_related('user__profile')
 
     def perform_create(self, serializer):
         post_pk = self.kwargs['post_pk']
         post = get_object_or_404(Posts, pk=post_pk)
-        serializer.save(user=self.request.user, post=post)
+        with transaction.atomic():
+            serializer.save(user=self.request.user, post=post)
+            change_comment_count(post.pk, 1)
 
 # ==============================================================================
 # VIEWS DE USUÁRIO E PERFIL (Existentes + Novas)
@@ -106,7 +146,9 @@ class MyTokenObtainPairView(TokenObtainPairView):
     serializer_class = MyTokenObtainPairSerializer
 
 
-class UserDetailView(generics.RetrieveAPIView):
+class UserDetailView(CachedResponseMixin, generics.RetrieveAPIView):
+    cache_name = 'user_detail'
+    cache_namespaces = ('users', 'communities')
     queryset = User.objects.all()
     serializer_class = UserSerializer
     lookup_field = 'username'
@@ -132,6 +174,12 @@ class ProfileUpdateView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         return self.request.user.profile
 
+    def perform_update(self, serializer):
+        profile = serializer.save()
+        # Universidade/curso definem quais recados o usuário recebe
+        reconcile_unread_counter(profile.user)
+        push_unread_refresh(profile.user_id)
+
 
 class UserDeleteView(generics.DestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -148,9 +196,44 @@ class UserSearchView(generics.ListAPIView):
     def get_queryset(self):
         query = self.request.query_params.get('q', None)
         if query and len(query) >= 1:
-            return User.objects.filter(username__icontains=query).exclude(id=self.request.user.id)
+            # Índice invertido (core.search): prefixo + ranking, sem varrer a tabela
+            ids = search_ids('user', query, exclude_ids=[self.request.user.id], limit=SEARCH_RESULTS_LIMIT)
+            return in_rank_order(User.objects.select_related('profile'), ids)
         return User.objects.none()
 
+
+class SearchView(APIView):
+    """
+    Busca global: /api/search/?q=...&type=users|posts|communities
+    Sem 'type', devolve os melhores resultados de cada tipo.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        requested = request.query_params.get('type')
+        types = [requested] if requested in ('users', 'posts', 'communities') else ['users', 'posts', 'communities']
+        context = {'request': request}
+        data = {}
+
+        if 'users' in types:
+            ids = search_ids('user', query, exclude_ids=[request.user.id], limit=SEARCH_RESULTS_LIMIT)
+            users = in_rank_order(User.objects.select_related('profile'), ids)
+            data['users'] = UserSearchSerializer(users, many=True, context=context).data
+
+        if 'posts' in types:
+            ids = search_ids('post', query, limit=SEARCH_RESULTS_LIMIT)
+            posts = in_rank_order(post_feed_queryset(Posts.objects.all(), request.user), ids)
+            data['posts'] = PostSerializer(posts, many=True, context=context).data
+
+        if 'communities' in types:
+            ids = search_ids('community', query, limit=SEARCH_RESULTS_LIMIT)
+            communities = in_rank_order(Community.objects.select_related('admin'), ids)
+            context['memberships'] = user_memberships_by_community(request.user)
+            data['communities'] = CommunitySerializer(communities, many=True, context=context).data
+
+        return Response(data)
+
 # ==============================================================================
 # VIEWS DE FEED E SEGUIR (Existentes + Novas)
 # ==============================================================================
@@ -173,16 +256,17 @@ class FollowUserView(APIView):
 
 
 class FollowingPostsFeedView(generics.ListAPIView):
+    """
+    Feed "Seguindo", lido da timeline materializada do usuário
+    (ver core.timeline) em vez de filtrar todos os posts a cada request.
+    """
     serializer_class = PostSerializer
+    pagination_class = FollowingFeedCursorPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
-        following_profiles = user.profile.following.all()
-        return Posts.objects.filter(
-            owner__profile__in=following_profiles, 
-            community__isnull=True
-        ).order_by('-createdAt')
+        return post_feed_queryset(following_feed_queryset(user), user)
 
     def get_serializer_context(self):
         return {'request': self.request}
@@ -205,27 +289,55 @@ class ToggleSavePostView(APIView):
 
 class SavedPostListView(generics.ListAPIView):
     serializer_class = PostSerializer
+    pagination_class = FeedCursorPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return self.request.user.profile.saved_posts.all().order_by('-createdAt')
+        queryset = self.request.user.profile.saved_posts.all().order_by('-createdAt')
+        return post_feed_queryset(queryset, self.request.user)
 
     def get_serializer_context(self):
         return {'request': self.request}
 
 
-class HashtagPostListView(generics.ListAPIView):
+class HashtagPostListView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = PostSerializer
+    cache_name = 'hashtag_posts'
+    cache_namespaces = ('posts',)
+    pagination_class = FeedCursorPagination
     permission_classes = [permissions.AllowAny]
 
     def get_queryset(self):
         tag_name = self.kwargs['tag_name']
-        tag = get_object_or_404(Tag, name__iexact=tag_name) 
-        return tag.posts.filter(community__isnull=True).order_by('-createdAt')
+        # Nomes normalizados na gravação: igualdade exata, usa o índice UNIQUE
+        tag = get_object_or_404(Tag, name=normalize_tag(tag_name))
+        queryset = tag.posts.filter(community__isnull=True).order_by('-createdAt')
+        return post_feed_queryset(queryset, self.request.user)
     
     def get_serializer_context(self):
         return {'request': self.request}
 
+class TrendingTagListView(CachedResponseMixin, generics.ListAPIView):
+    """
+    Tags mais usadas nos últimos dias: /api/tags/trending/?days=7&limit=10
+    Lê os contadores diários (TagUsage), sem varrer os posts.
+    """
+    serializer_class = TrendingTagSerializer
+    cache_name = 'trending_tags'
+    cache_namespaces = ('posts',)
+    cache_vary_on_user = False
+    permission_classes = [permissions.AllowAny]
+    filter_backends = []
+
+    def get_queryset(self):
+        days = self.request.query_params.get('days')
+        try:
+            days = min(max(int(days), 1), 30) if days else None
+            limit = min(max(int(self.request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            raise serializers.ValidationError("'days' e 'limit' devem ser números inteiros.")
+        return trending_tags(days=days, limit=limit)
+
 # ==============================================================================
 # VIEWS DE COMUNIDADES (Novas)
 # ==============================================================================
@@ -260,17 +372,25 @@ class CommunityCreateView(generics.CreateAPIView):
         )
 
 
-class CommunityListView(generics.ListAPIView):
-    queryset = Community.objects.all().order_by('name')
+class CommunityListView(CachedResponseMixin, generics.ListAPIView):
+    cache_name = 'communities'
+    cache_namespaces = ('communities',)
+    queryset = Community.objects.select_related('admin').order_by('name')
     serializer_class = CommunitySerializer
+    pagination_class = CommunityCursorPagination
     permission_classes = [permissions.AllowAny]
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['memberships'] = user_memberships_by_community(self.request.user)
+        return context
+
 
 class CommunityDetailView(generics.RetrieveAPIView):
     """
     Vê os detalhes de uma comunidade.
     """
-    queryset = Community.objects.all()
+    queryset = Community.objects.select_related('admin')
     serializer_class = CommunitySerializer
     permission_classes = [permissions.AllowAny]
     
@@ -279,7 +399,10 @@ class CommunityDetailView(generics.RetrieveAPIView):
 
     # Adiciona o 'request' ao contexto para o SerializerMethodField funcionar
     def get_serializer_context(self):
-        return {'request': self.request}
+        return {
+            'request': self.request,
+            'memberships': user_memberships_by_community(self.request.user),
+        }
 
 
 class JoinCommunityView(APIView):
@@ -374,6 +497,7 @@ class CommunityMemberListView(generics.ListAPIView):
 
 class CommunityFeedView(generics.ListAPIView):
     serializer_class = PostSerializer
+    pagination_class = FeedCursorPagination
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
@@ -383,7 +507,8 @@ class CommunityFeedView(generics.ListAPIView):
         if not community.members.filter(user=self.request.user, status='approved').exists():
             raise serializers.ValidationError("Você não é membro desta comunidade.")
             
-        return community.community_posts.all().order_by('-createdAt')
+        queryset = community.community_posts.all().order_by('-createdAt')
+        return post_feed_queryset(queryset, self.request.user)
 
     def get_serializer_context(self):
         return {'request': self.request}
@@ -410,9 +535,15 @@ class FindCommunityByCourseView(generics.ListAPIView):
     def get_queryset(self):
         course = self.request.query_params.get('course', None)
         if course:
-            return Community.objects.filter(related_course__icontains=course)
+            ids = search_ids('community', course, fields=['related_course'], limit=100)
+            return in_rank_order(Community.objects.select_related('admin'), ids)
         return Community.objects.none()
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['memberships'] = user_memberships_by_community(self.request.user)
+        return context
+
 class PromoteCommunityAdminView(APIView):
     """
     (Dono da Comunidade) Promove ou Rebaixa um membro para Admin.
@@ -448,24 +579,14 @@ class AnnouncementListView(generics.ListAPIView):
 
     # 2. LÓGICA DE FILTRAGEM ATUALIZADA
     def get_queryset(self):
-        profile = self.request.user.profile
-        
-        if not profile.onboarding_complete:
-            return Announcement.objects.none()
-        
-        # 1. Global (sem universidade E sem curso)
-        global_ann = Q(target_university="", target_course="")
-        
-        # 2. Universidade Específica (sem curso)
-        uni_ann = Q(target_university=profile.universidade, target_course="")
-        
-        # 3. Curso Específico
-        course_ann = Q(target_university=profile.universidade, target_course=profile.curso)
+        # Globais, da universidade ou do curso (ver core.notifications)
+        return announcements_for_profile(self.request.user.profile).order_by('-timestamp', '-id')
 
-        # Retorna a união (OR) dos três filtros
-        return Announcement.objects.filter(
-            global_ann | uni_ann | course_ann
-        ).distinct().order_by('-timestamp')
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        # Carregado uma vez para a lista toda (campo 'is_read')
+        context['announcement_read_state'] = announcement_read_state(self.request.user)
+        return context
 
 
 class AnnouncementCreateView(generics.CreateAPIView):
@@ -502,21 +623,48 @@ class NotificationListView(generics.ListAPIView):
     """
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationCursorPagination
 
     def get_queryset(self):
-        return self.request.user.notifications.all() 
+        return self.request.user.notifications.select_related('sender', 'post', 'community')
+
+
+# Máximo de IDs aceitos numa marcação por lista (para mais, use 'up_to')
+MAX_MARK_READ_IDS = 1000
+
+
+def parse_mark_read_request(data):
+    """
+    Corpo das views de "marcar como lido":
+    - {"ids": [1, 2, 3]}: só esses
+    - {"up_to": 42}: tudo até o item 42 (inclusive)
+    - {}: tudo
+    Devolve (ids, up_to); levanta ValidationError se o corpo for inválido.
+    """
+    ids = data.get('ids')
+    up_to = data.get('up_to')
+    if ids is not None:
+        if (not isinstance(ids, list) or not ids or len(ids) > MAX_MARK_READ_IDS
+                or not all(isinstance(pk, int) for pk in ids)):
+            raise serializers.ValidationError(
+                {"ids": f"Informe uma lista de até {MAX_MARK_READ_IDS} IDs inteiros."}
+            )
+    elif up_to is not None and not isinstance(up_to, int):
+        raise serializers.ValidationError({"up_to": "Informe o ID do item mais recente a marcar."})
+    return ids, up_to
 
 
 class MarkNotificationReadView(APIView):
     """
-    Marca notificações sociais (like/comment) como lidas.
+    Marca notificações sociais (like/comment) como lidas: todas, uma lista
+    de IDs ou tudo até um ID ('up_to'). Sempre um único UPDATE.
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        # Marca todas as sociais como lidas
-        request.user.notifications.filter(read=False).update(read=True)
-        return Response(status=status.HTTP_200_OK)
+        ids, up_to = parse_mark_read_request(request.data)
+        marked = mark_notifications_read(request.user, ids=ids, up_to=up_to)
+        return Response({'marked': marked}, status=status.HTTP_200_OK)
     
 # --- NOVAS VIEWS PARA O ÍCONE DE SINO ---
 
@@ -528,55 +676,28 @@ class NotificationStatusView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
-        profile = user.profile
-
-        # 1. Contagem de Recados (Alta Prioridade - Vermelha)
-        unread_announcements_count = 0
-        if profile.onboarding_complete:
-            global_ann = Q(target_university="", target_course="")
-            uni_ann = Q(target_university=profile.universidade, target_course="")
-            course_ann = Q(target_university=profile.universidade, target_course=profile.curso)
-            
-            unread_announcements_count = Announcement.objects.filter(
-                global_ann | uni_ann | course_ann
-            ).exclude(
-                read_by=user # Exclui os que o usuário já leu
-            ).distinct().count()
-
-        # 2. Contagem Social (Baixa Prioridade - Roxa)
-        unread_social_count = user.notifications.filter(read=False).count()
-
-        return Response({
-            'unread_announcements_count': unread_announcements_count,
-            'unread_social_count': unread_social_count
-        })
+        # Recados (alta prioridade, vermelha) e sociais (baixa, roxa), lidos
+        # do UnreadCounter. Com o socket aberto o cliente só usa isto como fallback.
+        return Response(unread_counts(request.user))
 
 class MarkAnnouncementReadView(APIView):
     """
-    Marca um recado (ou vários) como lido pelo usuário logado.
+    Marca recados como lidos pelo usuário logado: uma lista de IDs
+    ('ids') ou tudo até um recado ('up_to', só move a marca d'água).
     """
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request):
-        ids_to_mark = request.data.get('ids', None)
-        
-        if ids_to_mark and isinstance(ids_to_mark, list):
-            # Filtra apenas os recados que o usuário pode ver
-            profile = request.user.profile
-            global_ann = Q(target_university="", target_course="")
-            uni_ann = Q(target_university=profile.universidade, target_course="")
-            course_ann = Q(target_university=profile.universidade, target_course=profile.curso)
-            
-            announcements = Announcement.objects.filter(
-                (global_ann | uni_ann | course_ann) & Q(id__in=ids_to_mark)
-            ).distinct()
-            
-            # Adiciona o usuário ao M2M 'read_by'
-            request.user.read_announcements.add(*announcements)
-            return Response(status=status.HTTP_200_OK)
-        
-        return Response({"error": "Lista de 'ids' inválida."}, status=status.HTTP_400_BAD_REQUEST)
+        ids, up_to = parse_mark_read_request(request.data)
+        if ids is None and up_to is None:
+            return Response({"error": "Informe 'ids' ou 'up_to'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Marca d'água + exceções, já descontando do UnreadCounter (core.notifications)
+        if ids is not None:
+            marked = mark_announcements_read(request.user, ids)
+        else:
+            marked = mark_announcements_read_up_to(request.user, up_to)
+        return Response({'marked': marked}, status=status.HTTP_200_OK)
 
 # ==============================================================================
 # VIEWS DE CHAT (Existentes)
@@ -594,40 +715,55 @@ class StartConversationView(APIView):
         if other_user == request.user:
             return Response({"error": "Você não pode iniciar uma conversa consigo mesmo."}, status=status.HTTP_400_BAD_REQUEST)
 
-        conversation = Conversation.objects.annotate(
-            participant_count=Count('participants')
-        ).filter(
-            participant_count=2,
-            participants=request.user
-        ).filter(
-            participants=other_user
-        ).first()
-
-        if not conversation:
-            conversation = Conversation.objects.create()
-            conversation.participants.add(request.user, other_user)
-        
+        # Uma busca pelo par (menor ID, maior ID), segura com requisições simultâneas
+        conversation, created = get_or_create_direct_conversation(request.user, other_user)
+
         serializer = ConversationSerializer(conversation)
         return Response(serializer.data, status=status.HTTP_200_OK)
     
 class ConversationListView(generics.ListAPIView):
+    """
+    Caixa de entrada do chat: uma query paginada sobre o estado
+    desnormalizado das conversas (última mensagem, não lidas).
+    """
     serializer_class = ConversationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ConversationCursorPagination
 
     def get_queryset(self):
-        return self.request.user.conversations.all().order_by('-updated_at')
+        return inbox_queryset(self.request.user).prefetch_related('participants')
+
+
+class MarkConversationReadView(APIView):
+    """
+    Move o ponteiro de leitura do usuário na conversa: até 'up_to' (ID de
+    mensagem) ou, sem corpo, até a última mensagem.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request, conversation_id):
+        up_to = request.data.get('up_to')
+        if up_to is not None and not isinstance(up_to, int):
+            return Response({"error": "Informe o ID da mensagem em 'up_to'."}, status=status.HTTP_400_BAD_REQUEST)
+        last_read = mark_conversation_read(request.user, conversation_id, up_to)
+        if last_read is None and not request.user.conversations.filter(pk=conversation_id).exists():
+            return Response({"error": "Conversa não encontrada."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({'last_read_message': last_read.pk if last_read else None}, status=status.HTTP_200_OK)
 
 class MessageListView(generics.ListAPIView):
+    """
+    Histórico de uma conversa, paginado por cursor sobre (timestamp, id):
+    mais recentes primeiro (ver MessageCursorPagination).
+    """
     serializer_class = MessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = MessageCursorPagination
 
     def get_queryset(self):
         conversation_id = self.kwargs['conversation_id']
-        try:
-            conversation = self.request.user.conversations.get(id=conversation_id)
-            return conversation.messages.all()
-        except Conversation.DoesNotExist:
+        if not self.request.user.conversations.filter(id=conversation_id).exists():
             return Message.objects.none()
+        return Message.objects.filter(conversation_id=conversation_id).select_related('author')
 
 # ==============================================================================
 # VIEWS DO PAINEL ADMIN (Existentes e Novas)
@@ -662,10 +798,14 @@ class AdminPostListView(generics.ListAPIView):
     """
     (ADMIN) Lista TODOS os posts para gerenciamento.
     """
-    queryset = Posts.objects.all().order_by('createdAt')
     serializer_class = PostSerializer
+    pagination_class = AdminFeedCursorPagination
     permission_classes = [IsAdminUser] 
 
+    def get_queryset(self):
+        queryset = Posts.objects.all().order_by('createdAt')
+        return post_feed_queryset(queryset, self.request.user)
+
 # --- CRUD DE BADGES ---
 
 class BadgeListCreateAPIView(generics.ListCreateAPIView):